@@ -0,0 +1,144 @@
+import itertools
+import pandas as pd
+from . import generators as gen
+
+# {name: setup}. A setup builds its inputs once and returns the function to time
+# (sync or async, no arguments). Imports live inside setups so a missing optional
+# dependency only skips the cases that need it.
+CASES = {}
+
+
+def case(name):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def _bare(cls, **attrs):
+    """An instance without running __init__ (no network, no background tasks), with just `attrs` set."""
+    obj = cls.__new__(cls)
+    obj.__dict__.update(attrs)
+    return obj
+
+
+# --- AI learner ---------------------------------------------------------------
+
+@case("learner.prepare_data")
+def learner_prepare_data():
+    from src.ai.learner import StrategyLearner
+    learner = StrategyLearner()
+    df = pd.DataFrame(gen.candles(2000), columns=gen.OHLCV_COLUMNS)
+    return lambda: learner.prepare_data(df)
+
+
+@case("learner.train")
+def learner_train():
+    from src.ai.learner import StrategyLearner
+    learner = StrategyLearner()
+    ohlcv = gen.candles(1000)
+    return lambda: learner.train(ohlcv)
+
+
+@case("learner.predict")
+def learner_predict():
+    from src.ai.learner import StrategyLearner, FeatureState
+    learner = StrategyLearner()
+    history = gen.candles(1500)
+    learner.train(history[:1000])
+    # Every call sees one new candle, as in the live loop
+    windows = itertools.cycle([history[i - FeatureState.WINDOW:i] for i in range(1000, 1500)])
+    return lambda: learner.predict(next(windows))
+
+
+# --- Strategies -------------------------------------------------------------
+
+@case("coffin299.calculate_rsi")
+def coffin299_calculate_rsi():
+    from src.strategy.coffin299 import Coffin299Strategy
+    strategy = _bare(Coffin299Strategy)
+    # execute_trading_logic fetches 50 candles per cycle
+    closes = pd.DataFrame(gen.candles(50), columns=gen.OHLCV_COLUMNS)['close'].astype(float)
+    return lambda: strategy.calculate_rsi(closes)
+
+
+@case("gpt51.calculate_indicators")
+def gpt51_calculate_indicators():
+    from src.strategy.coffin299_gpt51 import Coffin299GPT51Strategy
+    strategy = _bare(Coffin299GPT51Strategy, breakout_lookback=20)
+    # execute_trading_logic fetches 200 candles per pair
+    ohlcv = gen.candles(200)
+    return lambda: strategy.calculate_indicators(ohlcv)
+
+
+# --- Exchanges ----------------------------------------------------------------
+
+@case("hyperliquid.handle_price_update")
+def hyperliquid_handle_price_update():
+    from src.exchanges.hyperliquid import Hyperliquid
+    exchange = _bare(Hyperliquid, price_cache={}, last_update_time={}, paper_mode=False)
+    messages = itertools.cycle(gen.all_mids_messages(n_coins=200, n_ticks=100))
+    return lambda: exchange._handle_price_update(next(messages))
+
+
+@case("hyperliquid.parse_positions")
+def hyperliquid_parse_positions():
+    from src.exchanges.hyperliquid import Hyperliquid
+    raw = gen.positions(20)
+    prices = {p['position']['coin']: float(p['position']['entryPx']) * 1.01 for p in raw}
+    exchange = _bare(Hyperliquid, price_cache=prices)
+    return lambda: exchange._parse_positions(raw)
+
+
+@case("exchange.execute_paper_order")
+def exchange_execute_paper_order():
+    from src.exchanges.base import BaseExchange
+
+    class PaperExchange(BaseExchange):
+        async def get_balance(self):
+            return {'total': dict(self.paper_balance)}
+
+        async def get_market_price(self, pair):
+            return self.paper_engine.mids.get(pair, 0.0)
+
+        async def get_ohlcv(self, pair, timeframe, limit=100):
+            return []
+
+        async def _execute_real_order(self, pair, type, side, amount, price=None):
+            raise AssertionError("benchmarks never place live orders")
+
+    # Paper mode with the default ledger and position DB (created in the runner's scratch directory)
+    exchange = PaperExchange({
+        'strategy': {'paper_mode': {'enabled': True, 'initial_balance': {'USDC': 1_000_000.0}}},
+        'equity_store': {'enabled': False},
+    })
+    prices = itertools.cycle(gen.mid_prices(n_coins=1, n_ticks=1000)['BTC'])
+    sides = itertools.cycle(['buy', 'sell'])
+    return lambda: exchange._execute_paper_order('BTC/USDC', 'market', next(sides), 0.01, next(prices))
+
+
+# --- Database -----------------------------------------------------------------
+
+@case("position_db.save_position")
+def position_db_save_position():
+    from src.database import PositionDB
+    db = PositionDB("bench_positions.db")
+    updates = itertools.cycle([(f"{coin}/USDC", float(i % 7), 100.0 + i)
+                               for i, coin in enumerate(gen.coins(20))])
+    return lambda: db.save_position(*next(updates))
+
+
+@case("position_db.flush")
+def position_db_flush():
+    from src.database import PositionDB
+    db = PositionDB("bench_positions_flush.db")
+    symbols = [f"{coin}/USDC" for coin in gen.coins(20)]
+    amounts = itertools.cycle([1.0, 2.0, 0.0])
+
+    def write_batch():
+        # One writer-thread transaction's worth: 20 symbols changed (some closed)
+        amount = next(amounts)
+        for i, symbol in enumerate(symbols):
+            db.save_position(symbol, amount * (i + 1), 100.0 + i)
+        db.flush()
+    return write_batch
@@ -0,0 +1,71 @@
+import numpy as np
+
+# Synthetic market data shaped like what the bot receives (CCXT-style OHLCV rows,
+# Hyperliquid websocket/REST payloads). Same seed -> same input on every commit.
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+COINS = ['BTC', 'ETH', 'SOL', 'AVAX', 'BNB', 'LTC', 'DOGE', 'kPEPE', 'XRP', 'WLD',
+         'ADA', 'ENA', 'POPCAT', 'GOAT', 'HYPE', 'PENGU', 'PUMP', 'XPL', 'LINEA', 'ASTER']
+
+
+def coins(n):
+    """The strategy universe, padded with synthetic names up to n coins."""
+    return (COINS + [f"COIN{i}" for i in range(len(COINS), n)])[:n]
+
+
+def candles(n=1000, seed=0, start_price=3000.0, interval_ms=15 * 60 * 1000, volatility=0.004,
+            start_ts=1_700_000_000_000):
+    """
+    n OHLCV rows ([timestamp, open, high, low, close, volume]) following a
+    geometric random walk; each candle opens at the previous close.
+    """
+    rng = np.random.default_rng(seed)
+    closes = start_price * np.exp(np.cumsum(rng.normal(0, volatility, n)))
+    opens = np.concatenate(([start_price], closes[:-1]))
+    highs = np.maximum(opens, closes) * (1 + np.abs(rng.normal(0, volatility / 2, n)))
+    lows = np.minimum(opens, closes) * (1 - np.abs(rng.normal(0, volatility / 2, n)))
+    volumes = rng.lognormal(mean=3.0, sigma=0.5, size=n)
+    timestamps = start_ts + np.arange(n, dtype=np.int64) * interval_ms
+    return [[int(ts), float(o), float(h), float(l), float(c), float(v)]
+            for ts, o, h, l, c, v in zip(timestamps, opens, highs, lows, closes, volumes)]
+
+
+def mid_prices(n_coins=200, n_ticks=100, seed=0, volatility=0.0005):
+    """
+    {coin: [mid per tick]}: independent random walks starting between 0.01 and
+    100k, so prices cover the magnitudes the exchange actually quotes.
+    """
+    rng = np.random.default_rng(seed)
+    starts = 10 ** rng.uniform(-2, 5, n_coins)
+    paths = starts[:, None] * np.exp(np.cumsum(rng.normal(0, volatility, (n_coins, n_ticks)), axis=1))
+    return {coin: path.tolist() for coin, path in zip(coins(n_coins), paths)}
+
+
+def all_mids_messages(n_coins=200, n_ticks=100, seed=0):
+    """Hyperliquid allMids websocket messages (prices as strings, as sent by the exchange)."""
+    mids = mid_prices(n_coins, n_ticks, seed)
+    return [{'channel': 'allMids', 'data': {'mids': {coin: f"{path[i]:.6g}" for coin, path in mids.items()}}}
+            for i in range(n_ticks)]
+
+
+def positions(n=20, seed=0):
+    """Hyperliquid clearinghouseState assetPositions (string fields, signed szi)."""
+    rng = np.random.default_rng(seed)
+    raw = []
+    for coin in coins(n):
+        entry = float(10 ** rng.uniform(-2, 5))
+        size = float(rng.choice([-1, 1]) * rng.uniform(0.01, 10))
+        mark = entry * (1 + rng.normal(0, 0.02))
+        raw.append({
+            'type': 'oneWay',
+            'position': {
+                'coin': coin,
+                'szi': f"{size:.4f}",
+                'entryPx': f"{entry:.6g}",
+                'positionValue': f"{abs(size) * mark:.2f}",
+                'unrealizedPnl': f"{size * (mark - entry):.4f}",
+                'leverage': {'type': 'cross', 'value': 5},
+            },
+        })
+    return raw
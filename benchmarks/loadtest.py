@@ -0,0 +1,312 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# main_loop labels its cycle metrics with the strategy class name
+STRATEGY_CLASSES = {'copy_leaderboard': 'Coffin299CopyStrategy', 'coffin299_GPT5.1': 'Coffin299GPT51Strategy'}
+
+
+def rss_bytes():
+    """Resident memory of this process, or None where it can't be read."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+def _get_json(url, timeout=2):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.load(response)
+
+
+def _percentiles(values):
+    if not values:
+        return {}
+    values = np.asarray(values)
+    return {'p50': float(np.percentile(values, 50)), 'p95': float(np.percentile(values, 95)),
+            'p99': float(np.percentile(values, 99)), 'max': float(values.max()), 'count': len(values)}
+
+
+def _histogram_delta(before, after):
+    """(count, sum, cumulative buckets) observed between two Histogram.snapshot()s."""
+    if after is None:
+        return 0, 0.0, []
+    if before is None:
+        return after['count'], after['sum'], after['buckets']
+    return (after['count'] - before['count'], after['sum'] - before['sum'],
+            [(le, n - m) for (le, n), (_, m) in zip(after['buckets'], before['buckets'])])
+
+
+def _bucket_quantile(buckets, count, q):
+    """Upper bound of the histogram bucket holding quantile q."""
+    for le, n in buckets:
+        if n >= q * count:
+            return le
+    return None
+
+
+class MemorySampler:
+    """Samples resident memory once a second."""
+
+    def __init__(self):
+        self.samples = []  # (monotonic time, rss bytes)
+
+    async def run(self):
+        while True:
+            rss = rss_bytes()
+            if rss is not None:
+                self.samples.append((time.monotonic(), rss))
+            await asyncio.sleep(1)
+
+    def since(self, start):
+        return [s for s in self.samples if s[0] >= start]
+
+
+def histograms(strategy):
+    from src import metrics
+    snapshots = {}
+    for name, labels in (('price_update_seconds', ()), ('strategy_cycle_seconds', (STRATEGY_CLASSES[strategy],)),
+                         ('event_loop_lag_seconds', ())):
+        histogram = metrics.registry.get(name)
+        snapshots[name] = histogram.snapshot(*labels) if histogram else None
+    return snapshots
+
+
+def build_config(args, base_url):
+    from src.config_loader import load_config
+    config = load_config(args.config)
+    config['active_exchange'] = 'hyperliquid'
+    config['log_level'] = args.log_level
+    hl = config.setdefault('exchanges', {}).setdefault('hyperliquid', {})
+    hl.update(api_url=base_url, ws_url=base_url.replace('http', 'ws', 1) + '/ws', testnet=False,
+              private_key='', wallet_address='0x' + '0' * 40)
+
+    strategy = config['strategy']
+    strategy['type'] = args.strategy
+    strategy['loop_interval_seconds'] = args.loop_interval
+    strategy.setdefault('paper_mode', {}).update(enabled=True, initial_balance={'USDC': args.balance})
+    # Mirror the mock leaderboard's #1 trader (its positions follow the mock's script)
+    strategy.setdefault('copy_trading', {})['mirror_target_address'] = ''
+
+    config.setdefault('discord', {})['enabled'] = False
+    config.setdefault('webui', {})['enabled'] = args.webui
+    return config
+
+
+async def run(args, workdir):
+    base_url = f"http://127.0.0.1:{args.port}"
+    command = [sys.executable, '-m', 'benchmarks.mock_hyperliquid', 'serve', '--port', str(args.port),
+               '--rate', str(args.rate), '--coins', str(args.coins), '--seed', str(args.seed),
+               '--traders', str(args.traders), '--trader-interval', str(args.trader_interval)]
+    if args.replay:
+        command += ['--replay', args.replay, '--speed', str(args.speed)]
+    if args.script:
+        command += ['--script', args.script]
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')]))}
+    mock = subprocess.Popen(command, cwd=workdir, env=env)
+
+    try:
+        for _ in range(100):
+            try:
+                _get_json(f"{base_url}/stats")
+                break
+            except OSError:
+                if mock.poll() is not None:
+                    raise RuntimeError(f"Mock exchange exited with code {mock.returncode}")
+                await asyncio.sleep(0.2)
+        else:
+            raise RuntimeError("Mock exchange did not come up")
+
+        # Imported here so the bot's logs and databases land in the scratch directory
+        from src import metrics, tracing
+        from src.main import start_bot
+
+        config = build_config(args, base_url)
+        if args.tracemalloc:
+            tracemalloc.start(25)
+        ws_messages = metrics.registry.get("ws_messages_total")
+        sampler = MemorySampler()
+        sampler_task = asyncio.create_task(sampler.run())
+        bot = asyncio.create_task(start_bot(config=config))
+
+        print(f"Warming up for {args.warmup}s...")
+        await asyncio.sleep(args.warmup)
+        if bot.done():
+            bot.result()
+
+        before = histograms(args.strategy)
+        mock_before = _get_json(f"{base_url}/stats")
+        received_before = ws_messages.value('allMids')
+        started, started_wall = time.monotonic(), time.time()
+        memory_before = tracemalloc.take_snapshot() if args.tracemalloc else None
+
+        print(f"Measuring for {args.duration}s...")
+        await asyncio.sleep(args.duration)
+        if bot.done():
+            bot.result()
+        elapsed = time.monotonic() - started
+        received = ws_messages.value('allMids') - received_before
+        mock_after = _get_json(f"{base_url}/stats")
+        memory_after = tracemalloc.take_snapshot() if args.tracemalloc else None
+        after = histograms(args.strategy)
+
+        bot.cancel()
+        sampler_task.cancel()
+        await asyncio.gather(bot, sampler_task, return_exceptions=True)
+    finally:
+        mock.terminate()
+        try:
+            mock.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            mock.kill()
+
+    # --- Report ----------------------------------------------------------------
+    sent = mock_after['mids_sent'] - mock_before['mids_sent']
+
+    traces = [t for t in tracing.tracer.completed if t.wall >= started_wall]
+    tick_to_trade, tick_to_fill = [], []
+    for trace in traces:
+        ack = next((end for stage, _, end, _ in trace.spans if stage == 'exchange_ack'), None)
+        fill = next((end for stage, _, end, _ in trace.spans if stage == 'fill'), None)
+        if ack is not None:
+            tick_to_trade.append(ack - trace.origin)
+        if fill is not None:
+            tick_to_fill.append(fill - trace.origin)
+
+    update_count, update_sum, _ = _histogram_delta(before['price_update_seconds'], after['price_update_seconds'])
+    cycle_count, cycle_sum, _ = _histogram_delta(before['strategy_cycle_seconds'], after['strategy_cycle_seconds'])
+    lag_count, _, lag_buckets = _histogram_delta(before['event_loop_lag_seconds'], after['event_loop_lag_seconds'])
+
+    rss = sampler.since(started)
+    memory = {}
+    if len(rss) > 1:
+        times, values = np.array([t for t, _ in rss]), np.array([m for _, m in rss], dtype=float)
+        memory = {'start_mb': values[0] / 2**20, 'end_mb': values[-1] / 2**20, 'peak_mb': values.max() / 2**20,
+                  'growth_mb': (values[-1] - values[0]) / 2**20,
+                  'slope_mb_per_min': float(np.polyfit(times - times[0], values, 1)[0]) * 60 / 2**20}
+
+    report = {
+        'config': {'strategy': args.strategy, 'rate': args.rate, 'coins': args.coins, 'duration': args.duration,
+                   'replay': args.replay, 'traders': args.traders, 'trader_interval': args.trader_interval},
+        'throughput': {
+            'mids_sent_per_s': sent / elapsed,
+            'mids_received_per_s': received / elapsed,
+            'delivered_ratio': received / sent if sent else None,
+            'mock_skipped_ticks': mock_after['skipped_ticks'] - mock_before['skipped_ticks'],
+            'price_update_mean_us': update_sum / update_count * 1e6 if update_count else None,
+            'cycles_per_s': cycle_count / elapsed,
+            'cycle_mean_ms': cycle_sum / cycle_count * 1000 if cycle_count else None,
+            'orders': sum(t.orders for t in traces),
+            'rest_requests': {k: v - mock_before['info'].get(k, 0) for k, v in mock_after['info'].items()},
+            'unhandled_requests': mock_after['unhandled'],
+        },
+        'tick_to_trade_ms': {k: v * 1000 if k != 'count' else v for k, v in _percentiles(tick_to_trade).items()},
+        'tick_to_fill_ms': {k: v * 1000 if k != 'count' else v for k, v in _percentiles(tick_to_fill).items()},
+        'loop_lag_ms': {'p50_le': (_bucket_quantile(lag_buckets, lag_count, 0.5) or 0) * 1000,
+                        'p99_le': (_bucket_quantile(lag_buckets, lag_count, 0.99) or 0) * 1000} if lag_count else {},
+        'memory': memory,
+    }
+    if memory_before is not None:
+        report['memory']['top_growth'] = [
+            f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks)"
+            for stat in memory_after.compare_to(memory_before, 'lineno')[:10]]
+    return report
+
+
+def print_report(report):
+    t, m = report['throughput'], report['memory']
+    fmt = lambda v, spec=".1f": format(v, spec) if isinstance(v, (int, float)) else "n/a"
+    print(f"\n=== Load test: {report['config']['strategy']}, {report['config']['coins']} coins, "
+          f"{report['config']['rate']:g} mids/s for {report['config']['duration']}s ===")
+    print(f"Mids sent / received:  {fmt(t['mids_sent_per_s'])}/s / {fmt(t['mids_received_per_s'])}/s "
+          f"(delivered {fmt((t['delivered_ratio'] or 0) * 100)}%, mock skipped {t['mock_skipped_ticks']} ticks)")
+    print(f"allMids handling:      {fmt(t['price_update_mean_us'])} us mean")
+    print(f"Strategy cycles:       {fmt(t['cycles_per_s'], '.2f')}/s, {fmt(t['cycle_mean_ms'])} ms mean, "
+          f"{t['orders']} orders")
+    for name in ('tick_to_trade_ms', 'tick_to_fill_ms'):
+        p = report[name]
+        label = name.replace('_ms', '').replace('_', '-')
+        print(f"{label + ':':<23}" + (f"p50 {fmt(p['p50'], '.2f')} ms, p95 {fmt(p['p95'], '.2f')} ms, "
+                                      f"p99 {fmt(p['p99'], '.2f')} ms, max {fmt(p['max'], '.2f')} ms ({p['count']})"
+                                      if p else "no orders"))
+    if report['loop_lag_ms']:
+        print(f"Event loop lag:        p50 <= {fmt(report['loop_lag_ms']['p50_le'])} ms, "
+              f"p99 <= {fmt(report['loop_lag_ms']['p99_le'])} ms")
+    if 'start_mb' in m:
+        print(f"Memory (RSS):          {fmt(m['start_mb'])} -> {fmt(m['end_mb'])} MB "
+              f"(peak {fmt(m['peak_mb'])}, {fmt(m['slope_mb_per_min'], '+.2f')} MB/min)")
+    for line in m.get('top_growth', []):
+        print(f"    {line}")
+    print(f"REST requests:         {t['rest_requests']}")
+    if t['unhandled_requests']:
+        print(f"Unhandled by the mock: {t['unhandled_requests']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the bot (paper mode) against the mock Hyperliquid and "
+                                                 "reports throughput, tick-to-trade latency and memory growth.")
+    parser.add_argument('--strategy', default='copy_leaderboard', choices=['copy_leaderboard', 'coffin299_GPT5.1'])
+    parser.add_argument('--duration', type=float, default=60, help="Measured seconds (default 60)")
+    parser.add_argument('--warmup', type=float, default=10, help="Seconds before measuring (default 10)")
+    parser.add_argument('--rate', type=float, default=1000, help="allMids messages per second (default 1000)")
+    parser.add_argument('--coins', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--replay', help="Recorded stream for the mock to replay (see mock_hyperliquid record)")
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed factor; 0 = replay at --rate")
+    parser.add_argument('--script', help="Target-trader position script for the mock")
+    parser.add_argument('--traders', type=int, default=3)
+    parser.add_argument('--trader-interval', type=float, default=10.0,
+                        help="Seconds between scripted target-trader position changes (default 10)")
+    parser.add_argument('--loop-interval', type=float, default=0, help="strategy.loop_interval_seconds (default 0)")
+    parser.add_argument('--balance', type=float, default=10000, help="Paper USDC balance (default 10000)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--config', default=os.path.join(ROOT, 'config.default.yaml'),
+                        help="Base config (endpoints, paper mode and notifications are overridden)")
+    parser.add_argument('--webui', action='store_true', help="Also serve the web UI from the bot")
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--tracemalloc', action='store_true', help="Show the allocation sites that grew the most")
+    parser.add_argument('--output', help="Write the report as JSON")
+    args = parser.parse_args(argv)
+    # Paths are relative to where the command was run, not the scratch directory
+    for name in ('replay', 'script', 'config'):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    # The bot's databases and logs go to a scratch directory
+    with tempfile.TemporaryDirectory(prefix="coffin299-loadtest-") as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            if sys.platform == 'win32':
+                asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+            report = asyncio.run(run(args, workdir))
+        finally:
+            os.chdir(cwd)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
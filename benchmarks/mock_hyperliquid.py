@@ -0,0 +1,410 @@
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import os
+import sys
+import time
+import zlib
+from collections import Counter
+import numpy as np
+import yaml
+from aiohttp import web, WSMsgType, ClientSession
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks import generators as gen
+from src.logger import setup_logger
+
+logger = setup_logger("mock_hyperliquid")
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '8h': 28_800_000, '12h': 43_200_000,
+    '1d': 86_400_000, '3d': 259_200_000, '1w': 604_800_000, '1M': 2_592_000_000,
+}
+
+
+class TraderScript:
+    """
+    Positions of the copy-trading targets over time: {address: [(at, {coin: signed size})]},
+    `at` in seconds since the server started. The last step before `elapsed` applies;
+    with `period`, the script repeats every `period` seconds.
+    """
+
+    def __init__(self, steps, period=None):
+        self.period = period
+        self.steps = {address: sorted(changes, key=lambda c: c[0]) for address, changes in steps.items()}
+        self._times = {address: [at for at, _ in changes] for address, changes in self.steps.items()}
+
+    @classmethod
+    def load(cls, path):
+        """
+        YAML/JSON file:
+          traders:
+            "0xabc...":
+              - {at: 0, positions: {ETH: 0.5}}
+              - {at: 30, positions: {ETH: -0.5, BTC: 0.01}}
+        """
+        with open(path, encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+        return cls({address: [(float(step['at']), {coin: float(size) for coin, size in step.get('positions', {}).items()})
+                              for step in changes]
+                    for address, changes in data.get('traders', {}).items()})
+
+    @classmethod
+    def random(cls, n_traders, coins, interval=20.0, seed=0, horizon=6 * 3600, notional=1000.0, mids=None):
+        """Each trader opens, flips or closes one position every `interval` seconds (seeded)."""
+        rng = np.random.default_rng(seed)
+        universe = coins[:10]
+        steps = {}
+        for i in range(n_traders):
+            positions, changes = {}, []
+            for at in np.arange(0, horizon, interval):
+                coin = universe[rng.integers(len(universe))]
+                if coin in positions and rng.random() < 0.4:
+                    positions.pop(coin)
+                else:
+                    price = mids.get(coin, 1.0) if mids else 1.0
+                    positions[coin] = float(rng.choice([-1, 1]) * rng.uniform(0.5, 1.5) * notional / price)
+                changes.append((float(at), dict(positions)))
+            steps[f"0x{(i + 1) * 0x1111:040x}"] = changes
+        return cls(steps, period=horizon)
+
+    def addresses(self):
+        return list(self.steps)
+
+    def positions_at(self, address, elapsed):
+        times = self._times.get(address)
+        if not times:
+            return None
+        if self.period:
+            elapsed %= self.period
+        i = bisect.bisect_right(times, elapsed) - 1
+        return self.steps[address][i][1] if i >= 0 else {}
+
+
+class MockHyperliquid:
+    """
+    Local stand-in for the Hyperliquid API: POST /info (allMids, meta, clearinghouseState,
+    candleSnapshot, leaderboard, ...), POST /exchange (orders fill at the mid) and the
+    /ws feed (allMids, l2Book).
+
+    Mids are either generated (random walks, `rate` allMids messages per second)
+    or replayed from a file recorded with `record`. GET /stats reports what was served.
+    """
+
+    def __init__(self, coins=50, rate=100.0, seed=0, replay=None, replay_speed=1.0, script=None,
+                 account_value=10000.0, l2_rate=10.0):
+        self.rate = rate
+        self.replay = replay
+        self.replay_speed = replay_speed
+        self.script = script or TraderScript({})
+        self.account_value = account_value
+        self.l2_rate = l2_rate
+
+        self.rng = np.random.default_rng(seed)
+        self.coins = gen.coins(coins)
+        self.index = {coin: i for i, coin in enumerate(self.coins)}
+        self.mids = np.array([path[0] for path in gen.mid_prices(coins, 1, seed).values()])
+        self.clients = {}  # {websocket: {'allMids': bool, 'l2Book': set of coins}}
+        self._oids = itertools.count(1)
+        self._feed = None
+        self.started = time.time()
+        self.stats = {'mids_sent': 0, 'messages_sent': 0, 'skipped_ticks': 0, 'orders': 0,
+                      'info': Counter(), 'unhandled': Counter()}
+
+        self._info_handlers = {
+            'allMids': lambda body: self._all_mids(),
+            'meta': lambda body: self._meta(),
+            'spotMeta': lambda body: {'universe': [], 'tokens': []},
+            'metaAndAssetCtxs': lambda body: [self._meta(), self._asset_ctxs()],
+            'spotMetaAndAssetCtxs': lambda body: [{'universe': [], 'tokens': []}, []],
+            'perpDexs': lambda body: [None],
+            'clearinghouseState': self._clearinghouse_state,
+            'candleSnapshot': self._candles,
+            'leaderboard': lambda body: self._leaderboard(),
+            'openOrders': lambda body: [],
+            'frontendOpenOrders': lambda body: [],
+            'userFills': lambda body: [],
+        }
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post('/info', self.handle_info)
+        app.router.add_post('/exchange', self.handle_exchange)
+        app.router.add_get('/ws', self.handle_ws)
+        app.router.add_get('/stats', self.handle_stats)
+        app.on_startup.append(self._start_feed)
+        app.on_cleanup.append(self._stop_feed)
+        return app
+
+    # --- REST ---------------------------------------------------------------
+
+    async def handle_info(self, request):
+        body = await request.json()
+        kind = body.get('type')
+        self.stats['info'][kind] += 1
+        handler = self._info_handlers.get(kind)
+        if handler is None:
+            self.stats['unhandled'][kind] += 1
+            return web.json_response({'error': f"Unsupported info type: {kind}"}, status=400)
+        return web.json_response(handler(body))
+
+    async def handle_exchange(self, request):
+        body = await request.json()
+        action = body.get('action', {})
+        if action.get('type') != 'order':
+            return web.json_response({'status': 'ok', 'response': {'type': action.get('type'),
+                                                                   'data': {'statuses': ['success']}}})
+        statuses = []
+        for order in action.get('orders', []):
+            self.stats['orders'] += 1
+            asset = int(order.get('a', 0))
+            mid = self.mids[asset] if asset < len(self.mids) else float(order.get('p', 0))
+            statuses.append({'filled': {'totalSz': order.get('s'), 'avgPx': f"{mid:.6g}", 'oid': next(self._oids)}})
+        return web.json_response({'status': 'ok', 'response': {'type': 'order', 'data': {'statuses': statuses}}})
+
+    async def handle_stats(self, request):
+        return web.json_response({**self.stats, 'uptime': time.time() - self.started, 'clients': len(self.clients),
+                                  'coins': len(self.coins)})
+
+    def _all_mids(self):
+        return {coin: f"{mid:.6g}" for coin, mid in zip(self.coins, self.mids)}
+
+    def _meta(self):
+        return {'universe': [{'name': coin, 'szDecimals': 4 if mid < 1000 else 5, 'maxLeverage': 20,
+                              'onlyIsolated': False} for coin, mid in zip(self.coins, self.mids)]}
+
+    def _asset_ctxs(self):
+        return [{'funding': '0.0000125', 'openInterest': '1000000.0', 'prevDayPx': f"{mid:.6g}",
+                 'dayNtlVlm': '10000000.0', 'premium': '0.0', 'oraclePx': f"{mid:.6g}", 'markPx': f"{mid:.6g}",
+                 'midPx': f"{mid:.6g}", 'impactPxs': [f"{mid * 0.9999:.6g}", f"{mid * 1.0001:.6g}"],
+                 'dayBaseVlm': '10000.0'} for mid in self.mids]
+
+    def _clearinghouse_state(self, body):
+        positions = self.script.positions_at(body.get('user'), time.time() - self.started) or {}
+        asset_positions, notional = [], 0.0
+        for coin, size in positions.items():
+            mid = float(self.mids[self.index[coin]]) if coin in self.index else 1.0
+            notional += abs(size) * mid
+            asset_positions.append({'type': 'oneWay', 'position': {
+                'coin': coin, 'szi': f"{size:.6g}", 'entryPx': f"{mid:.6g}",
+                'positionValue': f"{abs(size) * mid:.2f}", 'unrealizedPnl': '0.0', 'returnOnEquity': '0.0',
+                'marginUsed': f"{abs(size) * mid / 5:.2f}", 'leverage': {'type': 'cross', 'value': 5},
+            }})
+        summary = {'accountValue': f"{self.account_value:.2f}", 'totalNtlPos': f"{notional:.2f}",
+                   'totalRawUsd': f"{self.account_value:.2f}", 'totalMarginUsed': f"{notional / 5:.2f}"}
+        return {'assetPositions': asset_positions, 'marginSummary': summary, 'crossMarginSummary': summary,
+                'withdrawable': f"{max(self.account_value - notional / 5, 0):.2f}", 'time': int(time.time() * 1000)}
+
+    def _candles(self, body):
+        req = body.get('req', {})
+        coin, interval = req.get('coin'), req.get('interval', '15m')
+        step = INTERVAL_MS.get(interval, 900_000)
+        end = int(req.get('endTime') or time.time() * 1000) // step * step
+        start = int(req.get('startTime') or end - 500 * step)
+        n = int(min(max((end - start) // step + 1, 1), 5000))
+        rows = gen.candles(n, seed=zlib.crc32(f"{coin}:{interval}".encode()), start_price=1.0,
+                           interval_ms=step, start_ts=end - (n - 1) * step)
+        # Rescale so the last close is the coin's current mid
+        mid = float(self.mids[self.index[coin]]) if coin in self.index else 1.0
+        scale = mid / rows[-1][4]
+        return [{'t': ts, 'T': ts + step - 1, 's': coin, 'i': interval, 'o': f"{o * scale:.6g}",
+                 'h': f"{h * scale:.6g}", 'l': f"{l * scale:.6g}", 'c': f"{c * scale:.6g}", 'v': f"{v:.4f}", 'n': 100}
+                for ts, o, h, l, c, v in rows]
+
+    def _leaderboard(self):
+        return [{'ethAddress': address, 'accountValue': f"{1_000_000 / (rank + 1):.2f}", 'displayName': None,
+                 'windowPerformances': [['week', {'pnl': f"{100_000 / (rank + 1):.2f}", 'roi': '0.1', 'vlm': '0'}]]}
+                for rank, address in enumerate(self.script.addresses())]
+
+    # --- WebSocket ---------------------------------------------------------
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        subscriptions = self.clients[ws] = {'allMids': False, 'l2Book': set()}
+        logger.info(f"WebSocket client connected ({len(self.clients)} total)")
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                data = json.loads(msg.data)
+                method = data.get('method')
+                if method == 'ping':
+                    await ws.send_str('{"channel": "pong"}')
+                    continue
+                if method not in ('subscribe', 'unsubscribe'):
+                    continue
+                subscription = data.get('subscription', {})
+                on = method == 'subscribe'
+                if subscription.get('type') == 'allMids':
+                    subscriptions['allMids'] = on
+                elif subscription.get('type') == 'l2Book':
+                    (subscriptions['l2Book'].add if on else subscriptions['l2Book'].discard)(subscription.get('coin'))
+                # Other channels (user, orderUpdates, ...) are acknowledged but never publish
+                await ws.send_str(json.dumps({'channel': 'subscriptionResponse', 'data': data}))
+        finally:
+            self.clients.pop(ws, None)
+            logger.info(f"WebSocket client disconnected ({len(self.clients)} left)")
+        return ws
+
+    async def _broadcast_mids(self, text):
+        for ws, subscriptions in list(self.clients.items()):
+            if subscriptions['allMids'] and not ws.closed:
+                await ws.send_str(text)
+                self.stats['messages_sent'] += 1
+        self.stats['mids_sent'] += 1
+
+    async def _send_books(self):
+        now = int(time.time() * 1000)
+        for ws, subscriptions in list(self.clients.items()):
+            for coin in subscriptions['l2Book']:
+                if coin not in self.index or ws.closed:
+                    continue
+                mid = float(self.mids[self.index[coin]])
+                sizes = self.rng.uniform(0.5, 5.0, 40) * 1000 / mid
+                levels = [[{'px': f"{mid * (1 - (i + 0.5) * 1e-4):.6g}", 'sz': f"{sizes[i]:.4f}", 'n': 1}
+                           for i in range(20)],
+                          [{'px': f"{mid * (1 + (i + 0.5) * 1e-4):.6g}", 'sz': f"{sizes[20 + i]:.4f}", 'n': 1}
+                           for i in range(20)]]
+                await ws.send_str(json.dumps({'channel': 'l2Book', 'data': {'coin': coin, 'time': now, 'levels': levels}}))
+                self.stats['messages_sent'] += 1
+
+    async def _generate(self):
+        """Random-walk mids for every coin, `rate` allMids messages per second."""
+        loop = asyncio.get_running_loop()
+        start = next_books = loop.time()
+        ticks = 0
+        while True:
+            due = int((loop.time() - start) * self.rate) - ticks
+            if due > max(self.rate / 10, 1):
+                # More than 100ms behind (slow client or CPU bound): skip rather than burst
+                self.stats['skipped_ticks'] += due - 1
+                ticks += due - 1
+                due = 1
+            for _ in range(due):
+                self.mids *= np.exp(self.rng.normal(0, 0.0002, len(self.mids)))
+                await self._broadcast_mids(json.dumps({'channel': 'allMids', 'data': {'mids': self._all_mids()}}))
+                ticks += 1
+            if self.l2_rate and loop.time() >= next_books:
+                await self._send_books()
+                next_books += 1 / self.l2_rate
+            await asyncio.sleep(max(start + (ticks + 1) / self.rate - loop.time(), 0))
+
+    async def _replay(self):
+        """
+        Replays a recorded stream ({"t": seconds, "msg": message} per line, or bare
+        messages) at its original pace x replay_speed, or at `rate` when
+        replay_speed is 0, looping at the end.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            start, count = loop.time(), 0
+            with open(self.replay, encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    at, msg = (record.get('t'), record['msg']) if 'msg' in record else (None, record)
+                    at = at / self.replay_speed if self.replay_speed and at is not None else count / self.rate
+                    await asyncio.sleep(max(start + at - loop.time(), 0))
+                    count += 1
+                    if msg.get('channel') == 'allMids':
+                        self._apply_mids(msg.get('data', {}).get('mids', {}))
+                        await self._broadcast_mids(json.dumps(msg))
+                    elif msg.get('channel') == 'l2Book':
+                        text = json.dumps(msg)
+                        for ws, subscriptions in list(self.clients.items()):
+                            if msg.get('data', {}).get('coin') in subscriptions['l2Book'] and not ws.closed:
+                                await ws.send_str(text)
+                                self.stats['messages_sent'] += 1
+            logger.info(f"Replayed {count} messages from {self.replay}, starting over")
+
+    def _apply_mids(self, mids):
+        for coin, price in mids.items():
+            i = self.index.get(coin)
+            if i is None:
+                i = self.index[coin] = len(self.coins)
+                self.coins.append(coin)
+                self.mids = np.append(self.mids, 0.0)
+            self.mids[i] = float(price)
+
+    async def _start_feed(self, app):
+        self.started = time.time()
+        self._feed = asyncio.create_task(self._replay() if self.replay else self._generate())
+
+    async def _stop_feed(self, app):
+        if self._feed:
+            self._feed.cancel()
+
+
+async def record(path, seconds, ws_url="wss://api.hyperliquid.xyz/ws", l2_coins=()):
+    """Records the live allMids (and l2Book) feed to `path` for replay."""
+    count = 0
+    async with ClientSession() as session:
+        async with session.ws_connect(ws_url) as ws:
+            await ws.send_str(json.dumps({'method': 'subscribe', 'subscription': {'type': 'allMids'}}))
+            for coin in l2_coins:
+                await ws.send_str(json.dumps({'method': 'subscribe', 'subscription': {'type': 'l2Book', 'coin': coin}}))
+            start = time.perf_counter()
+            with open(path, 'w', encoding='utf-8') as f:
+                while (remaining := seconds - (time.perf_counter() - start)) > 0:
+                    try:
+                        msg = await ws.receive(timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if msg.type != WSMsgType.TEXT:
+                        break
+                    data = json.loads(msg.data)
+                    if data.get('channel') in ('allMids', 'l2Book'):
+                        f.write(json.dumps({'t': round(time.perf_counter() - start, 6), 'msg': data}) + '\n')
+                        count += 1
+    logger.info(f"Recorded {count} messages to {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Hyperliquid API and WebSocket feed.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help="Run the mock exchange")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--coins', type=int, default=50, help="Number of listed coins (default 50)")
+    serve.add_argument('--rate', type=float, default=100.0, help="allMids messages per second (default 100)")
+    serve.add_argument('--seed', type=int, default=0)
+    serve.add_argument('--replay', help="Recorded stream to replay instead of generating mids")
+    serve.add_argument('--speed', type=float, default=1.0, help="Replay speed factor; 0 = replay at --rate")
+    serve.add_argument('--l2-rate', type=float, default=10.0, help="l2Book snapshots per second per subscription")
+    serve.add_argument('--script', help="YAML/JSON script of target-trader positions (see TraderScript.load)")
+    serve.add_argument('--traders', type=int, default=3, help="Random target traders when no --script (default 3)")
+    serve.add_argument('--trader-interval', type=float, default=20.0,
+                       help="Seconds between random target-trader position changes (default 20)")
+
+    rec = commands.add_parser('record', help="Record the live feed for --replay")
+    rec.add_argument('path')
+    rec.add_argument('--seconds', type=float, default=60)
+    rec.add_argument('--ws-url', default="wss://api.hyperliquid.xyz/ws")
+    rec.add_argument('--l2', default="", help="Comma-separated coins to record l2Book for")
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        asyncio.run(record(args.path, args.seconds, args.ws_url, [c for c in args.l2.split(',') if c]))
+        return
+
+    mock = MockHyperliquid(coins=args.coins, rate=args.rate, seed=args.seed, replay=args.replay,
+                           replay_speed=args.speed, l2_rate=args.l2_rate)
+    mock.script = TraderScript.load(args.script) if args.script else TraderScript.random(
+        args.traders, mock.coins, interval=args.trader_interval, seed=args.seed,
+        mids=dict(zip(mock.coins, mock.mids.tolist())))
+    logger.info(f"Mock Hyperliquid on http://{args.host}:{args.port} (ws://{args.host}:{args.port}/ws), "
+                f"{len(mock.coins)} coins, {'replaying ' + args.replay if args.replay else f'{args.rate:g} mids/s'}")
+    web.run_app(mock.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import gc
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+
+def environment():
+    """What the numbers depend on besides the code: compare only runs from the same machine."""
+    return {
+        'commit': _git("rev-parse", "--short", "HEAD") or None,
+        'dirty': bool(_git("status", "--porcelain", "--untracked-files=no")),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor() or None,
+        'node': platform.node(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+async def _time_calls(fn, number, is_async):
+    """Seconds for `number` calls of fn (awaiting each result for async cases)."""
+    start = time.perf_counter()
+    if is_async:
+        for _ in range(number):
+            await fn()
+    else:
+        for _ in range(number):
+            fn()
+    return time.perf_counter() - start
+
+
+async def measure(fn, rounds=7, min_time=0.2):
+    """
+    timeit-style: calibrates how many calls make a round last at least
+    `min_time`, then times `rounds` rounds with the GC paused.
+    Returns per-call statistics in seconds.
+    """
+    # Warm-up (caches, lazy imports), which also tells whether fn returns awaitables
+    result = fn()
+    is_async = inspect.isawaitable(result)
+    if is_async:
+        await result
+    number = 1
+    while True:
+        elapsed = await _time_calls(fn, number, is_async)
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+
+    per_call = []
+    for _ in range(rounds):
+        gc.collect()
+        gc.disable()
+        try:
+            per_call.append(await _time_calls(fn, number, is_async) / number)
+        finally:
+            gc.enable()
+    return {
+        'median': statistics.median(per_call),
+        'min': min(per_call),
+        'mean': statistics.fmean(per_call),
+        'stdev': statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        'number': number,
+        'rounds': rounds,
+    }
+
+
+async def run_cases(names, rounds, min_time):
+    from benchmarks.cases import CASES
+    results, skipped = {}, {}
+    for name in names:
+        try:
+            fn = CASES[name]()
+            results[name] = await measure(fn, rounds=rounds, min_time=min_time)
+        except ImportError as e:
+            skipped[name] = f"missing dependency: {e.name or e}"
+            print(f"  {name:<36} skipped ({skipped[name]})")
+            continue
+        except Exception as e:
+            skipped[name] = f"error: {type(e).__name__}: {e}"
+            print(f"  {name:<36} failed ({skipped[name]})")
+            continue
+        r = results[name]
+        print(f"  {name:<36} {_fmt(r['median']):>10}  (min {_fmt(r['min'])}, ±{_fmt(r['stdev'])}, "
+              f"{r['number']} calls x {rounds})")
+    return results, skipped
+
+
+def compare(results, baseline, threshold):
+    """
+    Median per-call time against the baseline's. A case regresses when it is
+    more than `threshold` (fraction) slower. Returns the regressed case names.
+    """
+    regressions = []
+    print(f"\nAgainst baseline {baseline['env'].get('commit')} ({baseline['env'].get('timestamp')}), "
+          f"threshold {threshold:.0%}:")
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"  {name:<36} {_fmt(result['median']):>10}  (new)")
+            continue
+        change = result['median'] / base['median'] - 1
+        if change > threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            status = "faster"
+        else:
+            status = "ok"
+        print(f"  {name:<36} {_fmt(result['median']):>10}  vs {_fmt(base['median']):>10}  {change:+7.1%}  {status}")
+    return regressions
+
+
+def _fmt(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g}{unit}"
+    return f"{seconds / 1e-9:.3g}ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the bot's hot paths on synthetic data.")
+    parser.add_argument("-k", "--filter", action="append", default=[],
+                        help="Only run cases whose name contains this (repeatable)")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit")
+    parser.add_argument("--rounds", type=int, default=7, help="Timed rounds per case (default 7)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per round (default 0.2)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Slowdown (fraction of the baseline median) flagged as a regression (default 0.15)")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/<time>_<commit>.json)")
+    args = parser.parse_args(argv)
+
+    from benchmarks.cases import CASES
+    names = [n for n in CASES if not args.filter or any(f in n for f in args.filter)]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    env = environment()
+    print(f"Benchmarking {env['commit'] or 'unknown commit'}{' (dirty)' if env['dirty'] else ''} "
+          f"on {env['node']} ({env['machine']}, {env['cpu_count']} CPUs, Python {env['python']})")
+
+    # Databases, logs and the paper ledger go to a scratch directory, not the bot's working files
+    with tempfile.TemporaryDirectory(prefix="coffin299-bench-") as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            from src.logger import configure_logging
+            configure_logging({'log_level': 'WARNING'})
+            results, skipped = asyncio.run(run_cases(names, args.rounds, args.min_time))
+        finally:
+            os.chdir(cwd)
+
+    report = {'env': env, 'results': results, 'skipped': skipped}
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{env['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['env'].get('node') != env['node'] or baseline['env'].get('python') != env['python']:
+            print(f"Warning: baseline is from {baseline['env'].get('node')} / Python "
+                  f"{baseline['env'].get('python')}; timings are only comparable on the same machine.")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+    elif not args.save_baseline:
+        print(f"No baseline at {args.baseline} (run with --save-baseline to create one).")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+import os
+import time
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import TimeSeriesSplit
+from .learner import StrategyLearner
+from ..logger import setup_logger, init_worker_logging
+
+logger = setup_logger("ai_evaluation")
+
+# Same thresholds as StrategyLearner.predict
+BUY_THRESHOLD = 0.6
+SELL_THRESHOLD = 0.4
+
+# Feature matrices shared with worker processes (set once per worker by _init_worker)
+_worker_data = {}
+
+
+def build_feature_matrix(ohlcv_data):
+    """
+    Computes features once for the whole history.
+    Returns (X, y, returns) where returns[i] is the next-candle return of row i.
+    The last candle is dropped because its outcome is not known yet.
+    """
+    learner = StrategyLearner()
+    df = learner._to_frame(ohlcv_data)
+    data = learner.prepare_data(df)
+
+    close = df['close'].astype(float)
+    next_return = (close.shift(-1) / close - 1).loc[data.index]
+    mask = next_return.notna().to_numpy()
+
+    X = data[learner.feature_cols].to_numpy(dtype=np.float64)[mask]
+    y = data['target'].to_numpy()[mask]
+    returns = next_return.to_numpy(dtype=np.float64)[mask]
+    return X, y, returns
+
+
+def _init_worker(X, y, returns):
+    init_worker_logging()
+    _worker_data['X'] = X
+    _worker_data['y'] = y
+    _worker_data['returns'] = returns
+
+
+def _run_fold(train_end, test_start, test_end, params):
+    X = _worker_data['X']
+    y = _worker_data['y']
+    returns = _worker_data['returns']
+
+    # One core per fold; parallelism comes from running folds side by side
+    model = RandomForestClassifier(random_state=42, n_jobs=1, **params)
+    start = time.process_time()
+    model.fit(X[:train_end], y[:train_end])
+    fit_seconds = time.process_time() - start
+
+    X_test = X[test_start:test_end]
+    classes = list(model.classes_)
+    if 1 in classes:
+        proba = model.predict_proba(X_test)[:, classes.index(1)]
+    else:
+        proba = np.zeros(len(X_test))
+
+    return {
+        'train_size': train_end,
+        'fit_seconds': fit_seconds,
+        'proba': proba,
+        'y': y[test_start:test_end],
+        'returns': returns[test_start:test_end],
+    }
+
+
+def _score(proba, y, returns, n_bins=10):
+    accuracy = float(((proba > 0.5).astype(int) == y).mean()) if len(y) else 0.0
+    brier = float(((proba - y) ** 2).mean()) if len(y) else 0.0
+
+    # Calibration: mean predicted probability vs observed up-frequency per bin
+    calibration = []
+    bins = np.minimum((proba * n_bins).astype(int), n_bins - 1)
+    for b in range(n_bins):
+        in_bin = bins == b
+        count = int(in_bin.sum())
+        if count:
+            calibration.append({
+                'bin': f"{b / n_bins:.1f}-{(b + 1) / n_bins:.1f}",
+                'predicted': float(proba[in_bin].mean()),
+                'observed': float(y[in_bin].mean()),
+                'count': count,
+            })
+
+    # PnL of the BUY/SELL thresholds: long above 0.6, short below 0.4, flat otherwise
+    position = np.where(proba > BUY_THRESHOLD, 1.0, np.where(proba < SELL_THRESHOLD, -1.0, 0.0))
+    trade_returns = position * returns
+    trades = int((position != 0).sum())
+    hit_rate = float((trade_returns[position != 0] > 0).mean()) if trades else 0.0
+
+    return {
+        'accuracy': accuracy,
+        'brier': brier,
+        'calibration': calibration,
+        'pnl': float(trade_returns.sum()),
+        'trades': trades,
+        'hit_rate': hit_rate,
+    }
+
+
+def _evaluate(pool, folds, n_rows, params):
+    results = list(pool.map(_run_fold, *zip(*folds), itertools.repeat(params)))
+
+    report = _score(
+        np.concatenate([r['proba'] for r in results]),
+        np.concatenate([r['y'] for r in results]),
+        np.concatenate([r['returns'] for r in results]),
+    )
+    report['params'] = params
+    report['folds'] = []
+    for r in results:
+        fold = _score(r['proba'], r['y'], r['returns'])
+        fold.pop('calibration')
+        fold['train_size'] = r['train_size']
+        fold['fit_seconds'] = r['fit_seconds']
+        report['folds'].append(fold)
+
+    # Fit time grows roughly linearly with samples; extrapolate from the largest fold
+    largest = max(results, key=lambda r: r['train_size'])
+    report['estimated_fit_seconds'] = largest['fit_seconds'] * n_rows / max(largest['train_size'], 1)
+    return report
+
+
+def _make_pool(features, n_folds, max_workers):
+    max_workers = max_workers or min(n_folds, os.cpu_count() or 1)
+    # Feature matrices are shipped once per worker, not once per fold. Spawned rather
+    # than forked: this runs from an executor thread of a multithreaded process, and
+    # a fork there can copy locks other threads hold (logging queue, aiohttp).
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker, initargs=features)
+
+
+def _split(n_rows, n_splits):
+    splitter = TimeSeriesSplit(n_splits=n_splits)
+    return [(int(train[-1]) + 1, int(test[0]), int(test[-1]) + 1) for train, test in splitter.split(np.empty(n_rows))]
+
+
+def walk_forward_evaluate(ohlcv_data=None, params=None, n_splits=5, max_workers=None, features=None):
+    """
+    Walk-forward (expanding window) evaluation of a RandomForest configuration.
+    Each fold trains on all candles before its test block and is scored out-of-sample.
+    Folds run in parallel across cores; features are computed once and shared.
+
+    Pass `features` (from build_feature_matrix) to reuse a cached feature matrix.
+    Returns a report dict with accuracy, brier, calibration, threshold PnL and
+    the estimated CPU seconds of a full fit.
+    """
+    params = params or {}
+    features = features if features is not None else build_feature_matrix(ohlcv_data)
+    n_rows = len(features[0])
+    folds = _split(n_rows, n_splits)
+
+    with _make_pool(features, len(folds), max_workers) as pool:
+        return _evaluate(pool, folds, n_rows, params)
+
+
+def select_hyperparameters(ohlcv_data=None, grid=None, cpu_budget_seconds=60, n_splits=5, max_workers=None, features=None):
+    """
+    Evaluates every combination in `grid` with walk-forward splits and returns
+    (best_params, best_report). Only configurations whose estimated full fit stays
+    within `cpu_budget_seconds` (single-core CPU time) are eligible; the best is
+    the one with the highest out-of-sample accuracy, ties broken by threshold PnL.
+    Pass `features` (e.g. from FeatureStore.feature_matrix) to skip feature computation.
+    """
+    grid = grid or {'n_estimators': [50, 100], 'max_depth': [8, 12, None]}
+    features = features if features is not None else build_feature_matrix(ohlcv_data)
+    n_rows = len(features[0])
+    folds = _split(n_rows, n_splits)
+
+    keys = list(grid.keys())
+    candidates = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+    reports = []
+    with _make_pool(features, len(folds), max_workers) as pool:
+        for params in candidates:
+            report = _evaluate(pool, folds, n_rows, params)
+            within_budget = report['estimated_fit_seconds'] <= cpu_budget_seconds
+            logger.info(
+                f"Walk-forward {params}: acc={report['accuracy']:.3f}, brier={report['brier']:.4f}, "
+                f"pnl={report['pnl']:.4f} ({report['trades']} trades), "
+                f"fit~{report['estimated_fit_seconds']:.1f}s{'' if within_budget else ' (over budget)'}"
+            )
+            reports.append((within_budget, report))
+
+    eligible = [r for ok, r in reports if ok]
+    if eligible:
+        best = max(eligible, key=lambda r: (r['accuracy'], r['pnl']))
+    else:
+        logger.warning("No configuration fits the CPU budget; using the fastest one.")
+        best = min((r for _, r in reports), key=lambda r: r['estimated_fit_seconds'])
+
+    logger.info(f"Selected hyperparameters: {best['params']} (accuracy {best['accuracy']:.3f})")
+    return best['params'], best
@@ -0,0 +1,115 @@
+import os
+import numpy as np
+import pandas as pd
+from .learner import StrategyLearner
+from ..logger import setup_logger
+
+logger = setup_logger("ai_feature_store")
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+FEATURE_COLUMNS = ['rsi', 'sma_diff', 'volatility', 'volume_change']  # StrategyLearner.feature_cols
+COLUMNS = OHLCV_COLUMNS + FEATURE_COLUMNS
+
+
+class FeatureStore:
+    """
+    Append-only on-disk store of closed candles and their learner features,
+    one file per (pair, timeframe).
+
+    Each file is a flat array of float64 rows laid out as COLUMNS, so reads are a
+    np.memmap with no parsing, and appends compute features for the new rows only
+    (using the last few stored candles as rolling-window context).
+    """
+
+    # Candles of context needed to compute features for the next row (sma_slow window)
+    CONTEXT = 26
+
+    def __init__(self, root="data/features"):
+        self.root = root
+        self._learner = StrategyLearner()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, pair, timeframe):
+        return os.path.join(self.root, f"{pair.replace('/', '_')}_{timeframe}.f64")
+
+    def load(self, pair, timeframe):
+        """
+        Returns a read-only memory-mapped (n, len(COLUMNS)) array.
+        """
+        path = self._path(pair, timeframe)
+        row_bytes = len(COLUMNS) * 8
+        n_rows = os.path.getsize(path) // row_bytes if os.path.exists(path) else 0
+        if n_rows == 0:
+            return np.empty((0, len(COLUMNS)))
+        return np.memmap(path, dtype=np.float64, mode='r', shape=(n_rows, len(COLUMNS)))
+
+    def last_timestamp(self, pair, timeframe):
+        data = self.load(pair, timeframe)
+        return int(data[-1, 0]) if len(data) else None
+
+    def append(self, pair, timeframe, ohlcv, drop_last=True):
+        """
+        Appends candles newer than the last stored one and materializes their features.
+        drop_last: skip the newest candle, which is usually still forming.
+        Returns the number of rows appended.
+        """
+        if drop_last:
+            ohlcv = ohlcv[:-1]
+
+        stored = self.load(pair, timeframe)
+        last_ts = stored[-1, 0] if len(stored) else None
+
+        new_rows = {}
+        for row in ohlcv:
+            if last_ts is None or row[0] > last_ts:
+                new_rows[row[0]] = row[:6]
+        if not new_rows:
+            return 0
+
+        new = np.array([new_rows[ts] for ts in sorted(new_rows)], dtype=np.float64)
+        context = np.array(stored[-self.CONTEXT:, :len(OHLCV_COLUMNS)])
+
+        frame = pd.DataFrame(np.vstack([context, new]), columns=OHLCV_COLUMNS)
+        self._learner.add_features(frame)
+        rows = frame.iloc[len(context):][COLUMNS].to_numpy(dtype=np.float64)
+        rows[np.isinf(rows)] = np.nan
+
+        n_stored = len(stored)
+        del stored  # release the memmap before resizing the file (Windows refuses otherwise)
+
+        # 'r+b' rather than 'ab': a torn row left by a crash mid-write is cut off
+        # first, so the new rows start on a row boundary
+        path = self._path(pair, timeframe)
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            end = n_stored * len(COLUMNS) * 8
+            if os.fstat(f.fileno()).st_size != end:
+                f.truncate(end)
+            f.seek(end)
+            f.write(rows.tobytes())
+
+        logger.info(f"Feature store: appended {len(rows)} rows for {pair} {timeframe} ({n_stored + len(rows)} total).")
+        return len(rows)
+
+    def feature_matrix(self, pair, timeframe, since_ts=None):
+        """
+        Returns (X, y, returns) for training/backtests, read from the memory-mapped
+        file: X = feature columns, y = 1 if the next close is higher, returns =
+        next-candle return. The newest row is excluded (outcome unknown), as are
+        rows whose features are undefined.
+        since_ts: only use candles at or after this timestamp (ms).
+        """
+        data = self.load(pair, timeframe)
+        if since_ts is not None and len(data):
+            data = data[np.searchsorted(data[:, 0], since_ts):]
+        if len(data) < 2:
+            return np.empty((0, len(FEATURE_COLUMNS))), np.empty(0, dtype=int), np.empty(0)
+
+        close = data[:, OHLCV_COLUMNS.index('close')]
+        X = data[:-1, len(OHLCV_COLUMNS):]
+        valid = ~np.isnan(X).any(axis=1)
+
+        y = (close[1:] > close[:-1]).astype(int)
+        returns = close[1:] / close[:-1] - 1
+        if valid.all():
+            return X, y, returns
+        return X[valid], y[valid], returns[valid]
@@ -1,57 +1,319 @@
-import google.generativeai as genai
+import aiohttp
+import asyncio
+import hashlib
 import json
-import itertools
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
 from ..logger import setup_logger
+from .. import metrics
 
 logger = setup_logger("gemini_service")
 
+REQUEST_SECONDS = metrics.histogram("gemini_request_seconds", "Gemini generateContent latency per API key",
+                                    ("key", "outcome"))
+DECISION_CACHE = metrics.counter("gemini_decision_cache_total", "Market decisions answered from cache vs Gemini",
+                                 ("result",))
+
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+
+
+_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?')
+
+
+class GeminiRateLimited(Exception):
+    pass
+
+
+def normalize_prompt(text, significant_digits=4):
+    """
+    Collapses whitespace and rounds every number to `significant_digits`, so market
+    summaries that only differ by tick-level price noise produce the same cache key.
+    """
+    text = ' '.join(text.split())
+    return _NUMBER_RE.sub(lambda m: f"{float(m.group()):.{significant_digits}g}", text)
+
+
+class KeyState:
+    """
+    Per-key quota and latency tracking.
+    """
+
+    def __init__(self, key, requests_per_minute):
+        self.key = key
+        self.requests_per_minute = requests_per_minute
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.failures = 0
+        self.recent_requests = deque()  # monotonic timestamps within the last minute
+        self.latencies = deque(maxlen=50)
+
+    @property
+    def suffix(self):
+        return self.key[-4:] if self.key else 'None'
+
+    def available(self, now):
+        if now < self.cooldown_until:
+            return False
+        while self.recent_requests and now - self.recent_requests[0] > 60:
+            self.recent_requests.popleft()
+        return self.requests_per_minute <= 0 or len(self.recent_requests) < self.requests_per_minute
+
+    def latency_percentile(self, pct):
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+    def score(self):
+        # Prefer idle, fast, healthy keys; unknown latency counts as fast so new keys get tried
+        p50 = self.latency_percentile(0.5) or 0.0
+        return (self.in_flight, self.failures, p50)
+
+
+class RecommendationSlot:
+    """
+    Latest Gemini recommendation, published by a background poller and read by
+    the strategy loop without waiting on the API.
+    """
+
+    def __init__(self):
+        self.value = None
+        self.updated_at = None
+        self.version = 0
+
+    def publish(self, value):
+        self.value = value
+        self.updated_at = datetime.utcnow()
+        self.version += 1
+
+    def age(self):
+        """Seconds since the last publish, or None if nothing was published yet."""
+        if self.updated_at is None:
+            return None
+        return (datetime.utcnow() - self.updated_at).total_seconds()
+
+    def is_fresh(self, max_age_seconds):
+        age = self.age()
+        return age is not None and age <= max_age_seconds
+
+
 class GeminiService:
-    def __init__(self, api_keys, model_name="gemini-2.0-flash-exp", system_prompt=""):
+    def __init__(self, api_keys, model_name="gemini-2.0-flash-exp", system_prompt="",
+                 request_timeout=30, hedge_percentile=0.9, hedge_after_seconds=8,
+                 cooldown_seconds=60, requests_per_minute_per_key=10,
+                 cache_ttl_seconds=300, cache_max_entries=128, cache_significant_digits=4,
+                 http_session=None):
         # Handle single key string or list of keys
         if isinstance(api_keys, str):
-            self.api_keys = [api_keys]
-        else:
-            self.api_keys = api_keys
-            
-        self.key_cycle = itertools.cycle(self.api_keys)
-        self.current_key = next(self.key_cycle) if self.api_keys else None
-        
+            api_keys = [api_keys]
+        self.api_keys = [k for k in (api_keys or []) if k]
+        self.keys = [KeyState(k, requests_per_minute_per_key) for k in self.api_keys]
+
         self.model_name = model_name
         self.system_prompt = system_prompt
-        
+
+        self.request_timeout = request_timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after_seconds = hedge_after_seconds
+        self.cooldown_seconds = cooldown_seconds
+
+        # Optional callable returning a shared aiohttp session (e.g. exchange.http_session);
+        # without one the service owns a session and close() closes it
+        self._shared_session = http_session
+        self._session = None
+
+        # Response cache (TTL + LRU) and in-flight request coalescing, keyed by prompt hash
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_max_entries = cache_max_entries
+        self.cache_significant_digits = cache_significant_digits
+        self._cache = OrderedDict()  # {key: (expires_at, decision)}
+        self._inflight = {}          # {key: Future}
+
         if not self.api_keys:
             logger.warning("Gemini API Keys are missing!")
-        else:
-            self._configure_client()
-
-    def _configure_client(self):
-        """Configures the GenAI client with the current key."""
-        logger.info(f"Switching to Gemini API Key: ...{self.current_key[-4:] if self.current_key else 'None'}")
-        genai.configure(api_key=self.current_key)
-        self.model = genai.GenerativeModel(
-            model_name=self.model_name,
-            system_instruction=self.system_prompt
-        )
-
-    def rotate_key(self):
-        """Rotates to the next API key in the list."""
-        if not self.api_keys: return
-        self.current_key = next(self.key_cycle)
-        self._configure_client()
+
+    def _get_session(self):
+        if self._shared_session is not None:
+            return self._shared_session()
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.request_timeout))
+        return self._session
+
+    def _pick_key(self, exclude):
+        now = time.monotonic()
+        candidates = [k for k in self.keys if k not in exclude and k.available(now)]
+        if not candidates:
+            return None
+        return min(candidates, key=KeyState.score)
+
+    async def _request(self, state, prompt):
+        """Sends one generateContent request with the given key and returns the response text."""
+        state.in_flight += 1
+        state.recent_requests.append(time.monotonic())
+        start = time.monotonic()
+        payload = {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        }
+        if self.system_prompt:
+            payload["systemInstruction"] = {"parts": [{"text": self.system_prompt}]}
+
+        try:
+            url = GEMINI_API_URL.format(model=self.model_name)
+            async with self._get_session().post(url, params={"key": state.key}, json=payload,
+                                                timeout=aiohttp.ClientTimeout(total=self.request_timeout)) as resp:
+                if resp.status == 429:
+                    retry_after = resp.headers.get("Retry-After")
+                    cooldown = float(retry_after) if retry_after and retry_after.isdigit() else self.cooldown_seconds
+                    state.cooldown_until = time.monotonic() + cooldown
+                    raise GeminiRateLimited(f"429 rate limited, cooling down for {cooldown:.0f}s")
+                if resp.status != 200:
+                    raise RuntimeError(f"HTTP {resp.status}: {(await resp.text())[:200]}")
+                data = await resp.json()
+
+            text = data["candidates"][0]["content"]["parts"][0]["text"]
+            state.latencies.append(time.monotonic() - start)
+            REQUEST_SECONDS.observe(time.monotonic() - start, state.suffix, 'ok')
+            state.failures = 0
+            return text
+        except GeminiRateLimited:
+            REQUEST_SECONDS.observe(time.monotonic() - start, state.suffix, 'rate_limited')
+            raise
+        except Exception:
+            REQUEST_SECONDS.observe(time.monotonic() - start, state.suffix, 'error')
+            state.failures += 1
+            raise
+        finally:
+            state.in_flight -= 1
+
+    def _hedge_delay(self, state):
+        """Time to wait on a request before sending a duplicate to another key."""
+        threshold = state.latency_percentile(self.hedge_percentile)
+        return threshold if threshold is not None else self.hedge_after_seconds
+
+    async def _generate(self, prompt):
+        """
+        Sends the prompt to the best available key. If every in-flight request fails,
+        the next key is tried immediately; if a request is slower than its key's usual
+        latency percentile, a hedged duplicate is sent to another key and the first
+        successful answer wins.
+        """
+        attempted = set()
+        tasks = {}
+
+        def launch():
+            state = self._pick_key(attempted)
+            if state is None:
+                return False
+            attempted.add(state)
+            tasks[asyncio.create_task(self._request(state, prompt))] = state
+            return True
+
+        if not launch():
+            return None
+
+        try:
+            while tasks:
+                can_hedge = self._pick_key(attempted) is not None
+                newest = list(tasks.values())[-1]
+                done, _ = await asyncio.wait(
+                    tasks,
+                    timeout=self._hedge_delay(newest) if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    logger.info(f"Gemini key ...{newest.suffix} slow, sending hedged request")
+                    launch()
+                    continue
+
+                for task in done:
+                    state = tasks.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    logger.error(f"Gemini Analysis Failed with key ...{state.suffix}: {task.exception()}")
+
+                if not tasks:
+                    launch()
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _cache_key(self, market_data_summary):
+        normalized = normalize_prompt(str(market_data_summary), self.cache_significant_digits)
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def _cache_get(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, decision = entry
+        if time.monotonic() >= expires_at:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return decision
+
+    def _cache_put(self, key, decision):
+        if self.cache_ttl_seconds <= 0 or self.cache_max_entries <= 0:
+            return
+        self._cache[key] = (time.monotonic() + self.cache_ttl_seconds, decision)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
 
     async def analyze_market(self, market_data_summary):
         """
         Sends market data to Gemini and gets a trading decision.
+        Identical (normalized) summaries are answered from cache within the TTL, and
+        concurrent identical requests share a single in-flight call.
         """
-        if not self.current_key:
+        if not self.keys:
             return {"action": "HOLD", "reasoning": "No API Key"}
 
+        key = self._cache_key(market_data_summary)
+        cached = self._cache_get(key)
+        if cached is not None:
+            DECISION_CACHE.inc(1, 'hit')
+            logger.info(f"Gemini Decision (cached): {cached}")
+            return dict(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            DECISION_CACHE.inc(1, 'shared')
+            return dict(await asyncio.shield(inflight))
+        DECISION_CACHE.inc(1, 'miss')
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            decision, cacheable = await self._analyze(market_data_summary)
+            if cacheable:
+                self._cache_put(key, decision)
+            future.set_result(decision)
+            return dict(decision)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an un-awaited future doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _analyze(self, market_data_summary):
+        """Returns (decision, cacheable)."""
+
         prompt = f"""
         Analyze the following market data and provide a trading decision.
-        
+
         Market Data:
         {market_data_summary}
-        
+
         Respond strictly in JSON format:
         {{
             "action": "BUY" | "SELL" | "HOLD",
@@ -60,35 +322,25 @@ class GeminiService:
             "reasoning": "Brief explanation"
         }}
         """
-        
-        # Try current key, if fail, rotate and retry once
-        max_retries = len(self.api_keys)
-        attempts = 0
-        
-        while attempts < max_retries:
-            try:
-                # Always rotate key BEFORE request to distribute load (Round Robin)
-                # Or rotate only on failure? User said "Key A -> Key B", implies round robin usage or sequential.
-                # "Key A used, next Key B". Let's rotate AFTER a successful use or BEFORE?
-                # Usually rotation is for rate limits. Let's rotate for every request to be safe/fair.
-                self.rotate_key() 
-                
-                response = await self.model.generate_content_async(prompt)
-                text = response.text
-                
-                # Clean up markdown code blocks if present
-                if "```json" in text:
-                    text = text.split("```json")[1].split("```")[0]
-                elif "```" in text:
-                    text = text.split("```")[1].split("```")[0]
-                    
-                decision = json.loads(text.strip())
-                logger.info(f"Gemini Decision: {decision}")
-                return decision
-                
-            except Exception as e:
-                logger.error(f"Gemini Analysis Failed with key ...{self.current_key[-4:]}: {e}")
-                attempts += 1
-                # Key rotation happens at start of loop, so next iter will use next key
-        
-        return {"action": "HOLD", "reasoning": "All API keys failed."}
+
+        text = await self._generate(prompt)
+        if text is None:
+            return {"action": "HOLD", "reasoning": "All API keys failed."}, False
+
+        try:
+            # Clean up markdown code blocks if present
+            if "```json" in text:
+                text = text.split("```json")[1].split("```")[0]
+            elif "```" in text:
+                text = text.split("```")[1].split("```")[0]
+
+            decision = json.loads(text.strip())
+            logger.info(f"Gemini Decision: {decision}")
+            return decision, True
+        except Exception as e:
+            logger.error(f"Failed to parse Gemini response: {e}")
+            return {"action": "HOLD", "reasoning": "Invalid Gemini response."}, False
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
@@ -1,3 +1,6 @@
+import copy
+import math
+from collections import deque
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
@@ -7,13 +10,229 @@ from ..logger import setup_logger
 
 logger = setup_logger("ai_learner")
 
-class StrategyLearner:
+
+class FeatureState:
+    """
+    Rolling window of the latest closes/volumes for single-row inference.
+    Computes the same features as StrategyLearner.prepare_data for the newest
+    candle only, without building a DataFrame.
+    """
+    WINDOW = 26  # sma_slow window; also covers RSI (15 closes) and volume change (2)
+
     def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.last_ts = None
+        self.closes = deque(maxlen=self.WINDOW)
+        self.volumes = deque(maxlen=self.WINDOW)
+
+    def update(self, rows):
+        """
+        Feeds OHLCV rows ([timestamp, open, high, low, close, volume]).
+        Rows older than the latest seen candle are ignored; a row with the same
+        timestamp replaces the forming candle.
+        """
+        for row in rows:
+            ts = row[0]
+            if self.last_ts is not None and ts < self.last_ts:
+                continue
+            if ts == self.last_ts:
+                self.closes[-1] = float(row[4])
+                self.volumes[-1] = float(row[5])
+            else:
+                self.closes.append(float(row[4]))
+                self.volumes.append(float(row[5]))
+                self.last_ts = ts
+
+    def features(self):
+        """
+        Returns [rsi, sma_diff, volatility, volume_change] for the latest candle,
+        or None if the window is not full or a feature is undefined.
+        """
+        if len(self.closes) < self.WINDOW:
+            return None
+
+        closes = list(self.closes)
+        close = closes[-1]
+        if close == 0:
+            return None
+
+        # 1. RSI (14-period simple averages, matching calculate_rsi)
+        gain = loss = 0.0
+        for prev, cur in zip(closes[-15:-1], closes[-14:]):
+            delta = cur - prev
+            if delta > 0:
+                gain += delta
+            else:
+                loss -= delta
+        if loss == 0:
+            if gain == 0:
+                return None
+            rsi = 100.0
+        else:
+            rsi = 100 - (100 / (1 + gain / loss))
+
+        # 2. SMA Diff
+        sma_fast = sum(closes[-12:]) / 12
+        sma_slow = sum(closes) / 26
+        sma_diff = (sma_fast - sma_slow) / close
+
+        # 3. Volatility (sample std of last 20 closes)
+        window = closes[-20:]
+        mean = sum(window) / 20
+        volatility = math.sqrt(sum((c - mean) ** 2 for c in window) / 19) / close
+
+        # 4. Volume Change
+        prev_volume = self.volumes[-2]
+        if prev_volume == 0:
+            return None
+        volume_change = self.volumes[-1] / prev_volume - 1
+
+        return [rsi, sma_diff, volatility, volume_change]
+
+
+class CompiledForest:
+    """
+    Flattened copy of a fitted RandomForestClassifier for single-row scoring.
+    All trees are concatenated into shared node arrays and traversed together,
+    one level per step, so a prediction costs max_depth vectorized lookups
+    instead of a joblib dispatch per tree.
+    """
+
+    def __init__(self, model):
+        classes = list(model.classes_)
+        up_idx = classes.index(1) if 1 in classes else None
+
+        left, right, feature, threshold, value, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            node_ids = np.arange(n)
+            is_leaf = tree.children_left == -1
+
+            # Leaves point to themselves and always take the left branch
+            left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1)
+            totals[totals == 0] = 1
+            if up_idx is None:
+                value.append(np.zeros(n))
+            else:
+                value.append(counts[:, up_idx] / totals)
+
+            roots.append(offset)
+            offset += n
+            depth = max(depth, tree.max_depth)
+
+        # children[0] = left, children[1] = right
+        self.children = np.stack([np.concatenate(left), np.concatenate(right)])
+        self.feature = np.concatenate(feature)
+        self.threshold = np.concatenate(threshold)
+        self.value = np.concatenate(value)
+        self.roots = np.array(roots)
+        self.depth = depth
+
+    def predict_proba(self, x):
+        """
+        Returns the probability of class 1 (Up).
+        x: one feature row (returns a float) or a 2-D array of rows (returns an array).
+        """
+        # Trees were fitted on float32 inputs; compare in the same precision
+        X = np.asarray(x, dtype=np.float32)
+        if X.ndim == 1:
+            nodes = self._traverse(lambda feature: X[feature], self.roots)
+            return float(self.value[nodes].mean())
+
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        nodes = self._traverse(lambda feature: X[rows, feature], nodes)
+        return self.value[nodes].mean(axis=1)
+
+    @classmethod
+    def stack(cls, forests):
+        """
+        Merges several compiled forests into one whose roots are a (forest, tree)
+        matrix, so row i of a batch is scored by forest i alone (see
+        predict_stacked). Forests with fewer trees are padded with a leaf whose
+        value is NaN, which the mean skips.
+        """
+        stacked = cls.__new__(cls)
+        children, feature, threshold, value, roots = [], [], [], [], []
+        offset = 0
+        for forest in forests:
+            children.append(forest.children + offset)
+            feature.append(forest.feature)
+            threshold.append(forest.threshold)
+            value.append(forest.value)
+            roots.append(forest.roots + offset)
+            offset += len(forest.value)
+
+        pad = offset
+        children.append(np.array([[pad], [pad]]))
+        feature.append(np.zeros(1, dtype=int))
+        threshold.append(np.array([np.inf]))
+        value.append(np.array([np.nan]))
+
+        stacked.roots = np.full((len(roots), max(len(r) for r in roots)), pad)
+        for i, r in enumerate(roots):
+            stacked.roots[i, :len(r)] = r
+        stacked.children = np.concatenate(children, axis=1)
+        stacked.feature = np.concatenate(feature)
+        stacked.threshold = np.concatenate(threshold)
+        stacked.value = np.concatenate(value)
+        stacked.depth = max(forest.depth for forest in forests)
+        return stacked
+
+    def predict_stacked(self, X):
+        """Probability of class 1 for row i of X under forest i of a stacked forest."""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = self._traverse(lambda feature: X[rows, feature], self.roots)
+        return np.nanmean(self.value[nodes], axis=1)
+
+    def _traverse(self, lookup, nodes):
+        for step in range(1, self.depth + 1):
+            go_right = lookup(self.feature[nodes]) > self.threshold[nodes]
+            nodes = self.children[go_right.view(np.int8), nodes]
+            # Most trees are far shallower than the deepest one; stop once all hit leaves
+            if step % 8 == 0 and (self.children[0, nodes] == nodes).all():
+                break
+        return nodes
+
+
+class StrategyLearner:
+    def __init__(self, n_estimators=100, max_depth=None):
         # n_jobs=-1 uses all available cores (Great for N100's 4 cores)
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+        self.model = RandomForestClassifier(
+            n_estimators=n_estimators, max_depth=max_depth, random_state=42, n_jobs=-1
+        )
         self.is_trained = False
         self.feature_cols = ['rsi', 'sma_diff', 'volatility', 'volume_change']
 
+        # Low-latency inference path (rebuilt after every fit)
+        self.compiled = None
+        self.feature_state = FeatureState()
+        self.updates = 0
+
+    def _compile(self, model=None):
+        try:
+            return CompiledForest(model if model is not None else self.model)
+        except Exception as e:
+            logger.warning(f"Failed to compile forest, using sklearn predict: {e}")
+            return None
+
+    def _to_frame(self, ohlcv_data):
+        if isinstance(ohlcv_data, list):
+            return pd.DataFrame(ohlcv_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        return ohlcv_data.copy()
+
     def prepare_data(self, df):
         """
         Prepares features and labels from OHLCV DataFrame.
@@ -25,6 +244,23 @@ class StrategyLearner:
         for col in cols:
             data[col] = data[col].astype(float)
 
+        self.add_features(data)
+        
+        # Target: 1 if next close > current close, else 0
+        data['target'] = (data['close'].shift(-1) > data['close']).astype(int)
+        
+        # Handle Infinite values (e.g. division by zero)
+        data.replace([np.inf, -np.inf], np.nan, inplace=True)
+        
+        # Drop NaNs created by rolling/shifting or inf replacement
+        data.dropna(inplace=True)
+        
+        return data
+
+    def add_features(self, data):
+        """
+        Adds the feature columns to a numeric OHLCV DataFrame in place.
+        """
         # Feature Engineering
         # 1. RSI
         data['rsi'] = self.calculate_rsi(data['close'])
@@ -40,15 +276,6 @@ class StrategyLearner:
         # 4. Volume Change
         data['volume_change'] = data['volume'].pct_change()
         
-        # Target: 1 if next close > current close, else 0
-        data['target'] = (data['close'].shift(-1) > data['close']).astype(int)
-        
-        # Handle Infinite values (e.g. division by zero)
-        data.replace([np.inf, -np.inf], np.nan, inplace=True)
-        
-        # Drop NaNs created by rolling/shifting or inf replacement
-        data.dropna(inplace=True)
-        
         return data
 
     def calculate_rsi(self, series, period=14):
@@ -65,10 +292,7 @@ class StrategyLearner:
         """
         logger.info("Starting model training...")
         
-        if isinstance(ohlcv_data, list):
-            df = pd.DataFrame(ohlcv_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        else:
-            df = ohlcv_data.copy()
+        df = self._to_frame(ohlcv_data)
             
         if len(df) < 200:
             logger.warning("Not enough data to train model (need > 200 rows).")
@@ -76,49 +300,116 @@ class StrategyLearner:
 
         data = self.prepare_data(df)
         
-        X = data[self.feature_cols]
-        y = data['target']
-        
         # Split (Time-series split is better, but random split ok for simple demo)
         # Actually, for time series, we should train on past, test on recent.
         # But here we just want to train on all available history to be ready for *future* (live).
         # So we train on everything.
-        
+        return self.train_matrix(data[self.feature_cols], data['target'])
+
+    def train_matrix(self, X, y):
+        """
+        Trains the model on a precomputed feature matrix (columns = feature_cols).
+        """
         try:
             self.model.fit(X, y)
             self.is_trained = True
+            self.compiled = self._compile()
+            self.feature_state.reset()
             logger.info(f"Model trained successfully on {len(X)} samples.")
             return True
         except Exception as e:
             logger.error(f"Training failed: {e}")
             return False
 
-    def predict(self, current_df):
+    def update(self, ohlcv_data, n_new_trees=10):
+        """
+        Incrementally refreshes the model on a recent window of candles.
+        Grows a copy of the forest by `n_new_trees` trees fitted on the window
+        (warm_start), drops the same number of oldest trees so the forest size
+        stays constant, then swaps the copy in. Safe to run in an executor while
+        predict() reads the current model.
+        Costs roughly n_new_trees / n_estimators of a full retrain.
+        """
+        if not self.is_trained:
+            return self.train(ohlcv_data)
+
+        data = self.prepare_data(self._to_frame(ohlcv_data))
+        if len(data) < 50:
+            logger.warning(f"Not enough data for incremental update ({len(data)} rows).")
+            return False
+
+        X = data[self.feature_cols]
+        y = data['target']
+        if y.nunique() < 2:
+            # A single-class window would produce trees that can't vote for the other class
+            logger.warning("Skipping incremental update: window contains only one class.")
+            return False
+
+        try:
+            model = copy.copy(self.model)
+            model.estimators_ = list(self.model.estimators_)
+            n_trees = len(model.estimators_)
+            # warm_start seeds new trees from random_state, skipping one draw per existing
+            # tree; with a constant forest size a fixed seed would repeat the same bootstraps
+            seed = self.model.get_params()['random_state']
+            model.set_params(warm_start=True, n_estimators=n_trees + n_new_trees,
+                             random_state=None if seed is None else seed + self.updates + 1)
+            model.fit(X, y)
+            # New trees are appended at the end, so the oldest are at the front
+            model.estimators_ = model.estimators_[n_new_trees:]
+            model.set_params(warm_start=False, n_estimators=len(model.estimators_), random_state=seed)
+            compiled = self._compile(model)
+            self.model, self.compiled = model, compiled
+            self.updates += 1
+            logger.info(f"Model updated incrementally: {n_new_trees} trees refit on {len(X)} recent samples.")
+            return True
+        except Exception as e:
+            logger.error(f"Incremental update failed: {e}")
+            return False
+
+    @staticmethod
+    def to_signal(probability):
+        """Maps the probability of an up move to ('BUY' | 'SELL' | 'HOLD', confidence)."""
+        # Thresholds (probability > 0.6 implies predicted class 1, < 0.4 class 0)
+        if probability > 0.6:
+            return "BUY", probability
+        elif probability < 0.4: # Prob of Up is low -> Down
+            return "SELL", 1 - probability
+        else:
+            return "HOLD", probability
+
+    def predict(self, current_data):
         """
         Predicts 'BUY', 'SELL', or 'HOLD' based on current data.
-        current_df: DataFrame containing recent candles (enough to calculate features)
+        current_data: raw OHLCV rows or a DataFrame containing recent candles
+        (enough to calculate features)
         """
         if not self.is_trained:
             return "HOLD", 0.0
 
         try:
-            data = self.prepare_data(current_df)
-            if data.empty:
-                return "HOLD", 0.0
-                
-            # Take the last row
-            last_row = data.iloc[[-1]][self.feature_cols]
-            
-            prediction = self.model.predict(last_row)[0]
-            probability = self.model.predict_proba(last_row)[0][1] # Prob of class 1 (Up)
-            
-            # Thresholds
-            if prediction == 1 and probability > 0.6:
-                return "BUY", probability
-            elif prediction == 0 and probability < 0.4: # Prob of Up is low -> Down
-                return "SELL", 1 - probability
+            if self.compiled is not None:
+                if isinstance(current_data, pd.DataFrame):
+                    cols = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+                    rows = current_data[cols].iloc[-FeatureState.WINDOW:].to_numpy()
+                else:
+                    rows = current_data[-FeatureState.WINDOW:]
+                self.feature_state.update(rows)
+
+                features = self.feature_state.features()
+                if features is None:
+                    return "HOLD", 0.0
+                probability = self.compiled.predict_proba(features)
             else:
-                return "HOLD", probability
+                data = self.prepare_data(self._to_frame(current_data))
+                if data.empty:
+                    return "HOLD", 0.0
+
+                # Take the last row
+                last_row = data.iloc[[-1]][self.feature_cols]
+                probability = self.model.predict_proba(last_row)[0][1] # Prob of class 1 (Up)
+
+            return self.to_signal(probability)
                 
         except Exception as e:
             logger.error(f"Prediction failed: {e}")
@@ -0,0 +1,59 @@
+import numpy as np
+
+
+def build_market_digest(candles_by_symbol, horizons=(1, 4, 24), atr_period=14, volume_window=24,
+                        fast_window=6, slow_window=24):
+    """
+    Builds a fixed-size feature table for every symbol in one vectorized pass.
+
+    candles_by_symbol: {symbol: OHLCV rows, oldest first}
+    Returns (symbols, columns, table) where table is a (n_symbols, n_columns) array:
+    - ret_<h>: close-to-close return over h candles, in %
+    - atr_pct: ATR(atr_period) as % of the last close
+    - vol_z:   z-score of the last candle's volume vs the previous `volume_window`
+    - trend:   1 (up), -1 (down) or 0 from price vs slow SMA and fast vs slow SMA
+    Symbols with too little history are skipped.
+    """
+    columns = [f"ret_{h}" for h in horizons] + ['atr_pct', 'vol_z', 'trend']
+    length = max(max(horizons) + 1, atr_period + 1, volume_window + 1, slow_window)
+    symbols = [s for s, rows in candles_by_symbol.items() if rows and len(rows) >= length]
+    if not symbols:
+        return [], columns, np.empty((0, len(columns)))
+
+    # (symbols, candles, [timestamp, open, high, low, close, volume])
+    data = np.array([candles_by_symbol[s][-length:] for s in symbols], dtype=np.float64)
+    high, low, close, volume = data[:, :, 2], data[:, :, 3], data[:, :, 4], data[:, :, 5]
+    last = close[:, -1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = [(last / close[:, -1 - h] - 1) * 100 for h in horizons]
+
+        prev_close = close[:, -atr_period - 1:-1]
+        h, l = high[:, -atr_period:], low[:, -atr_period:]
+        true_range = np.maximum(h - l, np.maximum(np.abs(h - prev_close), np.abs(l - prev_close)))
+        atr_pct = true_range.mean(axis=1) / last * 100
+
+        history = volume[:, -volume_window - 1:-1]
+        vol_z = (volume[:, -1] - history.mean(axis=1)) / history.std(axis=1)
+
+    sma_fast = close[:, -fast_window:].mean(axis=1)
+    sma_slow = close[:, -slow_window:].mean(axis=1)
+    trend = np.where((last > sma_slow) & (sma_fast > sma_slow), 1,
+                     np.where((last < sma_slow) & (sma_fast < sma_slow), -1, 0))
+
+    table = np.column_stack(returns + [atr_pct, vol_z, trend])
+    table[~np.isfinite(table)] = 0.0
+    return symbols, columns, table
+
+
+def serialize_digest(symbols, columns, table, decimals=2):
+    """
+    Serializes the digest as a compact pipe-separated table (one short line per symbol).
+    """
+    trend_labels = {1: 'U', -1: 'D', 0: 'F'}
+    lines = ['sym|' + '|'.join(columns)]
+    for symbol, row in zip(symbols, table):
+        values = [f"{v:.{decimals}f}" for v in row[:-1]]
+        values.append(trend_labels[int(row[-1])])
+        lines.append(f"{symbol}|" + '|'.join(values))
+    return '\n'.join(lines)
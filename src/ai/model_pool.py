@@ -0,0 +1,160 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from .learner import CompiledForest, FeatureState, StrategyLearner
+from ..logger import setup_logger, init_worker_logging
+
+logger = setup_logger("ai_model_pool")
+
+
+def _train_learner(ohlcv_data, params):
+    """Runs in a worker process. Returns the fitted learner or None."""
+    learner = StrategyLearner(**params)
+    # One core per worker; the pool size controls total CPU use
+    learner.model.set_params(n_jobs=1)
+    if not learner.train(ohlcv_data):
+        return None
+    learner.model.set_params(n_jobs=-1)
+    return learner
+
+
+class ModelPool:
+    """
+    One StrategyLearner per universe pair, trained in a process pool.
+
+    Memory is bounded by the number of workers (each holds one pair's history),
+    the history cap per pair, and recycling workers after every fit.
+    Models are refreshed one at a time on a rolling schedule, so the whole
+    universe is retrained every `refresh_interval`.
+    """
+
+    def __init__(self, pairs, params=None, max_workers=2, max_history=20000, refresh_interval=timedelta(hours=6)):
+        self.pairs = list(pairs)
+        self.params = params or {}
+        self.max_workers = max_workers
+        self.max_history = max_history
+        self.refresh_interval = refresh_interval
+
+        self.models = {}      # {pair: StrategyLearner}
+        self.trained_at = {}  # {pair: datetime}
+        self._executor = None
+        self._stacked = None  # (compiled forests, their CompiledForest.stack), see predict_all
+
+    def get(self, pair):
+        """Returns the trained learner for `pair`, or None."""
+        return self.models.get(pair)
+
+    def _get_executor(self):
+        if self._executor is None:
+            # max_tasks_per_child=1 returns each worker's memory to the OS after a fit. It
+            # requires spawn, so every fit pays for a fresh interpreter importing pandas
+            # and sklearn (a second or two) - small next to the fit itself.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, max_tasks_per_child=1,
+                mp_context=multiprocessing.get_context('spawn'), initializer=init_worker_logging
+            )
+        return self._executor
+
+    async def train(self, pair, fetch_history):
+        """
+        Fetches history with `fetch_history(pair)` (async) and trains the pair's model
+        in the process pool. Returns True on success.
+        """
+        ohlcv = await fetch_history(pair)
+        if not ohlcv:
+            logger.warning(f"No history for {pair}, skipping model training.")
+            return False
+
+        loop = asyncio.get_running_loop()
+        try:
+            learner = await loop.run_in_executor(
+                self._get_executor(), _train_learner, ohlcv[-self.max_history:], self.params
+            )
+        except Exception as e:
+            logger.error(f"Model pool training failed for {pair}: {e}")
+            return False
+
+        if learner is None:
+            return False
+
+        self.models[pair] = learner
+        self.trained_at[pair] = datetime.utcnow()
+        logger.info(f"Model pool: {pair} trained ({len(self.models)}/{len(self.pairs)} ready).")
+        return True
+
+    async def train_all(self, fetch_history):
+        """Trains every pair, at most `max_workers` at a time."""
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def _bounded(pair):
+            async with semaphore:
+                return await self.train(pair, fetch_history)
+
+        await asyncio.gather(*(_bounded(pair) for pair in self.pairs))
+
+    def next_refresh(self):
+        """Returns the pair whose model is stalest (untrained first)."""
+        if not self.pairs:
+            return None
+        return min(self.pairs, key=lambda pair: self.trained_at.get(pair, datetime.min))
+
+    async def run(self, fetch_history):
+        """
+        Background task: trains the whole universe, then refreshes the stalest
+        model every refresh_interval / len(pairs).
+        """
+        await self.train_all(fetch_history)
+
+        step = self.refresh_interval / max(len(self.pairs), 1)
+        while True:
+            await asyncio.sleep(step.total_seconds())
+            pair = self.next_refresh()
+            if pair and datetime.utcnow() - self.trained_at.get(pair, datetime.min) >= self.refresh_interval:
+                await self.train(pair, fetch_history)
+
+    def predict_all(self, ohlcv_by_pair):
+        """
+        Scores every pair in one pass: each pair's feature row comes from its
+        learner's rolling FeatureState, and the rows go through one stacked forest
+        of all the compiled models (rebuilt only when a model was replaced).
+        ohlcv_by_pair: {pair: recent OHLCV rows}
+        Returns {pair: (action, confidence)} for pairs with a trained model.
+        """
+        predictions, scored, rows = {}, [], []
+        for pair, ohlcv in ohlcv_by_pair.items():
+            learner = self.models.get(pair)
+            if learner is None or not ohlcv:
+                continue
+            if learner.compiled is None:
+                predictions[pair] = learner.predict(ohlcv)
+                continue
+            learner.feature_state.update(ohlcv[-FeatureState.WINDOW:])
+            features = learner.feature_state.features()
+            if features is None:
+                predictions[pair] = ("HOLD", 0.0)
+                continue
+            scored.append(pair)
+            rows.append(features)
+
+        if scored:
+            forests = [self.models[pair].compiled for pair in scored]
+            try:
+                probabilities = self._stacked_forest(forests).predict_stacked(rows)
+            except Exception as e:
+                logger.error(f"Pooled prediction failed: {e}")
+                return {**predictions, **{pair: ("HOLD", 0.0) for pair in scored}}
+            for pair, probability in zip(scored, probabilities):
+                predictions[pair] = StrategyLearner.to_signal(float(probability))
+        return predictions
+
+    def _stacked_forest(self, forests):
+        if self._stacked is None or len(self._stacked[0]) != len(forests) or \
+                any(a is not b for a, b in zip(self._stacked[0], forests)):
+            self._stacked = (forests, CompiledForest.stack(forests))
+        return self._stacked[1]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
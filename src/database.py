@@ -1,61 +1,199 @@
 import sqlite3
 import os
+import atexit
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
 from .logger import setup_logger
 
 logger = setup_logger("database")
 
-class PositionDB:
-    def __init__(self, db_path="coffin299.db"):
+
+class _WriteBehindDB(ABC):
+    """
+    One persistent sqlite connection in WAL mode plus a background writer thread.
+
+    Subclasses queue writes in memory; the writer flushes them in a single
+    transaction every `flush_interval` seconds, so callers on the event loop never
+    wait on disk. Reads go through a second connection and see the last committed
+    state (WAL readers don't wait for the writer), so queued writes show up within
+    about `flush_interval`. close() (also registered with atexit) performs a final
+    durable flush.
+    """
+
+    def __init__(self, db_path, flush_interval=0.5):
         self.db_path = db_path
+        self.flush_interval = flush_interval
+
+        self._pending_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._closed = False
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
         self.init_db()
+        self._read_lock = threading.Lock()
+        self._reader = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+
+        self._writer = threading.Thread(target=self._writer_loop, name=f"{type(self).__name__}-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
 
     def init_db(self):
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Create paper_positions table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS paper_positions (
-                    symbol TEXT PRIMARY KEY,
-                    amount REAL,
-                    entry_price REAL,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
+            with self._db_lock:
+                cursor = self._conn.cursor()
+                # WAL lets readers and the writer proceed concurrently; NORMAL skips the
+                # fsync on every commit (close() checkpoints for durability)
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+                self._create_schema(cursor)
         except Exception as e:
-            logger.error(f"Failed to init DB: {e}")
+            logger.error(f"Failed to init DB {self.db_path}: {e}")
 
-    def save_position(self, symbol, amount, entry_price):
+    @abstractmethod
+    def _create_schema(self, cursor):
+        pass
+
+    @abstractmethod
+    def _take_pending(self):
+        """Returns and clears the queued writes (called under _pending_lock)."""
+        pass
+
+    @abstractmethod
+    def _requeue(self, pending):
+        """Puts back writes that failed to flush (called under _pending_lock)."""
+        pass
+
+    @abstractmethod
+    def _write(self, cursor, pending):
+        pass
+
+    def _wake_writer(self):
+        self._wake.set()
+
+    def _writer_loop(self):
+        while not self._closed:
+            self._wake.wait()
+            if self._closed:
+                break
+            # Let updates accumulate so bursts become one transaction (close() cuts the wait short)
+            self._stop.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Writes all pending updates in one transaction. Returns the number of queued items written."""
+        # Batches are taken and committed under the same lock, so they land in queue order
+        with self._db_lock:
+            with self._pending_lock:
+                pending = self._take_pending()
+            if not pending:
+                return 0
+            return self._commit(pending)
+
+    def _commit(self, pending):
+        """Writes one taken batch (called under _db_lock); failed batches are requeued."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            if amount == 0:
-                cursor.execute("DELETE FROM paper_positions WHERE symbol = ?", (symbol,))
-            else:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO paper_positions (symbol, amount, entry_price, updated_at)
-                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (symbol, amount, entry_price))
-            
-            conn.commit()
-            conn.close()
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN")
+            try:
+                self._write(cursor, pending)
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            logger.error(f"Failed to flush {len(pending)} writes to {self.db_path}: {e}")
+            with self._pending_lock:
+                self._requeue(pending)
+            return 0
+        return len(pending)
+
+    def _query(self, sql, params=()):
+        """Runs a read query against the committed state. Never waits for a flush or commit."""
+        with self._read_lock:
+            cursor = self._reader.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def close(self):
+        """Flushes pending updates durably and closes the connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._wake.set()
+        self._writer.join(timeout=5)
+        self.flush()
+        try:
+            with self._read_lock:
+                self._reader.close()
+            with self._db_lock:
+                # Move the WAL into the main database file (fsynced)
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._conn.close()
         except Exception as e:
-            logger.error(f"Failed to save position {symbol}: {e}")
+            logger.error(f"Failed to close DB {self.db_path}: {e}")
+
+
+class PositionDB(_WriteBehindDB):
+    """
+    Paper position store.
+
+    save_position() only records the latest state per symbol in memory, so
+    several updates to the same symbol coalesce into one row write.
+    """
+
+    def __init__(self, db_path="coffin299.db", flush_interval=0.5):
+        self._pending = {}  # {symbol: (amount, entry_price)}
+        super().__init__(db_path, flush_interval)
+
+    def _create_schema(self, cursor):
+        # Create paper_positions table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS paper_positions (
+                symbol TEXT PRIMARY KEY,
+                amount REAL,
+                entry_price REAL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+    def save_position(self, symbol, amount, entry_price):
+        """Queues the latest state for `symbol` (amount == 0 deletes it). Never blocks on disk."""
+        with self._pending_lock:
+            self._pending[symbol] = (amount, entry_price)
+        self._wake_writer()
+
+    def _take_pending(self):
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def _requeue(self, pending):
+        # Unless a newer update for the symbol arrived meanwhile
+        for symbol, state in pending.items():
+            self._pending.setdefault(symbol, state)
+
+    def _write(self, cursor, pending):
+        deletes = [(symbol,) for symbol, (amount, _) in pending.items() if amount == 0]
+        upserts = [(symbol, amount, entry) for symbol, (amount, entry) in pending.items() if amount != 0]
+        if deletes:
+            cursor.executemany("DELETE FROM paper_positions WHERE symbol = ?", deletes)
+        if upserts:
+            cursor.executemany('''
+                INSERT OR REPLACE INTO paper_positions (symbol, amount, entry_price, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ''', upserts)
 
     def load_positions(self):
+        """Stored positions, with updates that are still queued applied on top."""
         positions = {}
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT symbol, amount, entry_price FROM paper_positions")
-            rows = cursor.fetchall()
-            
+            rows = self._query("SELECT symbol, amount, entry_price FROM paper_positions")
+
             for row in rows:
                 # row: (symbol, amount, entry_price)
                 # BaseExchange format: {pair: {amount: ..., entry_price: ...}}
@@ -63,9 +201,391 @@ class PositionDB:
                 # We assume standard pair format here or store full pair in DB.
                 # Let's assume we stored the full pair name as 'symbol' in DB.
                 positions[row[0]] = {'amount': row[1], 'entry_price': row[2]}
-                
-            conn.close()
         except Exception as e:
             logger.error(f"Failed to load positions: {e}")
-            
+
+        with self._pending_lock:
+            pending = dict(self._pending)
+        for symbol, (amount, entry_price) in pending.items():
+            if amount == 0:
+                positions.pop(symbol, None)
+            else:
+                positions[symbol] = {'amount': amount, 'entry_price': entry_price}
         return positions
+
+
+class TradeLedger(_WriteBehindDB):
+    """
+    Append-only record of orders, fills (with fees and realized PnL) and funding
+    payments, for both paper ('paper') and live ('live') trading.
+
+    Timestamps are unix seconds (UTC). Fills and funding are indexed on
+    (symbol, ts) and ts, so the aggregate queries below stay cheap as history grows.
+    Live fills carry the exchange trade id and are de-duplicated on it (websocket
+    snapshots replay recent fills on reconnect).
+    """
+
+    def __init__(self, db_path="ledger.db", flush_interval=0.5):
+        self._pending = []  # [(table, row)]
+        super().__init__(db_path, flush_interval)
+
+    def _create_schema(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS orders (
+                order_id TEXT PRIMARY KEY,
+                ts REAL NOT NULL,
+                mode TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                side TEXT,
+                type TEXT,
+                amount REAL,
+                price REAL,
+                reduce_only INTEGER DEFAULT 0,
+                status TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS fills (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                mode TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                order_id TEXT,
+                trade_id TEXT UNIQUE,
+                side TEXT NOT NULL,
+                amount REAL NOT NULL,
+                price REAL NOT NULL,
+                fee REAL DEFAULT 0,
+                realized_pnl REAL DEFAULT 0,
+                liquidity TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS funding (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                mode TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                amount REAL NOT NULL,
+                rate REAL,
+                position_size REAL,
+                UNIQUE (ts, symbol, mode)
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_symbol_ts ON orders (symbol, ts)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_fills_symbol_ts ON fills (symbol, ts)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_fills_ts ON fills (ts)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_funding_symbol_ts ON funding (symbol, ts)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_funding_ts ON funding (ts)")
+
+    def _append(self, table, row):
+        with self._pending_lock:
+            self._pending.append((table, row))
+        self._wake_writer()
+
+    def _take_pending(self):
+        pending, self._pending = self._pending, []
+        return pending
+
+    def _requeue(self, pending):
+        self._pending[:0] = pending
+
+    def _write(self, cursor, pending):
+        by_table = {}
+        for table, row in pending:
+            by_table.setdefault(table, []).append(row)
+        if 'orders' in by_table:
+            cursor.executemany('''
+                INSERT OR REPLACE INTO orders (order_id, ts, mode, symbol, side, type, amount, price, reduce_only, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', by_table['orders'])
+        if 'fills' in by_table:
+            cursor.executemany('''
+                INSERT OR IGNORE INTO fills (ts, mode, symbol, order_id, trade_id, side, amount, price, fee, realized_pnl, liquidity)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', by_table['fills'])
+        if 'funding' in by_table:
+            cursor.executemany('''
+                INSERT OR IGNORE INTO funding (ts, mode, symbol, amount, rate, position_size)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', by_table['funding'])
+
+    def record_order(self, order_id, symbol, side, type, amount, price=None, status=None,
+                     mode='paper', reduce_only=False, ts=None):
+        """Records an order (re-recording the same order_id updates its status)."""
+        self._append('orders', (str(order_id), ts or time.time(), mode, symbol, side, type,
+                                amount, price, int(bool(reduce_only)), status))
+
+    def record_fill(self, symbol, side, amount, price, fee=0.0, realized_pnl=0.0, order_id=None,
+                    trade_id=None, liquidity=None, mode='paper', ts=None):
+        self._append('fills', (ts or time.time(), mode, symbol, order_id and str(order_id),
+                               trade_id and str(trade_id), side, amount, price, fee, realized_pnl, liquidity))
+
+    def record_funding(self, symbol, amount, rate=None, position_size=None, mode='live', ts=None):
+        """amount: funding paid (negative) or received (positive), in quote currency."""
+        self._append('funding', (ts or time.time(), mode, symbol, amount, rate, position_size))
+
+    @staticmethod
+    def _filters(symbol=None, since=None, until=None, mode=None):
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since.timestamp() if isinstance(since, datetime) else since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until.timestamp() if isinstance(until, datetime) else until)
+        if mode is not None:
+            clauses.append("mode = ?")
+            params.append(mode)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def realized_pnl(self, symbol=None, since=None, until=None, mode=None, by_day=True):
+        """
+        Realized PnL per symbol (and UTC day if by_day), net of fees and funding.
+        Returns [{'symbol', 'day', 'realized_pnl', 'fees', 'funding', 'net', 'fills'}],
+        newest day first.
+        """
+        where, params = self._filters(symbol, since, until, mode)
+        day = "date(ts, 'unixepoch')" if by_day else "NULL"
+        rows = {}
+        for sym, d, pnl, fees, n in self._query(f'''
+            SELECT symbol, {day} AS day, SUM(realized_pnl), SUM(fee), COUNT(*)
+            FROM fills{where} GROUP BY symbol, day
+        ''', params):
+            rows[(sym, d)] = {'symbol': sym, 'day': d, 'realized_pnl': pnl or 0.0, 'fees': fees or 0.0,
+                              'funding': 0.0, 'fills': n}
+        for sym, d, funding in self._query(f'''
+            SELECT symbol, {day} AS day, SUM(amount) FROM funding{where} GROUP BY symbol, day
+        ''', params):
+            entry = rows.setdefault((sym, d), {'symbol': sym, 'day': d, 'realized_pnl': 0.0, 'fees': 0.0,
+                                               'funding': 0.0, 'fills': 0})
+            entry['funding'] = funding or 0.0
+
+        result = list(rows.values())
+        for entry in result:
+            entry['net'] = entry['realized_pnl'] - entry['fees'] + entry['funding']
+        result.sort(key=lambda e: (e['day'] or '', e['symbol']), reverse=True)
+        return result
+
+    def turnover(self, symbol=None, since=None, until=None, mode=None):
+        """Traded notional per symbol: {symbol: {'notional', 'volume', 'fills'}}."""
+        where, params = self._filters(symbol, since, until, mode)
+        return {
+            sym: {'notional': notional or 0.0, 'volume': volume or 0.0, 'fills': n}
+            for sym, notional, volume, n in self._query(f'''
+                SELECT symbol, SUM(amount * price), SUM(amount), COUNT(*) FROM fills{where} GROUP BY symbol
+            ''', params)
+        }
+
+    def recent_fills(self, limit=50, symbol=None, mode=None):
+        where, params = self._filters(symbol=symbol, mode=mode)
+        columns = ['ts', 'mode', 'symbol', 'order_id', 'side', 'amount', 'price', 'fee', 'realized_pnl', 'liquidity']
+        rows = self._query(f'''
+            SELECT {', '.join(columns)} FROM fills{where} ORDER BY ts DESC LIMIT ?
+        ''', params + [limit])
+        return [dict(zip(columns, row)) for row in rows]
+
+    def summary(self, since=None, mode=None):
+        """Totals across all symbols: realized PnL, fees, funding, net and turnover."""
+        pnl = self.realized_pnl(since=since, mode=mode, by_day=False)
+        turnover = self.turnover(since=since, mode=mode)
+        return {
+            'realized_pnl': sum(e['realized_pnl'] for e in pnl),
+            'fees': sum(e['fees'] for e in pnl),
+            'funding': sum(e['funding'] for e in pnl),
+            'net': sum(e['net'] for e in pnl),
+            'turnover': sum(t['notional'] for t in turnover.values()),
+            'fills': sum(t['fills'] for t in turnover.values()),
+        }
+
+
+class EquityStore(_WriteBehindDB):
+    """
+    Equity curve time series: raw samples of equity, unrealized PnL and gross
+    exposure, plus 1m/1h/1d rollups maintained incrementally as samples arrive.
+
+    Each rollup row keeps equity open/high/low/close, the closing unrealized PnL,
+    closing and peak exposure and the sample count for its bucket. The in-progress
+    bucket is rewritten on every flush, so range queries always include it.
+    Rows older than each resolution's retention are pruned hourly (None keeps forever).
+    """
+
+    RESOLUTIONS = {'1m': 60, '1h': 3600, '1d': 86400}
+    DEFAULT_RETENTION_DAYS = {'raw': 2, '1m': 14, '1h': 730, '1d': None}
+    _ROLLUP_COLUMNS = ('bucket', 'open', 'high', 'low', 'close', 'unrealized_pnl', 'exposure', 'exposure_max', 'samples')
+
+    def __init__(self, db_path="equity.db", sample_seconds=10, retention_days=None, flush_interval=2.0):
+        self.sample_seconds = sample_seconds
+        self.retention_days = dict(self.DEFAULT_RETENTION_DAYS, **(retention_days or {}))
+        self._pending = {'raw': [], 'rollups': {}}
+        self._buckets = {}  # {resolution: current bucket dict}
+        self._last_prune = 0.0
+        self._latest = None
+        super().__init__(db_path, flush_interval)
+        self._restore()
+
+    def _create_schema(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS equity_raw (
+                ts REAL PRIMARY KEY,
+                equity REAL NOT NULL,
+                unrealized_pnl REAL,
+                exposure REAL
+            )
+        ''')
+        for resolution in self.RESOLUTIONS:
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS equity_{resolution} (
+                    bucket INTEGER PRIMARY KEY,
+                    open REAL, high REAL, low REAL, close REAL,
+                    unrealized_pnl REAL,
+                    exposure REAL,
+                    exposure_max REAL,
+                    samples INTEGER
+                )
+            ''')
+
+    def _restore(self):
+        """Reloads the latest sample and in-progress buckets so restarts don't reset them."""
+        try:
+            rows = self._query("SELECT ts, equity, unrealized_pnl, exposure FROM equity_raw ORDER BY ts DESC LIMIT 1")
+            if rows:
+                self._latest = dict(zip(('ts', 'equity', 'unrealized_pnl', 'exposure'), rows[0]))
+            for resolution in self.RESOLUTIONS:
+                rows = self._query(f"SELECT * FROM equity_{resolution} ORDER BY bucket DESC LIMIT 1")
+                if rows:
+                    self._buckets[resolution] = dict(zip(self._ROLLUP_COLUMNS, rows[0]))
+        except Exception as e:
+            logger.error(f"Failed to restore equity store state: {e}")
+
+    def record(self, equity, unrealized_pnl=0.0, exposure=0.0, ts=None):
+        """Adds one sample and folds it into every rollup. Never blocks on disk."""
+        ts = ts or time.time()
+        sample = {'ts': ts, 'equity': equity, 'unrealized_pnl': unrealized_pnl, 'exposure': exposure}
+
+        with self._pending_lock:
+            self._latest = sample
+            self._pending['raw'].append((ts, equity, unrealized_pnl, exposure))
+            for resolution, step in self.RESOLUTIONS.items():
+                bucket_start = int(ts // step * step)
+                bucket = self._buckets.get(resolution)
+                if bucket is None or bucket['bucket'] != bucket_start:
+                    bucket = self._buckets[resolution] = {
+                        'bucket': bucket_start, 'open': equity, 'high': equity, 'low': equity,
+                        'close': equity, 'unrealized_pnl': unrealized_pnl, 'exposure': exposure,
+                        'exposure_max': exposure, 'samples': 0,
+                    }
+                bucket['high'] = max(bucket['high'], equity)
+                bucket['low'] = min(bucket['low'], equity)
+                bucket['close'] = equity
+                bucket['unrealized_pnl'] = unrealized_pnl
+                bucket['exposure'] = exposure
+                bucket['exposure_max'] = max(bucket['exposure_max'], exposure)
+                bucket['samples'] += 1
+                self._pending['rollups'][(resolution, bucket_start)] = tuple(bucket[c] for c in self._ROLLUP_COLUMNS)
+        self._wake_writer()
+
+    def _take_pending(self):
+        pending = self._pending
+        if not pending['raw'] and not pending['rollups']:
+            return None
+        self._pending = {'raw': [], 'rollups': {}}
+        return pending
+
+    def _requeue(self, pending):
+        self._pending['raw'][:0] = pending['raw']
+        for key, row in pending['rollups'].items():
+            self._pending['rollups'].setdefault(key, row)
+
+    def _write(self, cursor, pending):
+        cursor.executemany("INSERT OR REPLACE INTO equity_raw VALUES (?, ?, ?, ?)", pending['raw'])
+        by_resolution = {}
+        for (resolution, _), row in pending['rollups'].items():
+            by_resolution.setdefault(resolution, []).append(row)
+        for resolution, rows in by_resolution.items():
+            cursor.executemany(f"INSERT OR REPLACE INTO equity_{resolution} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+        now = time.time()
+        if now - self._last_prune > 3600:
+            self._last_prune = now
+            for name, days in self.retention_days.items():
+                if days is None:
+                    continue
+                cutoff = now - days * 86400
+                if name == 'raw':
+                    cursor.execute("DELETE FROM equity_raw WHERE ts < ?", (cutoff,))
+                else:
+                    cursor.execute(f"DELETE FROM equity_{name} WHERE bucket < ?", (cutoff,))
+
+    def latest(self, max_age=None):
+        """Most recent sample ({'ts', 'equity', 'unrealized_pnl', 'exposure'}), or None if missing/older than max_age."""
+        sample = self._latest
+        if sample is None or (max_age is not None and time.time() - sample['ts'] > max_age):
+            return None
+        return sample
+
+    def _pick_resolution(self, start, end, max_points):
+        now = time.time()
+        steps = [('raw', self.sample_seconds)] + list(self.RESOLUTIONS.items())
+        for name, step in steps:
+            days = self.retention_days.get(name)
+            if days is not None and start < now - days * 86400:
+                continue
+            if (end - start) / step <= max_points:
+                return name
+        return '1d'
+
+    def series(self, start=None, end=None, resolution=None, max_points=1000):
+        """
+        Range query. Returns (resolution, rows), oldest first.
+        resolution: 'raw', '1m', '1h', '1d', or None to pick the finest one that is
+        retained for the whole range and yields at most ~max_points rows.
+        Raw rows have ts/equity/unrealized_pnl/exposure; rollup rows have
+        ts (bucket start) and open/high/low/close/unrealized_pnl/exposure/exposure_max/samples.
+        """
+        end = end or time.time()
+        start = start if start is not None else end - 86400
+        resolution = resolution or self._pick_resolution(start, end, max_points)
+
+        if resolution == 'raw':
+            columns = ('ts', 'equity', 'unrealized_pnl', 'exposure')
+            rows = self._query("SELECT ts, equity, unrealized_pnl, exposure FROM equity_raw "
+                               "WHERE ts >= ? AND ts <= ? ORDER BY ts", (start, end))
+        else:
+            step = self.RESOLUTIONS[resolution]
+            columns = ('ts',) + self._ROLLUP_COLUMNS[1:]
+            rows = self._query(f"SELECT * FROM equity_{resolution} WHERE bucket >= ? AND bucket <= ? ORDER BY bucket",
+                               (int(start // step * step), end))
+        return resolution, [dict(zip(columns, row)) for row in rows]
+
+    def drawdown(self, since=None):
+        """
+        Current and maximum drawdown (fractions of the running peak) since `since`,
+        computed from the rollups: {'peak', 'current', 'max_drawdown', 'drawdown'}.
+        A bucket's high and low come in unknown order, so its low is only measured
+        against the peak before it (and its open), and its close against its high.
+        """
+        _, rows = self.series(start=since if since is not None else 0, max_points=2000)
+        if not rows:
+            return None
+        peak, max_dd = 0.0, 0.0
+        for row in rows:
+            equity = row.get('equity')
+            open_, high = row.get('open', equity), row.get('high', equity)
+            low, close = row.get('low', equity), row.get('close', equity)
+            before = max(peak, open_)
+            if before > 0:
+                max_dd = max(max_dd, 1 - low / before)
+            peak = max(peak, high)
+            if peak > 0:
+                max_dd = max(max_dd, 1 - close / peak)
+        current = (self._latest or {}).get('equity', rows[-1].get('close', rows[-1].get('equity')))
+        return {
+            'peak': peak,
+            'current': current,
+            'drawdown': 1 - current / peak if peak > 0 else 0.0,
+            'max_drawdown': max_dd,
+        }
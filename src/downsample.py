@@ -0,0 +1,96 @@
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def _bucket_edges(n, n_buckets):
+    """Start indices of `n_buckets` near-equal contiguous buckets over n points."""
+    return np.linspace(0, n, n_buckets + 1).astype(np.int64)[:-1]
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling: keeps the first and last points
+    and, from each bucket in between, the point forming the largest triangle with
+    the previously kept point and the next bucket's average. Preserves the
+    visual shape of a line chart far better than striding.
+    Returns the indices of the kept points.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Buckets over the interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def minmax(x, y, n_out):
+    """
+    Min/max bucket downsampling: keeps each bucket's lowest and highest point
+    (in time order), so spikes are never dropped. Returns at most n_out indices.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    edges = _bucket_edges(n, n_buckets)
+    sizes = np.diff(np.append(edges, n))
+    bucket_of = np.repeat(np.arange(n_buckets), sizes)
+
+    # First position in each bucket equal to the bucket's min (max), all vectorized
+    kept = []
+    for reduce in (np.minimum, np.maximum):
+        extreme = reduce.reduceat(y, edges)
+        hits = np.flatnonzero(y == extreme[bucket_of])
+        kept.append(hits[np.searchsorted(bucket_of[hits], np.arange(n_buckets))])
+    kept = np.unique(np.concatenate(kept))
+    return kept
+
+
+def ohlc_buckets(x, open_, high, low, close, n_out):
+    """
+    Aggregates candles into at most n_out coarser candles.
+    Returns (x, open, high, low, close) arrays, x being each bucket's first timestamp.
+    """
+    x = np.asarray(x)
+    n = len(x)
+    if n_out >= n or n_out < 1:
+        return x, np.asarray(open_), np.asarray(high), np.asarray(low), np.asarray(close)
+
+    edges = _bucket_edges(n, n_out)
+    last = np.append(edges[1:], n) - 1
+    return (
+        x[edges],
+        np.asarray(open_)[edges],
+        np.maximum.reduceat(np.asarray(high), edges),
+        np.minimum.reduceat(np.asarray(low), edges),
+        np.asarray(close)[last],
+    )
+
+
+def downsample(x, y, n_out, method='lttb'):
+    """Returns the indices to keep for `method` ('lttb' or 'minmax')."""
+    if method == 'lttb':
+        return lttb(x, y, n_out)
+    if method == 'minmax':
+        return minmax(x, y, n_out)
+    raise ValueError(f"Unknown downsampling method: {method!r} (expected one of {', '.join(METHODS)})")
@@ -1,20 +1,58 @@
 from abc import ABC, abstractmethod
 from ..logger import setup_logger
+from .. import metrics, tracing
+import asyncio
+import itertools
 import time
 
 logger = setup_logger("exchange_base")
 
+ORDER_SUBMIT = metrics.histogram("order_submit_seconds", "Order request round trip to the exchange", ("type",))
+ORDER_FILL = metrics.histogram("order_fill_seconds", "Time from order submission to its first fill", ("mode", "liquidity"))
+
 class BaseExchange(ABC):
     def __init__(self, config):
         self.config = config
-        self.paper_mode = config.get('strategy', {}).get('paper_mode', {}).get('enabled', False)
-        self.paper_balance = config.get('strategy', {}).get('paper_mode', {}).get('initial_balance', {})
+        paper_config = config.get('strategy', {}).get('paper_mode', {})
+        self.paper_mode = paper_config.get('enabled', False)
+        self.paper_balance = paper_config.get('initial_balance', {})
         self.positions = {} # {pair: {amount: float, entry_price: float}}
+        self._http = None  # Shared aiohttp session (see http_session)
+        self._submitted_at = {}  # {order_id: submit time} for live orders awaiting a fill
+        self.tick_trace = None  # Trace of the latest market data tick (see tracing)
+        self._state_listeners = []  # Callbacks run when balance, positions or equity change
+        
+        # Append-only ledger of orders, fills and funding (paper and live)
+        self.ledger = None
+        ledger_config = config.get('ledger', {})
+        if ledger_config.get('enabled', True):
+            from ..database import TradeLedger
+            self.ledger = TradeLedger(ledger_config.get('path', 'ledger.db'))
+        
+        # Equity curve (sampled by run_equity_sampler, rolled up to 1m/1h/1d)
+        self.equity_store = None
+        equity_config = config.get('equity_store', {})
+        if equity_config.get('enabled', True):
+            from ..database import EquityStore
+            self.equity_store = EquityStore(
+                equity_config.get('path', 'equity.db'),
+                sample_seconds=equity_config.get('sample_seconds', 10),
+                retention_days=equity_config.get('retention_days')
+            )
         
         if self.paper_mode:
             logger.info("Initialized in PAPER MODE")
             logger.info(f"Initial Paper Balance: {self.paper_balance}")
             
+            from .paper_engine import PaperMatchingEngine
+            self.paper_engine = PaperMatchingEngine.from_config(
+                paper_config,
+                position_of=lambda pair: self.positions.get(pair, {}).get('amount', 0.0),
+                on_fill=self._apply_paper_fill,
+                book_of=self._paper_book,
+                on_order=self._record_paper_order
+            )
+            self._paper_order_ids = itertools.count(1)
             
             # Load positions from DB
             from ..database import PositionDB
@@ -37,98 +75,291 @@ class BaseExchange(ABC):
     async def get_ohlcv(self, pair, timeframe, limit=100):
         pass
 
-    async def create_order(self, pair, type, side, amount, price=None):
+    async def create_order(self, pair, type, side, amount, price=None, reduce_only=False):
+        """
+        type: 'market', 'limit' or 'ioc' ('ioc' is paper mode only).
+        reduce_only is enforced by the paper matching engine; real orders ignore it.
+        """
+        with tracing.span('order_submit', pair=pair, side=side, type=type):
+            return await self._create_order(pair, type, side, amount, price, reduce_only)
+
+    async def _create_order(self, pair, type, side, amount, price, reduce_only):
         if self.paper_mode:
-            return await self._execute_paper_order(pair, type, side, amount, price)
-        else:
-            return await self._execute_real_order(pair, type, side, amount, price)
+            with tracing.span('exchange_ack'):
+                result = await self._execute_paper_order(pair, type, side, amount, price, reduce_only)
+            if result:
+                tracing.tracer.bind_order(result['id'])
+            return result
+
+        submitted_at = time.time()
+        with tracing.span('exchange_ack'):
+            result = await self._execute_real_order(pair, type, side, amount, price)
+        ORDER_SUBMIT.observe(time.time() - submitted_at, type)
+        self._track_order(result, submitted_at)
+        if self.ledger:
+            for order_id, status in self._order_statuses(result):
+                self.ledger.record_order(order_id or f"live_{time.time_ns()}", pair, side, type, amount, price,
+                                         status=status, mode='live', reduce_only=reduce_only)
+        return result
+
+    def _order_statuses(self, result):
+        """
+        [(order_id, status)] for a live order response, status being 'open', 'closed',
+        'rejected', ... Defaults to a CCXT-style order dict; exchanges whose responses
+        look different override this.
+        """
+        if not isinstance(result, dict):
+            return [(None, 'rejected')]
+        return [(result.get('id'), result.get('status') or 'submitted')]
+
+    def _track_order(self, result, submitted_at):
+        """Remembers a live order's submit time so its first fill can be timed (see _observe_fill)."""
+        for order_id, _ in self._order_statuses(result):
+            if not order_id:
+                continue
+            self._submitted_at[order_id] = submitted_at
+            tracing.tracer.bind_order(order_id)
+            if len(self._submitted_at) > 1000:
+                # Orders that never fill (cancelled elsewhere) shouldn't accumulate
+                self._submitted_at.pop(next(iter(self._submitted_at)))
+
+    def _observe_fill(self, order_id, liquidity, filled_at=None):
+        submitted_at = self._submitted_at.pop(order_id, None)
+        if submitted_at is not None:
+            ORDER_FILL.observe(max((filled_at or time.time()) - submitted_at, 0.0), 'live', liquidity)
 
     @abstractmethod
     async def _execute_real_order(self, pair, type, side, amount, price=None):
         pass
 
-    async def _execute_paper_order(self, pair, type, side, amount, price=None):
-        logger.info(f"PAPER ORDER: {side} {amount} {pair} @ {price}")
-        
-        if not price:
-            price = await self.get_market_price(pair)
-            
+    async def sample_equity(self):
+        """
+        Returns (equity, unrealized_pnl, exposure) in USDC from the current balance
+        and positions. In paper mode the balance is cash, so unrealized PnL is added.
+        """
+        balance = await self.get_balance() or {}
+        total = balance.get('total', balance) or {}
+        cash = float(total.get('USDC', 0) or 0)
+
+        positions = []
+        if hasattr(self, 'get_positions'):
+            positions = await self.get_positions() or []
+        unrealized = sum(float(p.get('pnl', 0) or 0) for p in positions)
+        exposure = sum(abs(float(p.get('value', 0) or 0)) for p in positions)
+
+        equity = cash + unrealized if self.paper_mode else cash
+        return equity, unrealized, exposure
+
+    async def run_equity_sampler(self):
+        """Background task: records an equity sample every sample_seconds."""
+        if not self.equity_store:
+            return
+        interval = self.equity_store.sample_seconds
+        logger.info(f"Equity sampler started (every {interval}s)")
+        while True:
+            try:
+                equity, unrealized, exposure = await self.sample_equity()
+                if equity > 0:
+                    self.equity_store.record(equity, unrealized, exposure)
+                    self._state_changed()
+            except Exception as e:
+                logger.warning(f"Equity sample failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def realized_summary(self, seconds=86400):
+        """
+        Ledger totals (realized PnL, fees, funding, turnover) for this mode over the
+        last `seconds`, for reports; None without a ledger. Queried off the event loop.
+        """
+        if not self.ledger:
+            return None
+        since = time.time() - seconds
+        mode = 'paper' if self.paper_mode else 'live'
+        return await asyncio.get_running_loop().run_in_executor(
+            None, lambda: self.ledger.summary(since=since, mode=mode)
+        )
+
+    def _format_paper_positions(self, prices):
+        """
+        Paper positions in the get_positions() list format.
+        prices: {symbol: mark price}; positions without a price are marked at entry (0 PnL).
+        """
+        formatted_positions = []
+        for pair, pos in self.positions.items():
+            symbol = pair.split('/')[0]
+            size = pos['amount']
+            if size == 0: continue
+
+            entry_price = pos['entry_price']
+            current_price = prices.get(symbol) or entry_price
+            pnl = (current_price - entry_price) * size # Simple spot PnL
+
+            formatted_positions.append({
+                'symbol': symbol,
+                'size': abs(size),
+                'side': 'LONG' if size > 0 else 'SHORT',
+                'entry_price': entry_price,
+                'mark_price': current_price,
+                'value': abs(size) * current_price,
+                'pnl': pnl
+            })
+        return formatted_positions
+
+    def cached_prices(self):
+        """{symbol: price} known without any I/O (paper engine mids by default)."""
+        if self.paper_mode:
+            return {pair.split('/')[0]: mid for pair, mid in self.paper_engine.mids.items()}
+        return {}
+
+    def cached_status(self):
+        """
+        Balance and positions from in-memory state only (never calls the exchange),
+        for dashboards. Balance is None when nothing is cached.
+        """
+        if self.paper_mode:
+            return {
+                'balance': {'total': dict(self.paper_balance)},
+                'positions': self._format_paper_positions(self.cached_prices()),
+            }
+        return {'balance': None, 'positions': []}
+
+    def on_state_change(self, callback):
+        """Registers `callback()` to run (on the event loop) whenever balance, positions or equity change."""
+        self._state_listeners.append(callback)
+
+    def _state_changed(self):
+        for callback in self._state_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"State change listener failed: {e}")
+
+    def _paper_book(self, pair):
+        """Live order book for `pair` used by the paper engine, or None to use its depth model."""
+        return None
+
+    def http_session(self):
+        """
+        Process-wide aiohttp session for ad-hoc REST calls (one connection pool
+        for the exchange, the strategy and the web UI). Created lazily on the
+        running loop and closed by close().
+        """
+        if self._http is None or self._http.closed:
+            import aiohttp
+            self._http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        return self._http
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.close()
+        # Durable flush of write-behind paper positions and the ledger
+        if hasattr(self, 'db'):
+            self.db.close()
+        if self.ledger:
+            self.ledger.close()
+        if self.equity_store:
+            self.equity_store.close()
+
+    async def cancel_order(self, order_id):
+        if self.paper_mode:
+            order = self.paper_engine.cancel(order_id)
+            if order is not None:
+                self._record_paper_order(order)
+            return order is not None
+        logger.warning("cancel_order is only supported in paper mode.")
+        return False
+
+    async def get_open_orders(self, pair=None):
+        if self.paper_mode:
+            return self.paper_engine.open_orders(pair)
+        return []
+
+    async def _execute_paper_order(self, pair, type, side, amount, price=None, reduce_only=False):
+        logger.info(f"PAPER ORDER: {type} {side} {amount} {pair} @ {price}{' (reduce-only)' if reduce_only else ''}")
+
         base, quote = pair.split('/')
-        cost = amount * price
-        
-        if side == 'buy':
-            # Futures Buy: Increases position size (Long) or Decreases Short
-            # Cost is margin, but for simple paper mode we just track PnL or assume sufficient margin if balance > 0
-            
-            # Simplified: Just check if we have some quote currency (USDC)
-            if self.paper_balance.get(quote, 0) > 0:
-                # Update position
-                current_pos = self.positions.get(pair, {'amount': 0, 'entry_price': 0})
-                old_amt = current_pos['amount']
-                new_amt = old_amt + amount
-                
-                # Calculate new entry price if increasing position
-                if old_amt >= 0:
-                    cost = amount * price
-                    total_cost = (old_amt * current_pos['entry_price']) + cost
-                    avg_price = total_cost / new_amt if new_amt != 0 else 0
-                    self.positions[pair] = {'amount': new_amt, 'entry_price': avg_price}
-                else:
-                    # ショート(売り)ポジションをクローズ中
-                    # 実現損益ロジックをここに追加予定
-                    self.positions[pair]['amount'] = new_amt
-                    # DBに保存してからポジションを削除
-                    if hasattr(self, 'db'):
-                        if new_amt == 0:
-                            # ポジションが完全にクローズされた場合、amount=0としてDB保存（自動削除される）
-                            self.db.save_position(pair, 0, 0)
-                            del self.positions[pair]
-                        else:
-                            # 部分的にクローズされた場合、新しいサイズを保存
-                            self.db.save_position(pair, new_amt, self.positions[pair]['entry_price'])
-                    else:
-                        # DBがない場合でも削除処理を実行
-                        if new_amt == 0:
-                            del self.positions[pair]
-
-                return {'id': f'paper_{int(time.time())}', 'status': 'closed', 'filled': amount, 'price': price}
-            else:
-                logger.warning("Paper Mode: Insufficient funds (Balance <= 0)")
-                return None
-                
-        elif side == 'sell':
-            # Futures Sell: Decreases Long or Increases Short (Negative amount)
-            
-            if self.paper_balance.get(quote, 0) > 0:
-                # Update position
-                current_pos = self.positions.get(pair, {'amount': 0, 'entry_price': 0})
-                old_amt = current_pos['amount']
-                new_amt = old_amt - amount
-                
-                # Calculate new entry price if increasing short (becoming more negative)
-                if old_amt <= 0:
-                    cost = amount * price
-                    total_cost = (abs(old_amt) * current_pos['entry_price']) + cost
-                    avg_price = total_cost / abs(new_amt) if new_amt != 0 else 0
-                    self.positions[pair] = {'amount': new_amt, 'entry_price': avg_price}
-                else:
-                    # ロング(買い)ポジションをクローズ中
-                    self.positions[pair]['amount'] = new_amt
-                    # DBに保存してからポジションを削除
-                    if hasattr(self, 'db'):
-                        if new_amt == 0:
-                            # ポジションが完全にクローズされた場合、amount=0としてDB保存（自動削除される）
-                            self.db.save_position(pair, 0, 0)
-                            del self.positions[pair]
-                        else:
-                            # 部分的にクローズされた場合、新しいサイズを保存
-                            self.db.save_position(pair, new_amt, self.positions[pair]['entry_price'])
-                    else:
-                        # DBがない場合でも削除処理を実行
-                        if new_amt == 0:
-                            del self.positions[pair]
-
-                return {'id': f'paper_{int(time.time())}', 'status': 'closed', 'filled': amount, 'price': price}
-            else:
-                logger.warning("Paper Mode: Insufficient funds (Balance <= 0)")
-                return None
+        if not reduce_only and self.paper_balance.get(quote, 0) <= 0:
+            logger.warning("Paper Mode: Insufficient funds (Balance <= 0)")
+            return None
+
+        # Market orders are priced off the caller's price (the mid it just looked at),
+        # everything else off the live price. The engine's own mid is only refreshed
+        # by orders and resting-order ticks, so it's just the fallback.
+        mid = price if type == 'market' and price else None
+        if not mid:
+            try:
+                mid = await self.get_market_price(pair)
+            except Exception as e:
+                logger.warning(f"Paper Mode: Price lookup for {pair} failed: {e}")
+            mid = mid or self.paper_engine.mids.get(pair)
+        if not mid:
+            logger.warning(f"Paper Mode: No price for {pair}, order rejected")
+            return None
+
+        try:
+            order = self.paper_engine.submit(
+                f'paper_{next(self._paper_order_ids)}_{int(time.time())}',
+                pair, side, type, amount, price=price, reduce_only=reduce_only, mid=mid
+            )
+        except ValueError as e:
+            logger.warning(f"Paper Mode: Order rejected: {e}")
+            return None
+
+        if order.status == 'open':
+            logger.info(f"PAPER ORDER RESTING: {order.id} {side} {order.remaining} {pair} @ {order.price}")
+        elif order.remaining > 1e-12:
+            logger.info(f"PAPER ORDER {order.status.upper()}: filled {order.filled}/{amount} {pair}")
+        return order.to_dict()
+
+    def _record_paper_order(self, order):
+        if self.ledger:
+            self.ledger.record_order(order.id, order.pair, order.side, order.type, order.amount,
+                                     order.price, status=order.status, mode='paper',
+                                     reduce_only=order.reduce_only, ts=order.created_at)
+
+    def _apply_paper_fill(self, fill):
+        """
+        Applies a paper fill to positions and the quote balance: realized PnL is
+        credited when a position is reduced, and the fee is always deducted.
+        """
+        tracing.tracer.on_fill(fill['order_id'])
+        pair, amount, price = fill['pair'], fill['amount'], fill['price']
+        quote = pair.split('/')[1]
+        signed = amount if fill['side'] == 'buy' else -amount
+
+        current_pos = self.positions.get(pair, {'amount': 0, 'entry_price': 0})
+        old_amt, entry = current_pos['amount'], current_pos['entry_price']
+        new_amt = old_amt + signed
+        realized = 0.0
+
+        if old_amt == 0 or (old_amt > 0) == (signed > 0):
+            # Opening or adding: volume-weighted entry
+            entry = (abs(old_amt) * entry + amount * price) / abs(new_amt)
+        else:
+            closed = min(abs(old_amt), amount)
+            realized = closed * (price - entry) * (1 if old_amt > 0 else -1)
+            if abs(new_amt) < 1e-12:
+                new_amt = 0
+            elif (new_amt > 0) != (old_amt > 0):
+                # Flipped through zero: the remainder opens at the fill price
+                entry = price
+
+        self.paper_balance[quote] = self.paper_balance.get(quote, 0) + realized - fill['fee']
+
+        if new_amt == 0:
+            self.positions.pop(pair, None)
+        else:
+            self.positions[pair] = {'amount': new_amt, 'entry_price': entry}
+        if hasattr(self, 'db'):
+            # amount=0 deletes the row
+            self.db.save_position(pair, new_amt, entry if new_amt else 0)
+        if self.ledger:
+            self.ledger.record_fill(pair, fill['side'], amount, price, fee=fill['fee'], realized_pnl=realized,
+                                    order_id=fill['order_id'], liquidity=fill['liquidity'], mode='paper',
+                                    ts=fill['timestamp'])
+
+        logger.info(
+            f"PAPER FILL ({fill['liquidity']}): {fill['side']} {amount} {pair} @ {price:.6g} "
+            f"fee={fill['fee']:.4f} realized={realized:.4f} position={new_amt}"
+        )
+        self._state_changed()
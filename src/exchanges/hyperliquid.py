@@ -5,11 +5,20 @@ from hyperliquid.utils import constants
 from datetime import datetime
 import asyncio
 import time
-from .base import BaseExchange
+from .base import BaseExchange, ORDER_FILL
+from .orderbook import L2Book
 from ..logger import setup_logger
+from .. import metrics, tracing
 
 logger = setup_logger("hyperliquid")
 
+WS_MESSAGES = metrics.counter("ws_messages_total", "Websocket messages received", ("channel",))
+PRICE_UPDATE = metrics.histogram("price_update_seconds", "Time spent handling one allMids message",
+                                 buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05))
+CACHE_LOOKUPS = metrics.counter("exchange_cache_lookups_total",
+                                "Account/market reads served from the websocket cache or the REST fallback",
+                                ("method", "source"))
+
 class Hyperliquid(BaseExchange):
     def __init__(self, config):
         super().__init__(config)
@@ -20,6 +29,14 @@ class Hyperliquid(BaseExchange):
         self.testnet = hl_config.get('testnet', False)
         
         self.base_url = constants.TESTNET_API_URL if self.testnet else constants.MAINNET_API_URL
+        self.ws_url = "wss://api.hyperliquid-testnet.xyz/ws" if self.testnet else "wss://api.hyperliquid.xyz/ws"
+        self.stats_url = "https://api.hyperliquid.xyz/info"
+        # Endpoint overrides (e.g. a local stand-in exchange for load tests, see benchmarks/)
+        self.api_url = hl_config.get('api_url')
+        if self.api_url:
+            self.base_url = self.api_url.rstrip('/')
+            self.stats_url = f"{self.base_url}/info"
+        self.ws_url = hl_config.get('ws_url') or self.ws_url
         
         # WebSocket data caches
         self.price_cache = {}
@@ -27,6 +44,14 @@ class Hyperliquid(BaseExchange):
         self.balance_cache = {}
         self.last_update_time = {}
         self.ws_connected = False
+        self._ws = None
+        
+        # Optional L2 order book mirror (l2Book subscription per coin)
+        l2_config = hl_config.get('l2_book', {})
+        self.l2_enabled = l2_config.get('enabled', False)
+        self.l2_coins = set(l2_config.get('coins', []))
+        self.l2_max_age = l2_config.get('max_age_seconds', 10)
+        self.order_books = {}  # {coin: L2Book}
         
         # Initialize Info (lightweight, for REST API fallback only)
         # WebSocket will be started separately via start_websocket()
@@ -84,7 +109,8 @@ class Hyperliquid(BaseExchange):
             if time.time() - last_update < 60:
                 total_equity = self.balance_cache.get('accountValue', 0)
                 withdrawable = self.balance_cache.get('withdrawable', 0)
-                logger.debug(f"💰 Balance from WebSocket cache: ${total_equity:.2f}")
+                logger.debug("💰 Balance from WebSocket cache: $%.2f", total_equity)
+                CACHE_LOOKUPS.inc(1, 'get_balance', 'ws')
                 return {
                     'total': {'USDC': total_equity},
                     'free': {'USDC': withdrawable},
@@ -104,6 +130,7 @@ class Hyperliquid(BaseExchange):
                     return {'total': {}, 'free': {}, 'used': {}}
                 
             logger.debug("⚠️ Balance cache empty or stale, fetching from REST API")
+            CACHE_LOOKUPS.inc(1, 'get_balance', 'rest')
             user_state = self.info.user_state(self.wallet_address)
             total_equity = float(user_state.get('marginSummary', {}).get('accountValue', 0))
             
@@ -130,46 +157,27 @@ class Hyperliquid(BaseExchange):
             # BaseExchange: {pair: {amount: float, entry_price: float}}
             # Expected: [{'symbol': 'ETH', 'size': 1.0, 'entry_price': 3000, 'pnl': 50, 'side': 'LONG'}]
             
-            formatted_positions = []
-            
             # Fetch all prices once to avoid rate limits
             all_prices = await self.get_all_prices()
             
-            for pair, pos in self.positions.items():
+            for pair in self.positions:
                 symbol = pair.split('/')[0]
-                size = pos['amount']
-                if size == 0: continue
-                
-                # Calculate PnL roughly
-                current_price = all_prices.get(symbol, 0)
-                if current_price == 0:
-                     # Fallback if missing in bulk fetch (rare)
-                     try:
-                        current_price = await self.get_market_price(pair)
-                     except:
-                        current_price = pos['entry_price'] # Fallback to entry price (0 PnL)
-
-                entry_price = pos['entry_price']
-                pnl = (current_price - entry_price) * size # Simple spot PnL
-                position_value = abs(size) * current_price
-                
-                formatted_positions.append({
-                    'symbol': symbol,
-                    'size': abs(size),
-                    'side': 'LONG' if size > 0 else 'SHORT',
-                    'entry_price': entry_price,
-                    'mark_price': current_price,
-                    'value': position_value,
-                    'pnl': pnl
-                })
-            return formatted_positions
+                if not all_prices.get(symbol):
+                    # Fallback if missing in bulk fetch (rare)
+                    try:
+                        all_prices[symbol] = await self.get_market_price(pair)
+                    except:
+                        pass # Entry price is used (0 PnL)
+            
+            return self._format_paper_positions(all_prices)
         
         # Prefer WebSocket cache
         if self.position_cache:
             # Check staleness (e.g. 60 seconds)
             last_update = self.last_update_time.get('positions', 0)
             if time.time() - last_update < 60:
-                logger.debug(f"💼 Positions from WebSocket cache: {len(self.position_cache)} active")
+                logger.debug("💼 Positions from WebSocket cache: %d active", len(self.position_cache))
+                CACHE_LOOKUPS.inc(1, 'get_positions', 'ws')
                 return self.position_cache
             else:
                 logger.warning(f"⚠️ Position cache stale ({int(time.time() - last_update)}s old), falling back to REST")
@@ -185,6 +193,7 @@ class Hyperliquid(BaseExchange):
                     return []
                 
             logger.debug("⚠️ Position cache empty or stale, fetching from REST API")
+            CACHE_LOOKUPS.inc(1, 'get_positions', 'rest')
             user_state = self.info.user_state(self.wallet_address)
             raw_positions = user_state.get('assetPositions', [])
             
@@ -199,11 +208,12 @@ class Hyperliquid(BaseExchange):
         Starts the WebSocket connection to listen for:
         - allMids: price updates
         - user: position, balance, and order updates (if wallet configured)
+        - l2Book: order book snapshots for watched coins (if l2_book is enabled)
         """
         import websockets
         import json
         
-        ws_url = "wss://api.hyperliquid-testnet.xyz/ws" if self.testnet else "wss://api.hyperliquid.xyz/ws"
+        ws_url = self.ws_url
         logger.info(f"🔵 Connecting to WebSocket: {ws_url}")
         
         last_heartbeat = 0
@@ -226,6 +236,12 @@ class Hyperliquid(BaseExchange):
                     }
                     await websocket.send(json.dumps(subscribe_allmids))
                     logger.info("📊 Subscribed to allMids")
+                    self._ws = websocket
+                    
+                    # Subscribe to order books for watched coins
+                    if self.l2_enabled:
+                        for coin in self.l2_coins:
+                            await self._subscribe_l2(coin)
                     
                     # Subscribe to user data (if wallet address configured)
                     if self.wallet_address and not self.paper_mode:
@@ -242,13 +258,24 @@ class Hyperliquid(BaseExchange):
                     # Message handling loop
                     while True:
                         msg = await websocket.recv()
+                        received = time.perf_counter()
                         data = json.loads(msg)
                         
                         channel = data.get("channel")
+                        WS_MESSAGES.inc(1, channel)
                         
                         # Handle price updates
                         if channel == "allMids":
-                            self._handle_price_update(data)
+                            # Each tick starts a trace; the next strategy cycle continues it
+                            trace = tracing.Trace('tick', origin=received, channel=channel)
+                            trace.mark('ws_decode', received)
+                            with PRICE_UPDATE.time(), trace.span('cache_update'):
+                                self._handle_price_update(data)
+                            self.tick_trace = trace
+                        
+                        # Handle order book snapshots
+                        elif channel == "l2Book":
+                            self._handle_l2_book(data)
                         
                         # Handle user events (positions, balance, fills)
                         elif channel == "user":
@@ -261,10 +288,12 @@ class Hyperliquid(BaseExchange):
                             
             except websockets.exceptions.ConnectionClosed as e:
                 self.ws_connected = False
+                self._ws = None
                 logger.warning(f"⚠️ WebSocket connection closed: {e}. Reconnecting in 5s...")
                 await asyncio.sleep(5)
             except Exception as e:
                 self.ws_connected = False
+                self._ws = None
                 logger.error(f"❌ WebSocket Error: {e}. Reconnecting in 5s...")
                 await asyncio.sleep(5)
     
@@ -275,7 +304,78 @@ class Hyperliquid(BaseExchange):
             for coin, price in mids.items():
                 self.price_cache[coin] = float(price)
             self.last_update_time['prices'] = time.time()
-            logger.debug(f"📈 Updated {len(mids)} prices")
+            logger.debug("📈 Updated %d prices", len(mids))
+            if self.paper_mode:
+                # Only pairs with resting paper orders need matching
+                for pair in self.paper_engine.active_pairs():
+                    price = self.price_cache.get(pair.split('/')[0])
+                    if price:
+                        self.paper_engine.on_mid(pair, price)
+    
+    def _handle_l2_book(self, data):
+        """Handle l2Book snapshots"""
+        book_data = data.get("data", {})
+        coin = book_data.get("coin")
+        if not coin:
+            return
+        book = self.order_books.get(coin)
+        if book is None:
+            book = self.order_books[coin] = L2Book(coin)
+        book.apply_hyperliquid(book_data)
+    
+    async def _subscribe_l2(self, coin):
+        import json
+        await self._ws.send(json.dumps({
+            "method": "subscribe",
+            "subscription": {"type": "l2Book", "coin": coin}
+        }))
+        logger.info(f"📚 Subscribed to l2Book for {coin}")
+    
+    async def watch_order_book(self, pair):
+        """
+        Starts mirroring the order book for `pair` (no-op if l2_book is disabled).
+        Takes effect immediately if the WebSocket is connected, otherwise on connect.
+        """
+        if not self.l2_enabled:
+            return
+        coin = pair.split('/')[0]
+        if coin in self.l2_coins:
+            return
+        self.l2_coins.add(coin)
+        if self._ws is not None:
+            try:
+                await self._subscribe_l2(coin)
+            except Exception as e:
+                logger.warning(f"Failed to subscribe l2Book for {coin}: {e}")
+    
+    def get_order_book(self, pair):
+        """Returns the mirrored L2Book for `pair`, or None if not watched or stale."""
+        book = self.order_books.get(pair.split('/')[0])
+        if book is None or book.age() is None or book.age() > self.l2_max_age:
+            return None
+        return book
+    
+    def cached_prices(self):
+        prices = super().cached_prices()
+        prices.update(self.price_cache)
+        return prices
+    
+    def cached_status(self):
+        if self.paper_mode:
+            return super().cached_status()
+        balance = None
+        if self.balance_cache:
+            total_equity = self.balance_cache.get('accountValue', 0)
+            withdrawable = self.balance_cache.get('withdrawable', 0)
+            balance = {
+                'total': {'USDC': total_equity},
+                'free': {'USDC': withdrawable},
+                'used': {'USDC': total_equity - withdrawable}
+            }
+        return {'balance': balance, 'positions': list(self.position_cache)}
+    
+    def _paper_book(self, pair):
+        return self.get_order_book(pair)
     
     def _handle_user_event(self, data):
         """Handle user event updates (positions, balance, fills)"""
@@ -286,7 +386,7 @@ class Hyperliquid(BaseExchange):
             raw_positions = event_data["assetPositions"]
             self.position_cache = self._parse_positions(raw_positions)
             self.last_update_time['positions'] = time.time()
-            logger.debug(f"💼 Updated positions: {len(self.position_cache)} active")
+            logger.debug("💼 Updated positions: %d active", len(self.position_cache))
         
         # Update balance from crossMarginSummary
         if "crossMarginSummary" in event_data:
@@ -297,9 +397,12 @@ class Hyperliquid(BaseExchange):
                 'withdrawable': float(margin_summary.get('withdrawable', 0))
             }
             self.last_update_time['balance'] = time.time()
-            logger.debug(f"💰 Updated balance: ${self.balance_cache.get('accountValue', 0):.2f}")
+            logger.debug("💰 Updated balance: $%.2f", self.balance_cache.get('accountValue', 0))
+
+        if "assetPositions" in event_data or "crossMarginSummary" in event_data:
+            self._state_changed()
         
-        # Log fills (trades executed)
+        # Log fills (trades executed) and record them in the ledger
         if "fills" in event_data:
             fills = event_data["fills"]
             for fill in fills:
@@ -308,6 +411,34 @@ class Hyperliquid(BaseExchange):
                 px = fill.get("px", 0)
                 sz = fill.get("sz", 0)
                 logger.info(f"✅ Fill executed: {side} {sz} {coin} @ {px}")
+                self._observe_fill(fill.get("oid"), 'taker' if fill.get("crossed") else 'maker',
+                                   fill["time"] / 1000 if fill.get("time") else None)
+                tracing.tracer.on_fill(fill.get("oid"))
+                if self.ledger:
+                    self.ledger.record_fill(
+                        f"{coin}/USDC",
+                        'buy' if side == 'B' else 'sell',
+                        float(sz), float(px),
+                        fee=float(fill.get("fee", 0)),
+                        realized_pnl=float(fill.get("closedPnl", 0)),
+                        order_id=fill.get("oid"),
+                        trade_id=fill.get("tid") or fill.get("hash"),
+                        liquidity='taker' if fill.get("crossed") else 'maker',
+                        mode='live',
+                        ts=fill["time"] / 1000 if fill.get("time") else None
+                    )
+        
+        # Record funding payments
+        if "funding" in event_data and self.ledger:
+            funding = event_data["funding"]
+            self.ledger.record_funding(
+                f"{funding.get('coin', '?')}/USDC",
+                float(funding.get("usdc", 0)),
+                rate=float(funding.get("fundingRate", 0)),
+                position_size=float(funding.get("szi", 0)),
+                mode='live',
+                ts=funding["time"] / 1000 if funding.get("time") else None
+            )
 
         # Log order updates (canceled, open, etc)
         if "orderUpdates" in event_data:
@@ -361,11 +492,13 @@ class Hyperliquid(BaseExchange):
                 coin = pair.split('/')[0]
                 price = self.price_cache.get(coin)
                 if price:
+                    CACHE_LOOKUPS.inc(1, 'get_market_price', 'ws')
                     return price
             else:
                 logger.debug(f"⚠️ Price cache stale ({int(time.time() - last_update)}s old)")
                 
         # Fallback to REST
+        CACHE_LOOKUPS.inc(1, 'get_market_price', 'rest')
         try:
             if not self.info:
                 # Try lazy init
@@ -390,6 +523,7 @@ class Hyperliquid(BaseExchange):
             # Check staleness
             last_update = self.last_update_time.get('prices', 0)
             if time.time() - last_update < 60:
+                CACHE_LOOKUPS.inc(1, 'get_all_prices', 'ws')
                 return self.price_cache.copy()
             else:
                 logger.debug(f"⚠️ Price cache stale ({int(time.time() - last_update)}s old)")
@@ -417,6 +551,8 @@ class Hyperliquid(BaseExchange):
                     'enableRateLimit': True,
                     'options': {'defaultType': 'future'},
                 })
+                if self.api_url:
+                    self.ccxt_client.urls['api'] = {'public': self.base_url, 'private': self.base_url}
 
             # Load and cache markets once
             if not hasattr(self, 'ccxt_markets') or not self.ccxt_markets:
@@ -460,6 +596,33 @@ class Hyperliquid(BaseExchange):
     async def close(self):
         if hasattr(self, 'ccxt_client'):
             await self.ccxt_client.close()
+        await super().close()
+
+    def _order_statuses(self, result):
+        # SDK response: {'status': 'ok', 'response': {'data': {'statuses': [{'resting': {'oid'}} | {'filled': {...}} | {'error': msg}]}}}
+        response = result.get('response') if isinstance(result, dict) else None
+        if not isinstance(response, dict):
+            return [(None, 'rejected')]
+        statuses = []
+        for status in response.get('data', {}).get('statuses', []):
+            if 'filled' in status:
+                statuses.append((status['filled'].get('oid'), 'closed'))
+            elif 'resting' in status:
+                statuses.append((status['resting'].get('oid'), 'open'))
+            else:
+                statuses.append((None, 'rejected'))
+        return statuses or [(None, 'rejected')]
+
+    def _track_order(self, result, submitted_at):
+        for oid, status in self._order_statuses(result):
+            if oid is None:
+                continue
+            if status == 'closed':
+                # Filled on submission: the round trip is the time to fill
+                ORDER_FILL.observe(time.time() - submitted_at, 'live', 'taker')
+            else:
+                self._submitted_at[oid] = submitted_at
+            tracing.tracer.bind_order(oid)
 
     async def _execute_real_order(self, pair, type, side, amount, price=None):
         if not self.exchange:
@@ -500,32 +663,30 @@ class Hyperliquid(BaseExchange):
         """
         Fetches top traders from Hyperliquid stats API.
         """
-        import aiohttp
-        url = "https://api.hyperliquid.xyz/info"
+        url = self.stats_url
         payload = {"type": "leaderboard", "window": "7d"} # 7d window for active traders
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        # data is list of [address, pnl, ...]
-                        # We want top N addresses
-                        top_traders = []
-                        for row in data[:limit]:
-                            # row structure depends on API. Usually row[0] is address?
-                            # Let's assume row structure based on common knowledge or try to parse dict if it is dict.
-                            # Actually leaderboard rows are often dicts in Hyperliquid API: {'ethAddress': '...', 'accountValue': ...}
-                            if isinstance(row, dict):
-                                address = row.get('ethAddress') or row.get('address')
-                                if address:
-                                    top_traders.append(address)
-                            elif isinstance(row, list):
-                                top_traders.append(row[0]) # Fallback
-                        return top_traders
-                    else:
-                        logger.error(f"Failed to fetch leaderboard: {response.status}")
-                        return []
+            async with self.http_session().post(url, json=payload) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    # data is list of [address, pnl, ...]
+                    # We want top N addresses
+                    top_traders = []
+                    for row in data[:limit]:
+                        # row structure depends on API. Usually row[0] is address?
+                        # Let's assume row structure based on common knowledge or try to parse dict if it is dict.
+                        # Actually leaderboard rows are often dicts in Hyperliquid API: {'ethAddress': '...', 'accountValue': ...}
+                        if isinstance(row, dict):
+                            address = row.get('ethAddress') or row.get('address')
+                            if address:
+                                top_traders.append(address)
+                        elif isinstance(row, list):
+                            top_traders.append(row[0]) # Fallback
+                    return top_traders
+                else:
+                    logger.error(f"Failed to fetch leaderboard: {response.status}")
+                    return []
         except Exception as e:
             logger.error(f"Error fetching leaderboard: {e}")
             return []
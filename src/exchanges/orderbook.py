@@ -0,0 +1,110 @@
+import time
+import numpy as np
+
+
+class L2Book:
+    """
+    Local mirror of one coin's L2 order book.
+
+    Each side is stored as compact float64 arrays (prices best first, sizes and
+    their running totals), rebuilt on every snapshot, so queries are a
+    searchsorted over a few dozen levels instead of walking Python lists.
+    """
+
+    def __init__(self, coin):
+        self.coin = coin
+        self.updated_at = 0.0
+        self.exchange_time = None
+        self._sides = {
+            'bid': self._empty(),
+            'ask': self._empty(),
+        }
+
+    @staticmethod
+    def _empty():
+        empty = np.empty(0)
+        return empty, empty, empty, empty  # prices, sizes, cumulative size, cumulative notional
+
+    def apply_snapshot(self, bids, asks, exchange_time=None):
+        """
+        bids/asks: [(price, size)], best first.
+        """
+        for side, levels in (('bid', bids), ('ask', asks)):
+            if levels:
+                arr = np.asarray(levels, dtype=np.float64)
+                prices, sizes = arr[:, 0], arr[:, 1]
+                self._sides[side] = (prices, sizes, np.cumsum(sizes), np.cumsum(prices * sizes))
+            else:
+                self._sides[side] = self._empty()
+        self.exchange_time = exchange_time
+        self.updated_at = time.time()
+
+    def apply_hyperliquid(self, data):
+        """Applies an l2Book websocket message payload ({'levels': [bids, asks], ...})."""
+        bids, asks = data.get('levels', [[], []])
+        self.apply_snapshot(
+            [(float(l['px']), float(l['sz'])) for l in bids],
+            [(float(l['px']), float(l['sz'])) for l in asks],
+            exchange_time=data.get('time'),
+        )
+
+    def age(self):
+        return time.time() - self.updated_at if self.updated_at else None
+
+    def best_bid_ask(self):
+        """Returns (best_bid, best_ask); either is None if that side is empty."""
+        bid, ask = self._sides['bid'][0], self._sides['ask'][0]
+        return (float(bid[0]) if len(bid) else None, float(ask[0]) if len(ask) else None)
+
+    def mid(self):
+        bid, ask = self.best_bid_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def levels(self, side):
+        """
+        Yields (price, size) of the liquidity a taker on `side` ('buy' or 'sell')
+        would trade against, best first.
+        """
+        prices, sizes, _, _ = self._sides['ask' if side == 'buy' else 'bid']
+        return zip(prices.tolist(), sizes.tolist())
+
+    def depth_to_size(self, side, size):
+        """
+        Worst price a taker on `side` reaches when filling `size`,
+        or None if the visible book is too thin.
+        """
+        prices, _, cum_size, _ = self._sides['ask' if side == 'buy' else 'bid']
+        i = int(np.searchsorted(cum_size, size))
+        if i >= len(prices):
+            return None
+        return float(prices[i])
+
+    def estimate_vwap(self, side, size):
+        """
+        Estimated average fill price for a `size` taker order on `side`.
+        Returns (vwap, fillable_size); fillable_size < size when the visible
+        book is too thin, and vwap is None if that side is empty. A size of 0
+        is priced at the touch.
+        """
+        prices, _, cum_size, cum_notional = self._sides['ask' if side == 'buy' else 'bid']
+        if not len(prices):
+            return None, 0.0
+        if size <= 0:
+            return float(prices[0]), 0.0
+        i = int(np.searchsorted(cum_size, size))
+        if i >= len(prices):
+            return float(cum_notional[-1] / cum_size[-1]), float(cum_size[-1])
+        prev_size = cum_size[i - 1] if i else 0.0
+        prev_notional = cum_notional[i - 1] if i else 0.0
+        notional = prev_notional + (size - prev_size) * prices[i]
+        return float(notional / size), float(size)
+
+    def slippage_bps(self, side, size):
+        """Cost of a `size` taker order vs the mid, in basis points (None if unknown)."""
+        mid = self.mid()
+        vwap, filled = self.estimate_vwap(side, size)
+        if mid is None or vwap is None or filled < size:
+            return None
+        return abs(vwap / mid - 1) * 10000
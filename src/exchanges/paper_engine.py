@@ -0,0 +1,264 @@
+import heapq
+import itertools
+import time
+from ..logger import setup_logger
+from .. import metrics
+
+logger = setup_logger("paper_engine")
+
+# Shared with live orders (registered by name, so this is the same histogram as in base.py)
+ORDER_FILL = metrics.histogram("order_fill_seconds", "Time from order submission to its first fill", ("mode", "liquidity"))
+
+
+class PaperOrder:
+    __slots__ = ('id', 'pair', 'side', 'type', 'price', 'amount', 'filled', 'reduce_only',
+                 'status', 'created_at', 'fee', 'notional')
+
+    def __init__(self, order_id, pair, side, type, price, amount, reduce_only):
+        self.id = order_id
+        self.pair = pair
+        self.side = side
+        self.type = type
+        self.price = price
+        self.amount = amount
+        self.filled = 0.0
+        self.reduce_only = reduce_only
+        self.status = 'open'
+        self.created_at = time.time()
+        self.fee = 0.0
+        self.notional = 0.0
+
+    @property
+    def remaining(self):
+        return self.amount - self.filled
+
+    @property
+    def average_price(self):
+        return self.notional / self.filled if self.filled else None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'pair': self.pair,
+            'side': self.side,
+            'type': self.type,
+            'price': self.average_price if self.filled else self.price,
+            'limit_price': self.price,
+            'amount': self.amount,
+            'filled': self.filled,
+            'remaining': self.remaining,
+            'fee': self.fee,
+            'reduce_only': self.reduce_only,
+            'status': self.status,
+        }
+
+
+class PaperMatchingEngine:
+    """
+    In-process matching engine for paper trading.
+
+    Liquidity is modelled around the last mid of each pair: the best bid/ask sit
+    `half_spread_bps` away from the mid, and each further level is `level_bps`
+    deeper and holds `level_notional` of quote currency, up to `max_levels`.
+    Taker orders walk those levels (so large orders pay more slippage and can be
+    partially filled); resting limit orders fill at their limit price as maker
+    once the touch crosses them on a mid update.
+
+    Resting orders live in per-pair heaps, so a mid update only looks at the top
+    of each side: O(1) when nothing crosses, O(log n) per filled order.
+    Cancelled orders are dropped lazily when they reach the top of the heap.
+
+    position_of(pair) -> signed position size, used for reduce-only checks.
+    on_fill(fill) is called synchronously for every fill.
+    book_of(pair) -> optional live order book (see orderbook.L2Book); when it
+    returns a book, taker orders walk its real levels instead of the model.
+    on_order(order) is called when an order is submitted and when a resting
+    order completes.
+    """
+
+    def __init__(self, position_of, on_fill, maker_fee=0.00015, taker_fee=0.00045,
+                 half_spread_bps=1.0, level_bps=1.0, level_notional=50000, max_levels=100, book_of=None,
+                 on_order=None):
+        self.position_of = position_of
+        self.on_fill = on_fill
+        self.book_of = book_of
+        self.on_order = on_order
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.half_spread_bps = half_spread_bps
+        self.level_bps = level_bps
+        self.level_notional = level_notional
+        self.max_levels = max_levels
+
+        self.mids = {}    # {pair: last mid}
+        self.orders = {}  # {order_id: PaperOrder} for resting orders
+        self._bids = {}   # {pair: [(-price, seq, order)]}
+        self._asks = {}   # {pair: [(price, seq, order)]}
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_config(cls, paper_config, position_of, on_fill, book_of=None, on_order=None):
+        fees = paper_config.get('fees', {})
+        slippage = paper_config.get('slippage', {})
+        return cls(
+            position_of, on_fill,
+            maker_fee=fees.get('maker', 0.00015),
+            taker_fee=fees.get('taker', 0.00045),
+            half_spread_bps=slippage.get('half_spread_bps', 1.0),
+            level_bps=slippage.get('level_bps', 1.0),
+            level_notional=slippage.get('level_notional', 50000),
+            max_levels=slippage.get('max_levels', 100),
+            book_of=book_of,
+            on_order=on_order,
+        )
+
+    def active_pairs(self):
+        """Pairs with resting orders (the only ones that need mid updates)."""
+        return [pair for pair in set(self._bids) | set(self._asks) if self._bids.get(pair) or self._asks.get(pair)]
+
+    def open_orders(self, pair=None):
+        return [o.to_dict() for o in self.orders.values() if pair is None or o.pair == pair]
+
+    def _touch(self, mid, side):
+        """Best price a taker on `side` can trade at."""
+        offset = self.half_spread_bps / 10000
+        return mid * (1 + offset) if side == 'buy' else mid * (1 - offset)
+
+    def _levels(self, pair, side):
+        """Yields (price, size) of the opposite side of the book, best first."""
+        book = self.book_of(pair) if self.book_of else None
+        if book is not None:
+            yield from book.levels(side)
+            return
+        mid = self.mids[pair]
+        sign = 1 if side == 'buy' else -1
+        for i in range(self.max_levels):
+            price = mid * (1 + sign * (self.half_spread_bps + i * self.level_bps) / 10000)
+            yield price, self.level_notional / price
+
+    def _fillable(self, order, amount):
+        """Clamps `amount` for reduce-only orders to what actually reduces the position."""
+        if not order.reduce_only:
+            return amount
+        position = self.position_of(order.pair)
+        reducible = max(-position, 0.0) if order.side == 'buy' else max(position, 0.0)
+        return min(amount, reducible)
+
+    def _fill(self, order, amount, price, liquidity):
+        fee = amount * price * (self.maker_fee if liquidity == 'maker' else self.taker_fee)
+        now = time.time()
+        if not order.filled:
+            ORDER_FILL.observe(now - order.created_at, 'paper', liquidity)
+        order.filled += amount
+        order.notional += amount * price
+        order.fee += fee
+        self.on_fill({
+            'order_id': order.id,
+            'pair': order.pair,
+            'side': order.side,
+            'amount': amount,
+            'price': price,
+            'fee': fee,
+            'liquidity': liquidity,
+            'timestamp': now,
+        })
+
+    def _take(self, order):
+        """Matches `order` against the book as a taker, respecting its limit price."""
+        for price, size in self._levels(order.pair, order.side):
+            if order.remaining <= 1e-12:
+                break
+            if order.price is not None:
+                if (order.side == 'buy' and price > order.price) or (order.side == 'sell' and price < order.price):
+                    break
+            amount = self._fillable(order, min(size, order.remaining))
+            if amount <= 0:
+                break
+            self._fill(order, amount, price, 'taker')
+
+    def submit(self, order_id, pair, side, type, amount, price=None, reduce_only=False, mid=None):
+        """
+        Submits an order and returns it.
+        type: 'market' (walk the book), 'ioc' (walk the book up to `price`, cancel the rest)
+        or 'limit' (take what crosses, rest the remainder until it fills or is cancelled).
+        """
+        if mid is not None:
+            self.mids[pair] = mid
+        if pair not in self.mids:
+            raise ValueError(f"No mid price for {pair}")
+        if type in ('limit', 'ioc') and not price:
+            raise ValueError(f"{type} order requires a price")
+
+        order = PaperOrder(order_id, pair, side, type, price if type != 'market' else None, amount, reduce_only)
+        self._take(order)
+
+        if order.remaining <= 1e-12:
+            order.status = 'closed'
+        elif type == 'limit' and self._fillable(order, order.remaining) > 0:
+            self._rest(order)
+        else:
+            order.status = 'closed' if order.filled else 'canceled'
+        if self.on_order:
+            self.on_order(order)
+        return order
+
+    def _rest(self, order):
+        self.orders[order.id] = order
+        if order.side == 'buy':
+            heapq.heappush(self._bids.setdefault(order.pair, []), (-order.price, next(self._seq), order))
+        else:
+            heapq.heappush(self._asks.setdefault(order.pair, []), (order.price, next(self._seq), order))
+
+    def cancel(self, order_id):
+        """Cancels a resting order. Returns the order, or None if it isn't resting."""
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return None
+        order.status = 'canceled'
+        return order
+
+    def on_mid(self, pair, mid):
+        """
+        Updates the mid for `pair` and fills resting orders the new touch crosses.
+        Returns the number of orders that were completed.
+        """
+        self.mids[pair] = mid
+        completed = 0
+        bids, asks = self._bids.get(pair), self._asks.get(pair)
+        if bids:
+            # A resting buy fills once the ask comes down to its limit
+            ask = self._touch(mid, 'buy')
+            completed += self._cross(bids, lambda key: ask <= -key)
+        if asks:
+            bid = self._touch(mid, 'sell')
+            completed += self._cross(asks, lambda key: bid >= key)
+        return completed
+
+    def _cross(self, heap, crosses):
+        completed = 0
+        while heap:
+            key, _, order = heap[0]
+            if order.status != 'open':
+                heapq.heappop(heap)
+                continue
+            if not crosses(key):
+                break
+            heapq.heappop(heap)
+            amount = self._fillable(order, order.remaining)
+            if amount > 0:
+                self._fill(order, amount, order.price, 'maker')
+            # Reduce-only orders that no longer reduce anything are cancelled
+            order.status = 'closed' if order.filled else 'canceled'
+            self.orders.pop(order.id, None)
+            if self.on_order:
+                self.on_order(order)
+            completed += 1
+        return completed
+
+    def replay(self, ticks):
+        """
+        Feeds recorded data through the engine.
+        ticks: iterable of (pair, mid), oldest first.
+        """
+        for pair, mid in ticks:
+            self.on_mid(pair, mid)
@@ -40,3 +40,4 @@ class TradeXYZ(BaseExchange):
         
     async def close(self):
         await self.exchange.close()
+        await super().close()
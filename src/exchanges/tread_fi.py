@@ -78,16 +78,15 @@ class TreadFi(BaseExchange):
             payload['limit_price'] = str(price)
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=headers) as response:
-                    if response.status in [200, 201]:
-                        data = await response.json()
-                        logger.info(f"Tread.fi Order Submitted: {data}")
-                        return data
-                    else:
-                        text = await response.text()
-                        logger.error(f"Tread.fi Order Failed: {response.status} - {text}")
-                        return None
+            async with self.http_session().post(url, json=payload, headers=headers) as response:
+                if response.status in [200, 201]:
+                    data = await response.json()
+                    logger.info(f"Tread.fi Order Submitted: {data}")
+                    return data
+                else:
+                    text = await response.text()
+                    logger.error(f"Tread.fi Order Failed: {response.status} - {text}")
+                    return None
         except Exception as e:
             logger.error(f"Error executing Tread.fi order: {e}")
             return None
@@ -104,25 +103,24 @@ class TreadFi(BaseExchange):
         
         while True:
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.ws_connect(url) as ws:
-                        logger.info("Connected to Tread.fi WebSocket")
+                async with self.http_session().ws_connect(url) as ws:
+                    logger.info("Connected to Tread.fi WebSocket")
                         
-                        # Subscribe
-                        await ws.send_json({"command": "subscribe", "data_type": "user_orders"})
+                    # Subscribe
+                    await ws.send_json({"command": "subscribe", "data_type": "user_orders"})
                         
-                        # Start Keep-Alive Task
-                        keep_alive_task = asyncio.create_task(self._keep_alive(ws))
+                    # Start Keep-Alive Task
+                    keep_alive_task = asyncio.create_task(self._keep_alive(ws))
                         
-                        async for msg in ws:
-                            if msg.type == aiohttp.WSMsgType.TEXT:
-                                data = msg.json()
-                                await self._handle_ws_message(data)
-                            elif msg.type == aiohttp.WSMsgType.ERROR:
-                                logger.error(f"WebSocket connection closed with exception {ws.exception()}")
-                                break
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            data = msg.json()
+                            await self._handle_ws_message(data)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            logger.error(f"WebSocket connection closed with exception {ws.exception()}")
+                            break
                                 
-                        keep_alive_task.cancel()
+                    keep_alive_task.cancel()
                         
             except Exception as e:
                 logger.error(f"WebSocket connection failed: {e}. Reconnecting in 5s...")
@@ -151,4 +149,4 @@ class TreadFi(BaseExchange):
     async def close(self):
         if self.ws_task:
             self.ws_task.cancel()
-        pass
+        await super().close()
@@ -1,60 +1,252 @@
+import atexit
 import logging
+import multiprocessing
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+import itertools
+import threading
 from collections import deque
+from itertools import islice
 
-# Global log buffer
-log_buffer = deque(maxlen=50)
+
+class LogRing:
+    """
+    Ring buffer of recent log records for the WebUI.
+
+    Every entry gets a monotonically increasing sequence number, so clients can
+    ask for "everything after seq N" and only receive new lines. Since sequence
+    numbers are contiguous, the start of a read is found by arithmetic rather
+    than a scan.
+    """
+
+    def __init__(self, maxlen=5000):
+        self._entries = deque(maxlen=maxlen)
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self.last_seq = 0
+
+    def resize(self, maxlen):
+        with self._lock:
+            self._entries = deque(self._entries, maxlen=maxlen)
+
+    def append(self, record, text):
+        with self._lock:
+            seq = next(self._seq)
+            self._entries.append({
+                'seq': seq,
+                'ts': record.created,
+                'logger': record.name,
+                'level': record.levelname,
+                'levelno': record.levelno,
+                'message': record.getMessage(),
+                'text': text,
+            })
+            self.last_seq = seq
+
+    def read(self, after=0, limit=500, loggers=None, min_level=None):
+        """
+        Entries with seq > `after`, oldest first, at most `limit`.
+        loggers: optional collection of logger names (prefix match on dotted names).
+        min_level: optional level name or number.
+        When more than `limit` entries match, the newest `limit` are returned.
+        """
+        if isinstance(min_level, str):
+            min_level = logging.getLevelName(min_level.upper())
+            if not isinstance(min_level, int):
+                min_level = None
+
+        with self._lock:
+            if not self._entries or after >= self.last_seq:
+                return []
+            first_seq = self._entries[0]['seq']
+            start = max(after - first_seq + 1, 0)
+            if loggers is None and min_level is None:
+                start = max(start, len(self._entries) - limit)
+            entries = list(islice(self._entries, start, None))
+
+        if loggers is not None or min_level is not None:
+            entries = [
+                e for e in entries
+                if (min_level is None or e['levelno'] >= min_level)
+                and (loggers is None or any(e['logger'] == n or e['logger'].startswith(n + '.') for n in loggers))
+            ]
+        return entries[-limit:]
+
+
+# Global log ring (WebUI log tail)
+log_ring = LogRing(maxlen=5000)
 
 class ListHandler(logging.Handler):
     def emit(self, record):
         try:
             msg = self.format(record)
-            log_buffer.append(msg)
+            log_ring.append(record, msg)
         except Exception:
             self.handleError(record)
 
-def setup_logger(name="coffin299", log_level="INFO"):
+
+class _FormatOnce(logging.Formatter):
+    """Formatter shared by all sinks; each record is formatted once and the text reused."""
+
+    def format(self, record):
+        text = getattr(record, '_formatted', None)
+        if text is None:
+            text = record._formatted = super().format(record)
+        return text
+
+
+class _RawQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues the record unformatted. The stock prepare() runs
+    the formatter (timestamp, exception text) on the caller's thread; here only
+    %-style args are merged into the message, so later changes to them can't
+    alter it, and the listener's _FormatOnce does the rest.
+    """
+
+    def prepare(self, record):
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class _Pipeline:
+    """
+    Process-wide logging pipeline: one queue handler on the root logger feeding a
+    background QueueListener that owns the console, file and WebUI sinks. Callers
+    only pay for the level check and an enqueue; formatting and disk writes
+    happen on the listener thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.listener = None
+        self.handlers = []
+        self.worker = False  # True in pool workers, which leave the sinks to the parent
+
+    def install(self, log_dir="logs", max_bytes=10 * 1024 * 1024, backup_count=5):
+        with self._lock:
+            if self.listener is not None or self.worker:
+                return
+            if multiprocessing.parent_process() is not None:
+                # Spawned workers import this module afresh; bot.log belongs to the parent
+                _log_to_stderr()
+                return
+            formatter = _FormatOnce(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
+
+            os.makedirs(log_dir, exist_ok=True)
+            path = os.path.join(log_dir, "bot.log")
+            if sys.platform == 'win32':
+                # Windows can't rename a file another process holds open, so no rotation there
+                file_handler = logging.FileHandler(path, encoding='utf-8', mode='a')
+            else:
+                file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                   encoding='utf-8', delay=True)
+
+            handlers = [logging.StreamHandler(sys.stdout), file_handler, ListHandler()]
+            for handler in handlers:
+                handler.setFormatter(formatter)
+
+            log_queue = queue.SimpleQueue()
+            root = logging.getLogger()
+            for handler in list(root.handlers):
+                if isinstance(handler, QueueHandler):
+                    root.removeHandler(handler)
+            root.addHandler(_RawQueueHandler(log_queue))
+
+            self.handlers = handlers
+            self.listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+            self.listener.start()
+
+    def resize_file(self, max_bytes, backup_count):
+        for handler in self.handlers:
+            if isinstance(handler, RotatingFileHandler):
+                handler.maxBytes = max_bytes
+                handler.backupCount = backup_count
+
+    def stop(self):
+        """Drains the queue and flushes the sinks."""
+        with self._lock:
+            if self.listener is not None and not self.worker:
+                self.listener.stop()
+                for handler in self.handlers:
+                    handler.close()
+            self.listener = None
+
+
+_pipeline = _Pipeline()
+atexit.register(_pipeline.stop)
+
+# Loggers handed out by setup_logger, kept at the configured level. The root
+# logger stays at WARNING so third-party libraries only forward warnings.
+_app_level = logging.INFO
+_app_loggers = {}
+
+
+def _log_to_stderr():
+    """
+    Worker processes (the model pool's) log straight to stderr and leave the
+    file and WebUI sinks to the parent: forked children inherit the queue but
+    not the listener thread, and spawned ones would otherwise open bot.log again.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    if not _pipeline.worker:
+        stderr_handler = logging.StreamHandler(sys.stderr)
+        stderr_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+        root.addHandler(stderr_handler)
+    _pipeline.listener = None
+    _pipeline.handlers = []
+    _pipeline.worker = True
+
+
+def init_worker_logging():
+    """ProcessPoolExecutor initializer: worker logs go to stderr (see _log_to_stderr)."""
+    with _pipeline._lock:
+        _log_to_stderr()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_log_to_stderr)
+
+
+def configure_logging(config):
+    """
+    Applies the top-level logging settings (log_level, log_file, log_buffer_size).
+    Records below log_level are dropped by each logger's cached level check
+    before a LogRecord is even built.
+    """
+    global _app_level
+    file_config = config.get('log_file', {})
+    _pipeline.install()
+    _pipeline.resize_file(file_config.get('max_bytes', 10 * 1024 * 1024), file_config.get('backup_count', 5))
+    log_ring.resize(config.get('log_buffer_size', 5000))
+
+    _app_level = getattr(logging, str(config.get('log_level', 'INFO')).upper(), logging.INFO)
+    for name, explicit in _app_loggers.items():
+        if not explicit:
+            logging.getLogger(name).setLevel(_app_level)
+
+
+def setup_logger(name="coffin299", log_level=None):
     """
-    Sets up a logger with console and file handlers.
+    Returns the named logger, attached to the shared queue-based pipeline.
+    Safe to call any number of times; no per-logger handlers are added.
+    log_level: optional override for this logger (otherwise the configured log_level applies).
     """
+    _pipeline.install()
     logger = logging.getLogger(name)
-    
-    # Convert string level to logging constant
-    level = getattr(logging, log_level.upper(), logging.INFO)
-    logger.setLevel(level)
-    
-    # Formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Console Handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # File Handler
-    log_dir = "logs"
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-        
-    # Use standard FileHandler instead of RotatingFileHandler to avoid Windows permission errors
-    # during rotation while the file is open.
-    file_handler = logging.FileHandler(
-        os.path.join(log_dir, "bot.log"),
-        encoding='utf-8',
-        mode='a'
-    )
-    file_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
-    # List Handler (for WebUI)
-    list_handler = ListHandler()
-    list_handler.setFormatter(formatter)
-    logger.addHandler(list_handler)
-    
+    _app_loggers[name] = bool(log_level) or _app_loggers.get(name, False)
+    if log_level:
+        logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
+    elif not _app_loggers[name]:
+        logger.setLevel(_app_level)
     return logger
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from .logger import setup_logger
+from . import metrics
+
+logger = setup_logger("loop_monitor")
+
+LOOP_LAG = metrics.histogram("event_loop_lag_seconds", "Scheduling delay of the asyncio loop",
+                             buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+LOOP_BLOCKED = metrics.counter("event_loop_blocked_seconds_total",
+                               "Time the loop was blocked past the threshold, by blocking call site", ("site",))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopMonitor:
+    """
+    Measures event loop scheduling lag and names the calls that block it.
+
+    A ticker coroutine sleeps `interval` seconds and records how late it woke
+    up. A watchdog thread notices when the ticker stops ticking for longer than
+    `threshold` and captures the loop thread's stack while it is still stuck,
+    so the report points at the blocking call itself (not at whatever ran
+    after). At most one stack is captured per blocking episode, and stacks are
+    logged at most once per `log_interval` per call site.
+    """
+
+    def __init__(self, interval=0.1, threshold=0.25, log_interval=60, max_sites=50, window=600):
+        self.interval = interval
+        self.threshold = threshold
+        self.log_interval = log_interval
+        self.max_sites = max_sites
+
+        self.lags = deque(maxlen=window)  # Recent lag samples (seconds)
+        self.sites = {}  # {site: {'site', 'count', 'blocked', 'max', 'last_seen', 'stack'}}
+        self._lock = threading.Lock()
+        self._heartbeat = time.monotonic()
+        self._episode = None  # (heartbeat, site, stack) captured by the watchdog for the current stall
+        self._loop_thread = None
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_config(cls, config):
+        monitor_config = config.get('loop_monitor', {})
+        if not monitor_config.get('enabled', True):
+            return None
+        return cls(
+            interval=monitor_config.get('interval_ms', 100) / 1000,
+            threshold=monitor_config.get('threshold_ms', 250) / 1000,
+            log_interval=monitor_config.get('log_interval_seconds', 60),
+        )
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _tick(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            before = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - before - self.interval, 0.0)
+            stalled_since, self._heartbeat = self._heartbeat, time.monotonic()
+            self.lags.append(lag)
+            LOOP_LAG.observe(lag)
+            # Only trust a capture taken during this stall (the watchdog may race a wake-up)
+            episode, self._episode = self._episode, None
+            if lag >= self.threshold:
+                self._end_episode(lag, episode[1:] if episode and episode[0] == stalled_since else None)
+
+    def _watch(self):
+        check_every = max(self.threshold / 4, 0.01)
+        while not self._stopped.wait(check_every):
+            heartbeat = self._heartbeat
+            if time.monotonic() - heartbeat - self.interval >= self.threshold and self._episode is None:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._episode = (heartbeat, *self._describe(frame))
+
+    @staticmethod
+    def _describe(frame):
+        """(site, stack): the innermost project frame of the stack, and the formatted stack."""
+        stack = traceback.extract_stack(frame)
+        # Drop the loop's own frames (run_forever -> Handle._run); keep the callback's stack
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i].filename.endswith(os.path.join('asyncio', 'events.py')):
+                stack = stack[i + 1:] or stack
+                break
+        site = None
+        for entry in reversed(stack):
+            if entry.filename.startswith(PROJECT_ROOT) and not entry.filename.endswith('loop_monitor.py'):
+                site = f"{os.path.relpath(entry.filename, PROJECT_ROOT)}:{entry.lineno} {entry.name}"
+                break
+        leaf = stack[-1]
+        leaf_site = f"{os.path.basename(leaf.filename)}:{leaf.lineno} {leaf.name}"
+        if site is None:
+            site = leaf_site
+        elif not leaf.filename.startswith(PROJECT_ROOT):
+            site = f"{site} -> {leaf_site}"
+        return site, ''.join(traceback.format_list(stack[-20:]))
+
+    def _end_episode(self, lag, episode):
+        site, stack = episode or ('unknown (not caught by the watchdog)', None)
+        now = time.time()
+        with self._lock:
+            entry = self.sites.get(site)
+            if entry is None:
+                if len(self.sites) >= self.max_sites:
+                    # Forget the least recently seen site
+                    self.sites.pop(min(self.sites.values(), key=lambda e: e['last_seen'])['site'])
+                entry = self.sites[site] = {'site': site, 'count': 0, 'blocked': 0.0, 'max': 0.0,
+                                            'last_seen': 0.0, 'last_logged': 0.0, 'stack': None}
+            entry['count'] += 1
+            entry['blocked'] += lag
+            entry['max'] = max(entry['max'], lag)
+            entry['last_seen'] = now
+            entry['stack'] = stack or entry['stack']
+            should_log = now - entry['last_logged'] >= self.log_interval
+            if should_log:
+                entry['last_logged'] = now
+        LOOP_BLOCKED.inc(lag, site)
+
+        if should_log:
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms at {site}"
+                           + (f"\n{stack}" if stack else ""))
+
+    def percentiles(self):
+        if not self.lags:
+            return {}
+        ordered = sorted(self.lags)
+        pick = lambda pct: ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+        return {'p50': pick(0.5), 'p95': pick(0.95), 'p99': pick(0.99), 'max': ordered[-1], 'samples': len(ordered)}
+
+    def snapshot(self, top=10):
+        """Recent lag percentiles (seconds) and the call sites that blocked the loop the longest."""
+        with self._lock:
+            sites = sorted(self.sites.values(), key=lambda e: e['blocked'], reverse=True)[:top]
+            offenders = [{k: v for k, v in e.items() if k != 'last_logged'} for e in sites]
+        return {'threshold': self.threshold, 'lag': self.percentiles(), 'offenders': offenders}
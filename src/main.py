@@ -1,12 +1,15 @@
 import asyncio
 import sys
 import os
+import time
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.config_loader import load_config
-from src.logger import setup_logger
+from src.logger import setup_logger, configure_logging
+from src import metrics, tracing
+from src.loop_monitor import LoopMonitor
 from src.exchanges.trade_xyz import TradeXYZ
 from src.exchanges.hyperliquid import Hyperliquid
 from src.exchanges.tread_fi import TreadFi
@@ -15,13 +18,26 @@ from src.notifications.discord_bot import DiscordNotifier
 
 logger = setup_logger("main")
 
+CYCLE_SECONDS = metrics.histogram("strategy_cycle_seconds", "Duration of one strategy run_cycle", ("strategy",))
+CYCLE_ERRORS = metrics.counter("strategy_cycle_errors_total", "Strategy cycles that raised", ("strategy",))
+
 async def main_loop(strategy):
     logger.info("Starting Main Strategy Loop...")
+    name = type(strategy).__name__
     while True:
+        start = time.perf_counter()
+        # The cycle continues the trace of the latest tick, so orders it places are timed from that tick
+        trace = tracing.Trace('cycle', parent=getattr(strategy.exchange, 'tick_trace', None), strategy=name)
+        if trace.spans:
+            trace.mark('tick_wait', trace.last_end(), start)
         try:
-            await strategy.run_cycle()
+            with tracing.activate(trace):
+                await strategy.run_cycle()
         except Exception as e:
+            CYCLE_ERRORS.inc(1, name)
             logger.error(f"Error in strategy cycle: {e}")
+        CYCLE_SECONDS.observe(time.perf_counter() - start, name)
+        tracing.tracer.finish(trace)
         
         # Sleep for configured interval
         interval = strategy.config['strategy'].get('loop_interval_seconds', 1)
@@ -29,9 +45,22 @@ async def main_loop(strategy):
             logger.info(f"Cycle finished. Waiting {interval}s...")
         await asyncio.sleep(interval) 
 
-async def start_bot():
-    config = load_config()
-    
+class Runtime:
+    """
+    The bot's components, built once per process. The web UI attaches to these
+    (see web.server.create_app) instead of building its own exchange, AI client,
+    Discord session and strategy loop.
+    """
+
+    def __init__(self, config, exchange, ai, notifier, strategy, loop_monitor=None):
+        self.config = config
+        self.exchange = exchange
+        self.ai = ai
+        self.notifier = notifier
+        self.strategy = strategy
+        self.loop_monitor = loop_monitor
+
+def build_runtime(config):
     # Init Exchange
     exchange_name = config.get('active_exchange', 'trade_xyz')
     logger.info(f"Initializing Exchange: {exchange_name}")
@@ -49,21 +78,20 @@ async def start_bot():
     ai = GeminiService(
         api_keys=api_keys,
         model_name=config['ai']['model'],
-        system_prompt=config['ai']['system_prompt']
+        system_prompt=config['ai']['system_prompt'],
+        request_timeout=config['ai'].get('request_timeout_seconds', 30),
+        hedge_percentile=config['ai'].get('hedge_percentile', 0.9),
+        hedge_after_seconds=config['ai'].get('hedge_after_seconds', 8),
+        cooldown_seconds=config['ai'].get('key_cooldown_seconds', 60),
+        requests_per_minute_per_key=config['ai'].get('requests_per_minute_per_key', 10),
+        cache_ttl_seconds=config['ai'].get('cache_ttl_seconds', 300),
+        cache_max_entries=config['ai'].get('cache_max_entries', 128),
+        http_session=exchange.http_session
     )
     
     # Init Discord
     discord_notifier = DiscordNotifier(config)
     
-    # Start Discord Client
-    await discord_notifier.start()
-    
-    # Start Exchange WebSocket if supported
-    if exchange_name == 'tread_fi':
-        asyncio.create_task(exchange.start_websocket())
-    elif exchange_name == 'hyperliquid':
-        asyncio.create_task(exchange.start_websocket())
-    
     # Init Strategy
     strategy_type = config['strategy'].get('type', 'coffin299')
     logger.info(f"Initializing Strategy: {strategy_type}")
@@ -81,10 +109,62 @@ async def start_bot():
         strategy = Coffin299Strategy(config, exchange, ai, discord_notifier)
         logger.info("Started in Standard AI Mode")
     
+    return Runtime(config, exchange, ai, discord_notifier, strategy, loop_monitor=LoopMonitor.from_config(config))
+
+async def serve_webui(runtime):
+    """Runs the dashboard in this process, on the bot's own event loop and components."""
+    import uvicorn
+    from web.server import create_app
+    
+    webui = runtime.config['webui']
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(runtime), host=webui.get('host', '0.0.0.0'), port=webui.get('port', 8088), log_level="warning"
+    ))
+    logger.info(f"Web UI listening on {webui.get('host', '0.0.0.0')}:{webui.get('port', 8088)}")
+    try:
+        await server.serve()
+    except SystemExit:
+        # uvicorn exits when it can't bind; keep trading without the dashboard
+        logger.error("Web UI failed to start; continuing without it.")
+
+async def start_bot(open_browser=False, config=None):
+    config = config or load_config()
+    configure_logging(config)
+    
+    runtime = build_runtime(config)
+    exchange = runtime.exchange
+    
+    # Watch for synchronous calls blocking the event loop
+    if runtime.loop_monitor:
+        runtime.loop_monitor.start()
+    
+    # Start Discord Client
+    await runtime.notifier.start()
+    
+    # Start Exchange WebSocket if supported (the only market data feed in the process)
+    if hasattr(exchange, 'start_websocket'):
+        asyncio.create_task(exchange.start_websocket())
+    
+    # Sample the equity curve in the background
+    asyncio.create_task(exchange.run_equity_sampler())
+    
+    # Embedded dashboard
+    if config['webui'].get('enabled', True):
+        asyncio.create_task(serve_webui(runtime))
+        if open_browser:
+            import webbrowser
+            host = config['webui'].get('host', '0.0.0.0')
+            webbrowser.open(f"http://{'localhost' if host == '0.0.0.0' else host}:{config['webui'].get('port', 8088)}")
+    
     try:
-        await main_loop(strategy)
+        await main_loop(runtime.strategy)
     except KeyboardInterrupt:
         logger.info("Bot stopped by user.")
+    finally:
+        if hasattr(runtime.strategy, 'close'):
+            await runtime.strategy.close()
+        await runtime.ai.close()
+        await exchange.close()
 
 if __name__ == "__main__":
     try:
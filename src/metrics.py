@@ -0,0 +1,182 @@
+import math
+import time
+from bisect import bisect_left
+
+# Default latency buckets (seconds): 1ms .. 60s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally labelled: counter.inc(1, 'label_value', ...)."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # {label values tuple: float}
+
+    def inc(self, amount=1, *labels):
+        # Single dict read + write, no lock: recorded from the event loop thread
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def collect(self):
+        for labels, value in list(self._values.items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Gauge:
+    """
+    Point-in-time value. Either set() explicitly or pass fn, which is called at
+    scrape time (e.g. a queue length), so the hot path records nothing.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, help, labelnames=(), fn=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self._values = {}
+
+    def set(self, value, *labels):
+        self._values[labels] = value
+
+    def collect(self):
+        if self.fn is not None:
+            try:
+                yield self.name, '', self.fn()
+            except Exception:
+                pass
+            return
+        for labels, value in list(self._values.items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: observe() is a bisect plus three in-place updates,
+    cheap enough for per-message and per-cycle timings.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # {label values tuple: [bucket counts..., sum, count]}
+
+    def observe(self, value, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def time(self, *labels):
+        """Context manager observing the duration of its block."""
+        return _Timer(self, labels)
+
+    def snapshot(self, *labels):
+        """{'count', 'sum', 'buckets': [(le, cumulative count)]} for one series, or None."""
+        series = self._series.get(labels)
+        if series is None:
+            return None
+        cumulative, total = [], 0
+        for le, n in zip(self.buckets + (math.inf,), series[:-2]):
+            total += n
+            cumulative.append((le, total))
+        return {'count': series[-1], 'sum': series[-2], 'buckets': cumulative}
+
+    def collect(self):
+        for labels in list(self._series):
+            snap = self.snapshot(*labels)
+            for le, n in snap['buckets']:
+                yield f'{self.name}_bucket', _format_labels(self.labelnames, labels, ('le', _format_value(le))), n
+            yield f'{self.name}_sum', _format_labels(self.labelnames, labels), snap['sum']
+            yield f'{self.name}_count', _format_labels(self.labelnames, labels), snap['count']
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Registry:
+    """Process-wide set of metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, help, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, help, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get_or_create(Counter, name, help, labelnames=labelnames)
+
+    def gauge(self, name, help, labelnames=(), fn=None):
+        metric = self._get_or_create(Gauge, name, help, labelnames=labelnames)
+        if fn is not None:
+            metric.fn = fn
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help, labelnames=labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.collect():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Global registry (exposed at /metrics by the web UI)
+registry = Registry()
+counter = registry.counter
+gauge = registry.gauge
+histogram = registry.histogram
@@ -2,6 +2,7 @@ import discord
 import asyncio
 from datetime import datetime, timedelta
 from ..logger import setup_logger
+from .. import metrics
 
 logger = setup_logger("discord_bot")
 
@@ -23,6 +24,8 @@ class DiscordNotifier:
         self._send_failure_count = 0
         self._circuit_open_until = None
         self._max_buffer_size = config['discord'].get('max_buffer_size', 200)
+        metrics.gauge("discord_queue_depth", "Notifications buffered for the next Discord flush",
+                      fn=lambda: len(self.notification_buffer))
         
         if self.enabled and self.token:
             self._initialize_client()
@@ -302,9 +305,11 @@ class DiscordNotifier:
         # Add to buffer
         self.notification_buffer.append(embed)
 
-    async def notify_balance(self, total_balance, currency="JPY", changes=None, total_pnl_usd=None, total_pnl_jpy=None):
+    async def notify_balance(self, total_balance, currency="JPY", changes=None, total_pnl_usd=None, total_pnl_jpy=None,
+                             realized=None):
         """
         Sends wallet updates to the 'wallet_updates' channel.
+        realized: optional 24h ledger summary ({'net', 'fees', 'turnover', 'fills'}).
         """
         fields = []
         if changes:
@@ -316,6 +321,13 @@ class DiscordNotifier:
         if total_pnl_usd is not None and total_pnl_jpy is not None:
             pnl_color = "🟢" if total_pnl_usd >= 0 else "🔴"
             description += f"\nTotal PnL: {pnl_color} **${total_pnl_usd:,.2f}** (¥{total_pnl_jpy:,.0f})"
+        
+        if realized:
+            realized_color = "🟢" if realized['net'] >= 0 else "🔴"
+            description += (
+                f"\nRealized 24h: {realized_color} **${realized['net']:,.2f}** "
+                f"(fees ${realized['fees']:,.2f}, turnover ${realized['turnover']:,.0f}, {realized['fills']} fills)"
+            )
             
         await self.send_embed(
             channel_key='wallet_updates',
@@ -0,0 +1,171 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from .logger import setup_logger
+
+logger = setup_logger("profiler")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Leaf frames that mean "this thread is waiting, not running": the loop's select, idle executor
+# workers and the log queue listener (blocked in C calls, so the Python caller is the leaf)
+_IDLE_LEAVES = {
+    ('selectors.py', 'select'), ('threading.py', 'wait'), ('queue.py', 'get'),
+    ('thread.py', '_worker'), ('handlers.py', 'dequeue'),
+}
+# GIL switch interval while sampling: the sampler thread has to get the GIL to look at the
+# other threads, and with the default 5ms it would mostly see them right after they released
+# it (i.e. idle in select), hiding short CPU bursts on the loop
+_SAMPLING_SWITCH_INTERVAL = 0.0005
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for the running process.
+
+    While a profile runs, a sampler thread reads every thread's current stack
+    (sys._current_frames) every `interval` seconds; stacks on the event loop
+    thread are prefixed with the asyncio task that was running. Nothing is
+    installed when no profile is running, so it costs nothing when idle.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._labels = {}  # {code object: frame label}
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            if path.startswith(PROJECT_ROOT):
+                path = os.path.relpath(path, PROJECT_ROOT)
+            else:
+                path = os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+            label = self._labels[code] = f"{code.co_name} ({path}:{code.co_firstlineno})"
+        return label
+
+    def _sample(self, seconds, interval, include_idle, loop, loop_thread, stop):
+        stacks = Counter()
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        current_tasks = getattr(asyncio.tasks, '_current_tasks', {})
+        samples = idle = 0
+        deadline = time.perf_counter() + seconds
+
+        while time.perf_counter() < deadline and not stop.is_set():
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES:
+                    idle += 1
+                    if not include_idle:
+                        continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                root = names.get(ident) or f"thread-{ident}"
+                if ident == loop_thread:
+                    task = current_tasks.get(loop)
+                    if task is not None:
+                        root = f"{root};task {task.get_name()} ({getattr(task.get_coro(), '__qualname__', '?')})"
+                stacks[f"{root};{';'.join(reversed(stack))}"] += 1
+            samples += 1
+            stop.wait(interval)
+        return stacks, samples, idle
+
+    @staticmethod
+    def top_functions(stacks, limit=30):
+        """Per-function self (leaf) and total (anywhere on the stack) sample counts."""
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(';')
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+        overall = sum(stacks.values()) or 1
+        ranked = sorted(total_counts, key=lambda f: (self_counts[f], total_counts[f]), reverse=True)[:limit]
+        return [{
+            'function': f,
+            'self': self_counts[f],
+            'total': total_counts[f],
+            'self_pct': round(100 * self_counts[f] / overall, 2),
+            'total_pct': round(100 * total_counts[f] / overall, 2),
+        } for f in ranked]
+
+    @staticmethod
+    def collapsed(stacks):
+        """Brendan Gregg's collapsed-stack format (input for flamegraph.pl / speedscope)."""
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    @staticmethod
+    def task_snapshot():
+        """Where each asyncio task is currently suspended (call from the loop thread)."""
+        tasks = []
+        for task in asyncio.all_tasks():
+            frames = task.get_stack(limit=1)
+            where = f"{os.path.basename(frames[-1].f_code.co_filename)}:{frames[-1].f_lineno}" if frames else None
+            tasks.append({'name': task.get_name(),
+                          'coroutine': getattr(task.get_coro(), '__qualname__', '?'),
+                          'awaiting': where})
+        return sorted(tasks, key=lambda t: t['coroutine'])
+
+    async def profile(self, seconds=10, interval=0.005, include_idle=False, top=30):
+        """
+        Samples the whole process for `seconds` without blocking the loop.
+        Raises ProfilerBusy if a profile is already running.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            loop = asyncio.get_running_loop()
+            loop_thread = threading.get_ident()
+            logger.info(f"Profiling for {seconds}s (every {interval * 1000:.1f}ms)...")
+            # A dedicated thread, so the sampler never occupies (or shows up as) a default executor worker
+            result = loop.create_future()
+            stop = threading.Event()
+
+            def deliver(value, error):
+                if not result.done():
+                    result.set_exception(error) if error else result.set_result(value)
+
+            def run():
+                try:
+                    loop.call_soon_threadsafe(deliver, self._sample(seconds, interval, include_idle, loop,
+                                                                    loop_thread, stop), None)
+                except Exception as e:
+                    loop.call_soon_threadsafe(deliver, None, e)
+
+            switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(min(switch_interval, _SAMPLING_SWITCH_INTERVAL))
+            try:
+                threading.Thread(target=run, name="profiler", daemon=True).start()
+                stacks, samples, idle = await result
+            finally:
+                # Also ends the sampler if the request was cancelled mid-profile
+                stop.set()
+                sys.setswitchinterval(switch_interval)
+        finally:
+            self._lock.release()
+
+        return {
+            'seconds': seconds,
+            'interval': interval,
+            'samples': samples,
+            'stacks': sum(stacks.values()),
+            'idle_stacks': idle,
+            'top': self.top_functions(stacks, limit=top),
+            'tasks': self.task_snapshot(),
+            'collapsed': self.collapsed(stacks),
+        }
+
+
+# Process-wide profiler (one profile at a time)
+profiler = SamplingProfiler()
@@ -1,9 +1,16 @@
 import pandas as pd
 import numpy as np
 import asyncio
+import time
 from datetime import datetime, timedelta, timezone
 from ..logger import setup_logger
+from .. import tracing
 from ..ai.learner import StrategyLearner
+from ..ai.gemini_service import RecommendationSlot
+from ..ai.evaluation import select_hyperparameters
+from ..ai.model_pool import ModelPool
+from ..ai.feature_store import FeatureStore
+from ..ai.market_digest import build_market_digest, serialize_digest
 
 logger = setup_logger("strategy_coffin299")
 
@@ -22,16 +29,82 @@ class Coffin299Strategy:
             self.target_pair = f"ETH/{quote}"
             logger.info(f"Binance Japan Mode: Target Pair set to {self.target_pair}")
             
-        self.last_gemini_poll = datetime.min
         self.last_hourly_report = datetime.utcnow()
         self.gemini_interval = timedelta(minutes=config['ai']['polling_interval_minutes'])
         self.timeframe = config['strategy']['timeframe']
+        self.max_slippage_bps = config['strategy'].get('max_slippage_bps', 0)
         
         # State
         self.current_recommendation = None
-        self.learner = StrategyLearner()
+        # Gemini runs as a background producer; the cycle only reads the latest result
+        self.recommendation = RecommendationSlot()
+        self._applied_recommendation = 0
+        # Recommendations older than two polling intervals are ignored for trading
+        self.recommendation_max_age = self.gemini_interval.total_seconds() * 2
+        learner_config = config['ai'].get('learner', {})
+        self.learner_params = {
+            'n_estimators': learner_config.get('n_estimators', 100),
+            'max_depth': learner_config.get('max_depth'),
+        }
+        self.learner = StrategyLearner(**self.learner_params)
         self.is_learning_active = True # Flag to enable/disable learning
 
+        # Incremental model updates (scheduled on candle closes)
+        self.update_every_candles = int(learner_config.get('update_every_candles', 16))
+        self.update_window = int(learner_config.get('update_window', 500))
+        self.update_trees = int(learner_config.get('update_trees', 10))
+        self._last_candle_ts = None
+        self._closed_since_update = 0
+        self._update_task = None
+
+        # Walk-forward validation / hyperparameter selection before each full training
+        self.walk_forward = learner_config.get('walk_forward', {})
+
+        # Universe summarized for Gemini (1h candles cached between polls)
+        self.universe = config['ai'].get('universe', [])
+        self.digest_cache = timedelta(minutes=config['ai'].get('digest_cache_minutes', 10))
+        self._digest_candles = {} # {symbol: (fetched_at, ohlcv)}
+
+        # Persistent feature store (history is fetched/featurized incrementally)
+        store_config = learner_config.get('feature_store', {})
+        self.feature_store = None
+        if store_config.get('enabled', False):
+            self.feature_store = FeatureStore(store_config.get('path', 'data/features'))
+
+        # Multi-pair model pool (one model per universe pair, trained in worker processes)
+        self.model_pool = None
+        self.pool_predictions = {} # {pair: (action, confidence)} from the latest cycle
+        self._pool_candles = {}    # {pair: (fetched_at, ohlcv)} for the pool pairs not being traded
+        self._pool_task = None
+        pool_config = learner_config.get('pool', {})
+        if pool_config.get('enabled', False):
+            quote = self.target_pair.split('/')[1]
+            pairs = [f"{symbol}/{quote}" for symbol in pool_config.get('universe', self.universe)]
+            if self.target_pair not in pairs:
+                pairs.append(self.target_pair)
+            self.pool_history_days = pool_config.get('history_days', 365)
+            self.pool_signal_refresh = pool_config.get('signal_refresh_seconds', 60)
+            self.model_pool = ModelPool(
+                pairs,
+                params=self.learner_params,
+                max_workers=pool_config.get('max_workers', 2),
+                max_history=pool_config.get('max_history', 20000),
+                refresh_interval=timedelta(hours=pool_config.get('refresh_hours', 6)),
+            )
+            self._pool_task = asyncio.create_task(self.model_pool.run(self._fetch_pool_history))
+
+        self._gemini_task = asyncio.create_task(self.gemini_poll_loop())
+
+    async def close(self):
+        """
+        Stops the background tasks and the model pool's worker processes.
+        """
+        tasks = [t for t in (self._gemini_task, self._pool_task, self._update_task) if t and not t.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.model_pool:
+            self.model_pool.shutdown()
 
     async def run_cycle(self):
         """
@@ -44,14 +117,16 @@ class Coffin299Strategy:
             await self.report_hourly_status()
             self.last_hourly_report = now
         
-        # 1. Poll Gemini if needed
-        if now - self.last_gemini_poll > self.gemini_interval:
-            await self.poll_gemini()
-            self.last_gemini_poll = now
+        # 1. Apply the latest Gemini recommendation (non-blocking)
+        self.apply_recommendation()
             
         # 2. Ensure Model is Trained (Block trading if not)
+        self.use_pooled_model()
         if self.is_learning_active and not self.learner.is_trained:
-            await self.ensure_model_trained(self.target_pair)
+            if self.model_pool and self.target_pair in self.model_pool.pairs:
+                logger.info(f"Waiting for model pool to train {self.target_pair}...")
+            else:
+                await self.ensure_model_trained(self.target_pair)
             
         # 3. Execute Trading Logic on Target Pair
         if not self.is_learning_active or self.learner.is_trained:
@@ -130,51 +205,123 @@ class Coffin299Strategy:
             # Convert PnL to JPY (assuming USD-based exchange)
             # For Hyperliquid/similar, use USD/JPY rate
             try:
-                import aiohttp
-                async with aiohttp.ClientSession() as session:
-                    async with session.get("https://api.exchangerate-api.com/v4/latest/USD") as resp:
-                        if resp.status == 200:
-                            data = await resp.json()
-                            usd_jpy_rate = float(data.get('rates', {}).get('JPY', 150.0))
-                        else:
-                            usd_jpy_rate = 150.0
+                async with self.exchange.http_session().get("https://api.exchangerate-api.com/v4/latest/USD") as resp:
+                    if resp.status == 200:
+                        data = await resp.json()
+                        usd_jpy_rate = float(data.get('rates', {}).get('JPY', 150.0))
+                    else:
+                        usd_jpy_rate = 150.0
             except:
                 usd_jpy_rate = 150.0
             
             total_pnl_jpy = total_pnl_usd * usd_jpy_rate
 
+            # Realized PnL, fees and turnover over the last 24h from the trade ledger
+            realized = await self.exchange.realized_summary()
+
             await self.notifier.notify_balance(
                 total_balance_jpy, 
                 "JPY", 
                 changes,
                 total_pnl_usd=total_pnl_usd,
-                total_pnl_jpy=total_pnl_jpy
+                total_pnl_jpy=total_pnl_jpy,
+                realized=realized
             )
             logger.info(f"Hourly Report Sent. Total: ¥{total_balance_jpy:.0f}, PnL: ${total_pnl_usd:.2f}")
 
         except Exception as e:
             logger.error(f"Failed to send hourly report: {e}")
 
+    async def gemini_poll_loop(self):
+        logger.info(f"Starting Gemini Polling Task (Every {self.gemini_interval.total_seconds() / 60:.0f} mins)...")
+        while True:
+            try:
+                await self.poll_gemini()
+            except Exception as e:
+                logger.error(f"Gemini polling failed: {e}")
+            await asyncio.sleep(self.gemini_interval.total_seconds())
+
     async def poll_gemini(self):
         logger.info("Polling Gemini for strategic direction...")
         
-        # Get market summary (simplified for now, ideally fetch top gainers/losers)
-        # For this demo, we'll just feed it the current target pair's recent data
-        ohlcv = await self.exchange.get_ohlcv(self.target_pair, "1h", limit=24)
-        if not ohlcv:
+        summary = await self.build_market_summary()
+        if not summary:
             logger.warning("No data for Gemini.")
             return
-
-        summary = f"Recent 24h data for {self.target_pair}: {ohlcv[-1]}" # Simplify
         
         decision = await self.ai.analyze_market(summary)
+        self.recommendation.publish(decision)
+
+    def apply_recommendation(self):
+        """
+        Picks up a newly published recommendation (pair switch) without awaiting Gemini.
+        """
+        if self.recommendation.version == self._applied_recommendation:
+            return
+        self._applied_recommendation = self.recommendation.version
+
+        decision = self.recommendation.value
         self.current_recommendation = decision
         
         if decision.get('pair') and decision['pair'] != self.target_pair:
             logger.info(f"Gemini suggests switching to {decision['pair']}")
             self.target_pair = decision['pair']
-            self.learner.is_trained = False # Force retraining on new pair
-            logger.info(f"Switched target pair to {self.target_pair}. Model needs retraining.")
+            self._last_candle_ts = None
+            self._closed_since_update = 0
+
+            if self.use_pooled_model():
+                logger.info(f"Switched target pair to {self.target_pair}. Using pooled model.")
+            else:
+                self.learner = StrategyLearner(**self.learner_params) # Force retraining on new pair
+                logger.info(f"Switched target pair to {self.target_pair}. Model needs retraining.")
+
+    def use_pooled_model(self):
+        """
+        Adopts the pool's current model for the target pair. The pool replaces a
+        pair's learner on every rolling refresh, so this runs every cycle.
+        Returns True when the target pair's model comes from the pool.
+        """
+        pooled = self.model_pool.get(self.target_pair) if self.model_pool else None
+        if pooled is None:
+            return False
+        if pooled is not self.learner:
+            self.learner = pooled
+            self._closed_since_update = 0
+            logger.info(f"Using pooled model for {self.target_pair} (trained {self.model_pool.trained_at[self.target_pair]:%Y-%m-%d %H:%M} UTC).")
+        return True
+
+    async def build_market_summary(self):
+        """
+        Builds a compact universe-wide digest (returns, ATR %, volume z-score, trend)
+        from cached 1h candles. Size is one short line per symbol.
+        """
+        quote = self.target_pair.split('/')[1]
+        symbols = list(dict.fromkeys(self.universe + [self.target_pair.split('/')[0]]))
+
+        now = datetime.utcnow()
+        stale = [s for s in symbols if s not in self._digest_candles or now - self._digest_candles[s][0] > self.digest_cache]
+        results = await asyncio.gather(
+            *(self.exchange.get_ohlcv(f"{s}/{quote}", "1h", limit=48) for s in stale),
+            return_exceptions=True,
+        )
+        for symbol, ohlcv in zip(stale, results):
+            if isinstance(ohlcv, list) and ohlcv:
+                self._digest_candles[symbol] = (now, ohlcv)
+
+        candles = {s: self._digest_candles[s][1] for s in symbols if s in self._digest_candles}
+        digest_symbols, columns, table = build_market_digest(candles)
+        if not digest_symbols:
+            return None
+
+        return (
+            f"Universe digest ({quote} pairs, 1h candles). ret_N = % return over N hours, "
+            f"atr_pct = ATR14 as % of price, vol_z = last-hour volume z-score, trend U/D/F = up/down/flat.\n"
+            f"{serialize_digest(digest_symbols, columns, table)}\n"
+            f"Current pair: {self.target_pair}"
+        )
+
+    async def _fetch_pool_history(self, pair):
+        return await self.fetch_historical_data(pair, days=self.pool_history_days)
 
     async def ensure_model_trained(self, pair):
         """
@@ -182,16 +329,55 @@ class Coffin299Strategy:
         """
         logger.info(f"Initiating training sequence for {pair}...")
         
-        # 1. Fetch Data
-        historical_data = await self.fetch_historical_data(pair, days=365)
-        
-        if not historical_data:
-            logger.error("Failed to fetch historical data. Aborting training.")
-            return
+        # 1. Fetch Data (only candles newer than the feature store when enabled)
+        since = datetime.now(timezone.utc) - timedelta(days=365)
+        since_ts = int(since.timestamp() * 1000)
+        features = None
+
+        if self.feature_store:
+            last_ts = self.feature_store.last_timestamp(pair, self.timeframe)
+            fetch_from = max(since_ts, last_ts + 1) if last_ts is not None else since_ts
+            new_data = await self.fetch_historical_data(pair, since_ts=fetch_from)
+            if new_data:
+                self.feature_store.append(pair, self.timeframe, new_data)
+            features = self.feature_store.feature_matrix(pair, self.timeframe, since_ts=since_ts)
+            historical_data = None
+            if len(features[0]) < 200:
+                logger.error("Not enough stored history to train. Aborting training.")
+                return
+        else:
+            historical_data = await self.fetch_historical_data(pair, since_ts=since_ts)
+            if not historical_data:
+                logger.error("Failed to fetch historical data. Aborting training.")
+                return
 
-        # 2. Train Model (Run in thread pool to avoid blocking N100)
         loop = asyncio.get_running_loop()
-        success = await loop.run_in_executor(None, self.learner.train, historical_data)
+
+        # 2. Walk-forward validation (picks tree count/depth within the CPU budget)
+        accuracy = None
+        if self.walk_forward.get('enabled', False):
+            try:
+                params, report = await loop.run_in_executor(
+                    None,
+                    lambda: select_hyperparameters(
+                        historical_data,
+                        grid=self.walk_forward.get('grid'),
+                        cpu_budget_seconds=self.walk_forward.get('cpu_budget_seconds', 60),
+                        n_splits=self.walk_forward.get('n_splits', 5),
+                        features=features,
+                    ),
+                )
+                self.learner.model.set_params(**params)
+                accuracy = report['accuracy']
+            except Exception as e:
+                logger.error(f"Walk-forward evaluation failed, training with current parameters: {e}")
+
+        # 3. Train Model (Run in thread pool to avoid blocking N100)
+        if features is not None:
+            X, y, _ = features
+            success = await loop.run_in_executor(None, self.learner.train_matrix, X, y)
+        else:
+            success = await loop.run_in_executor(None, self.learner.train, historical_data)
         
         if success:
             logger.info("Model training completed successfully.")
@@ -199,20 +385,57 @@ class Coffin299Strategy:
             # Use specific channel
             await self.notifier.notify_learning_status(
                 f"Training completed on 1 year of historical data ({self.timeframe}).\nReady to trade.",
-                pair
+                pair,
+                accuracy=accuracy
             )
         else:
             logger.error("Model training failed.")
 
-    async def fetch_historical_data(self, pair, days=365):
+    def _on_candle(self, pair, candle_ts):
+        """
+        Tracks the timestamp of the latest (forming) candle. A new timestamp means the
+        previous candle closed; every `update_every_candles` closes an incremental
+        model update is scheduled in the background.
+        """
+        if self._last_candle_ts is None or candle_ts <= self._last_candle_ts:
+            if self._last_candle_ts is None:
+                self._last_candle_ts = candle_ts
+            return
+
+        self._last_candle_ts = candle_ts
+        self._closed_since_update += 1
+
+        if self.update_every_candles <= 0 or not self.learner.is_trained:
+            return
+        if self._closed_since_update < self.update_every_candles:
+            return
+        if self._update_task and not self._update_task.done():
+            return
+
+        self._closed_since_update = 0
+        self._update_task = asyncio.create_task(self.update_model(pair))
+
+    async def update_model(self, pair):
+        """
+        Refits part of the forest on the most recent candles instead of a full retrain.
+        """
+        ohlcv = await self.exchange.get_ohlcv(pair, self.timeframe, limit=self.update_window)
+        if not ohlcv or pair != self.target_pair:
+            return
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.learner.update, ohlcv, self.update_trees)
+
+    async def fetch_historical_data(self, pair, days=365, since_ts=None):
         """
         Fetches historical OHLCV data with pagination.
+        since_ts: start timestamp (ms); overrides `days` when given.
         """
-        logger.info(f"Fetching {days} days of historical data for {pair}...")
-        
         timeframe = self.timeframe # e.g. '1h'
-        since = datetime.now(timezone.utc) - timedelta(days=days)
-        since_ts = int(since.timestamp() * 1000)
+        if since_ts is None:
+            since = datetime.now(timezone.utc) - timedelta(days=days)
+            since_ts = int(since.timestamp() * 1000)
+        logger.info(f"Fetching historical data for {pair} since {datetime.fromtimestamp(since_ts / 1000, timezone.utc):%Y-%m-%d %H:%M}...")
         
         all_ohlcv = []
         limit = 1000 # Try to fetch max allowed
@@ -253,10 +476,58 @@ class Coffin299Strategy:
         logger.info(f"Total candles fetched: {len(all_ohlcv)}")
         return all_ohlcv
 
+    async def fetch_cycle_ohlcv(self, pair):
+        """
+        Recent candles for `pair`, plus cached candles for every other pair with a
+        pooled model when the target pair is scored by the pool. Returns {pair: ohlcv}.
+        Only the stalest other pair is refetched per cycle, and only once its
+        candles are signal_refresh_seconds old, so REST load doesn't grow with the pool.
+        """
+        fetch, others = [pair], []
+        if self.model_pool and self.learner is self.model_pool.get(pair):
+            others = [p for p in self.model_pool.pairs if p != pair and self.model_pool.get(p)]
+            fetched_at = lambda p: self._pool_candles.get(p, (0.0, None))[0]
+            stalest = min(others, key=fetched_at, default=None)
+            if stalest and time.time() - fetched_at(stalest) >= self.pool_signal_refresh:
+                fetch.append(stalest)
+
+        results = await asyncio.gather(
+            *(self.exchange.get_ohlcv(p, self.timeframe, limit=50) for p in fetch),
+            return_exceptions=True,
+        )
+        candles = {}
+        for p, ohlcv in zip(fetch, results):
+            if isinstance(ohlcv, list) and ohlcv:
+                candles[p] = ohlcv
+                if p != pair:
+                    self._pool_candles[p] = (time.time(), ohlcv)
+        for p in others:
+            if p not in candles and p in self._pool_candles:
+                candles[p] = self._pool_candles[p][1]
+        return candles
+
+    def predict(self, pair, candles):
+        """
+        ML signal for `pair`. With the model pool, every fetched pair is scored in
+        one predict_all call and the scores are kept in pool_predictions.
+        """
+        if self.model_pool and self.learner is self.model_pool.get(pair):
+            self.pool_predictions = self.model_pool.predict_all(candles)
+            signals = [f"{p} {a} {c:.2f}" for p, (a, c) in self.pool_predictions.items() if p != pair and a != "HOLD"]
+            if signals:
+                logger.info(f"Pool signals: {', '.join(signals)}")
+            return self.pool_predictions.get(pair, ("HOLD", 0.0))
+        return self.learner.predict(candles[pair])
+
     async def execute_trading_logic(self, pair):
-        ohlcv = await self.exchange.get_ohlcv(pair, self.timeframe, limit=50)
+        with tracing.span('market_data', pair=pair):
+            candles = await self.fetch_cycle_ohlcv(pair)
+        ohlcv = candles.get(pair)
         if not ohlcv:
             return
+        decision_start = time.perf_counter()
+
+        self._on_candle(pair, ohlcv[-1][0])
 
         df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         
@@ -276,10 +547,12 @@ class Coffin299Strategy:
         action = "HOLD"
         reason = ""
         
-        gemini_action = self.current_recommendation.get('action') if self.current_recommendation else "HOLD"
+        gemini_action = "HOLD"
+        if self.current_recommendation and self.recommendation.is_fresh(self.recommendation_max_age):
+            gemini_action = self.current_recommendation.get('action', "HOLD")
         
         # Get ML Prediction
-        ml_action, ml_conf = self.learner.predict(df)
+        ml_action, ml_conf = self.predict(pair, candles)
         logger.info(f"ML Prediction: {ml_action} ({ml_conf:.2f})")
         
         # Combined Logic
@@ -305,6 +578,7 @@ class Coffin299Strategy:
             elif current_rsi > 70 or gemini_action == "SELL":
                 action = "SELL"
                 reason = f"RSI {current_rsi:.2f} > 70 or Gemini SELL"
+        tracing.mark('decision', decision_start, action=action)
             
         if action == "BUY":
             # Check max open positions
@@ -320,6 +594,10 @@ class Coffin299Strategy:
             # This needs proper balance checking logic
             try:
                 amount = 0.001 # Mock amount
+                with tracing.span('risk_check'):
+                    liquid = await self._check_liquidity(pair, 'buy', amount)
+                if not liquid:
+                    return
                 order = await self.exchange.create_order(pair, 'market', 'buy', amount, current_price)
                 if order:
                     # Calculate JPY value
@@ -334,6 +612,10 @@ class Coffin299Strategy:
             try:
                 amount = 0.001 # Mock amount
                 # TODO: Check actual balance of the asset before selling
+                with tracing.span('risk_check'):
+                    liquid = await self._check_liquidity(pair, 'sell', amount)
+                if not liquid:
+                    return
                 
                 order = await self.exchange.create_order(pair, 'market', 'sell', amount, current_price)
                 if order:
@@ -343,6 +625,28 @@ class Coffin299Strategy:
             except Exception as e:
                 logger.error(f"SELL Order Failed: {e}")
 
+    async def _check_liquidity(self, pair, side, amount):
+        """
+        Returns False if the mirrored order book says a market order of `amount`
+        would slip more than max_slippage_bps. Passes when no book is available.
+        """
+        if hasattr(self.exchange, 'watch_order_book'):
+            await self.exchange.watch_order_book(pair)
+        if self.max_slippage_bps <= 0 or not hasattr(self.exchange, 'get_order_book'):
+            return True
+        book = self.exchange.get_order_book(pair)
+        if book is None:
+            return True
+
+        slippage = book.slippage_bps(side, amount)
+        if slippage is None:
+            logger.info(f"Skipping {side.upper()} {amount} {pair}: visible book too thin")
+            return False
+        if slippage > self.max_slippage_bps:
+            logger.info(f"Skipping {side.upper()} {amount} {pair}: est. slippage {slippage:.1f}bps > {self.max_slippage_bps}bps")
+            return False
+        return True
+
     async def _calculate_jpy_value(self, pair, amount, price):
         """
         Calculates the JPY value of a trade.
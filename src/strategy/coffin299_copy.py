@@ -1,7 +1,8 @@
 import asyncio
-import aiohttp
+import time
 from datetime import datetime, timedelta
 from ..logger import setup_logger
+from .. import tracing
 
 logger = setup_logger("strategy_copy")
 
@@ -67,7 +68,8 @@ class Coffin299CopyStrategy:
             logger.info(f"Using leaderboard #1: {target_trader}")
         
         # Get target trader's positions
-        target_positions = await self.exchange.get_user_positions(target_trader)
+        with tracing.span('target_fetch', traders=1):
+            target_positions = await self.exchange.get_user_positions(target_trader)
         logger.info(f"🔍 Target trader has {len(target_positions)} positions")
         for pos in target_positions:
             logger.info(f"  - {pos['symbol']}: {pos['side']} size={pos.get('size', 0)}")
@@ -125,7 +127,8 @@ class Coffin299CopyStrategy:
         aggregate_positions = {} # { 'ETH': {'LONG': 0, 'SHORT': 0} }
         
         for address in self.top_traders:
-            positions = await self.exchange.get_user_positions(address)
+            with tracing.span('target_fetch', traders=1):
+                positions = await self.exchange.get_user_positions(address)
             for pos in positions:
                 symbol = pos['symbol']
                 side = pos['side']
@@ -195,6 +198,7 @@ class Coffin299CopyStrategy:
 
     async def execute_copy_trade(self, symbol, side, reason, price=None, close_position=False):
         pair = f"{symbol}/USDC"
+        risk_start = time.perf_counter()
         
         # 1. Safety Margin Check
         safety_buffer_pct = self.config['strategy'].get('copy_trading', {}).get('safety_margin_buffer', 0.0)
@@ -233,6 +237,7 @@ class Coffin299CopyStrategy:
 
         # If this is an explicit close request (target trader closed position), just close and exit
         if close_position:
+            tracing.mark('risk_check', risk_start, pair=pair)
             if not my_pos or my_pos['size'] <= 0:
                 logger.info(f"No existing position to close for {pair}, skipping close.")
                 return
@@ -278,6 +283,7 @@ class Coffin299CopyStrategy:
         if not price or price <= 0:
             logger.warning(f"Invalid price for {pair}, skipping trade.")
             return
+        tracing.mark('risk_check', risk_start, pair=pair)
 
         order_side = 'buy' if side == 'BUY' else 'sell'
 
@@ -390,6 +396,9 @@ class Coffin299CopyStrategy:
             
             logger.info(f"PnL: ${total_pnl_usd:.2f} (¥{total_pnl_jpy:.0f}), Positions: {len(positions)}")
             
+            # Realized PnL, fees and turnover over the last 24h from the trade ledger
+            realized = await self.exchange.realized_summary()
+            
             # Send notification
             try:
                 await self.notifier.notify_balance(
@@ -397,7 +406,8 @@ class Coffin299CopyStrategy:
                     currency="JPY", 
                     changes=pos_summary,
                     total_pnl_usd=total_pnl_usd,
-                    total_pnl_jpy=total_pnl_jpy
+                    total_pnl_jpy=total_pnl_jpy,
+                    realized=realized
                 )
                 logger.info(f"🟢 Sent Periodic Report. Total: ${total_usd:.2f} (¥{total_jpy:.0f}), PnL: ${total_pnl_usd:.2f}")
             except Exception as e:
@@ -412,18 +422,17 @@ class Coffin299CopyStrategy:
         
         while True:
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url) as resp:
-                        if resp.status == 200:
-                            data = await resp.json()
-                            rate = data.get('rates', {}).get('JPY')
-                            if rate:
-                                self.jpy_rate = float(rate)
-                                logger.info(f"Updated USD/JPY Rate: {self.jpy_rate}")
-                            else:
-                                logger.warning("JPY rate not found in API response")
+                async with self.exchange.http_session().get(url) as resp:
+                    if resp.status == 200:
+                        data = await resp.json()
+                        rate = data.get('rates', {}).get('JPY')
+                        if rate:
+                            self.jpy_rate = float(rate)
+                            logger.info(f"Updated USD/JPY Rate: {self.jpy_rate}")
                         else:
-                            logger.warning(f"Failed to fetch exchange rate: {resp.status}")
+                            logger.warning("JPY rate not found in API response")
+                    else:
+                        logger.warning(f"Failed to fetch exchange rate: {resp.status}")
             except Exception as e:
                 logger.error(f"Error fetching exchange rate: {e}")
                 
@@ -485,6 +494,9 @@ class Coffin299CopyStrategy:
             
             logger.info(f"PnL: ${total_pnl_usd:.2f} (¥{total_pnl_jpy:.0f}), Positions: {len(positions)}")
             
+            # Realized PnL, fees and turnover over the last 24h from the trade ledger
+            realized = await self.exchange.realized_summary()
+            
             # Send notification
             try:
                 await self.notifier.notify_balance(
@@ -492,7 +504,8 @@ class Coffin299CopyStrategy:
                     currency="JPY", 
                     changes=pos_summary,
                     total_pnl_usd=total_pnl_usd,
-                    total_pnl_jpy=total_pnl_jpy
+                    total_pnl_jpy=total_pnl_jpy,
+                    realized=realized
                 )
                 logger.info(f"🟢 Sent Periodic Report. Total: ${total_usd:.2f} (¥{total_jpy:.0f}), PnL: ${total_pnl_usd:.2f}")
             except Exception as e:
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import asyncio
+import time
 from datetime import datetime, timedelta
 from ..logger import setup_logger
 
@@ -46,6 +47,7 @@ class Coffin299GPT51Strategy:
 
         self.base_symbol = config['strategy'].get('gpt51_base', 'ETH')
         self.start_base_equiv = None
+        self.started_at = time.time()
         self.max_drawdown_pct = config['strategy'].get('gpt51_max_drawdown_pct', 0.5)
 
         # Aggressiveness controls
@@ -95,15 +97,12 @@ class Coffin299GPT51Strategy:
             total_usd = float(balance.get('total', {}).get('USDC', 0))
 
             try:
-                import aiohttp
-
-                async with aiohttp.ClientSession() as session:
-                    async with session.get("https://api.exchangerate-api.com/v4/latest/USD") as resp:
-                        if resp.status == 200:
-                            data = await resp.json()
-                            usd_jpy = float(data.get('rates', {}).get('JPY', 150.0))
-                        else:
-                            usd_jpy = 150.0
+                async with self.exchange.http_session().get("https://api.exchangerate-api.com/v4/latest/USD") as resp:
+                    if resp.status == 200:
+                        data = await resp.json()
+                        usd_jpy = float(data.get('rates', {}).get('JPY', 150.0))
+                    else:
+                        usd_jpy = 150.0
             except Exception:
                 usd_jpy = 150.0
 
@@ -127,6 +126,8 @@ class Coffin299GPT51Strategy:
             equity_usd = total_usd + total_pnl_usd if is_paper else total_usd
             total_jpy = equity_usd * usd_jpy
             total_pnl_jpy = total_pnl_usd * usd_jpy
+            # Realized PnL, fees and turnover over the last 24h from the trade ledger
+            realized = await self.exchange.realized_summary()
 
             await self.notifier.notify_balance(
                 total_jpy,
@@ -134,6 +135,7 @@ class Coffin299GPT51Strategy:
                 changes,
                 total_pnl_usd=total_pnl_usd,
                 total_pnl_jpy=total_pnl_jpy,
+                realized=realized,
             )
 
             logger.info(
@@ -162,25 +164,11 @@ class Coffin299GPT51Strategy:
         if not ohlcv or len(ohlcv) < 100:
             return
 
-        df = pd.DataFrame(ohlcv, columns=["timestamp", "open", "high", "low", "close", "volume"])
-        df["close"] = df["close"].astype(float)
-        df["high"] = df["high"].astype(float)
-        df["low"] = df["low"].astype(float)
-
-        df["ema_fast"] = df["close"].ewm(span=21, adjust=False).mean()
-        df["ema_slow"] = df["close"].ewm(span=55, adjust=False).mean()
-
-        high_low = df["high"] - df["low"]
-        high_close = (df["high"] - df["close"].shift()).abs()
-        low_close = (df["low"] - df["close"].shift()).abs()
-        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        df["atr"] = tr.rolling(window=14).mean()
-
-        current = df.iloc[-1]
-        price = float(current["close"])
-        ema_fast = float(current["ema_fast"])
-        ema_slow = float(current["ema_slow"])
-        atr = float(current["atr"])
+        indicators = self.calculate_indicators(ohlcv)
+        price = indicators["price"]
+        ema_fast = indicators["ema_fast"]
+        ema_slow = indicators["ema_slow"]
+        atr = indicators["atr"]
 
         if np.isnan(atr) or atr <= 0:
             return
@@ -188,10 +176,8 @@ class Coffin299GPT51Strategy:
         up_trend = price > ema_slow and ema_fast > ema_slow
         down_trend = price < ema_slow and ema_fast < ema_slow
 
-        lookback = max(5, self.breakout_lookback)
-        recent = df.iloc[-lookback:]
-        breakout_long = up_trend and price >= recent["high"].max()
-        breakout_short = down_trend and price <= recent["low"].min()
+        breakout_long = up_trend and price >= indicators["recent_high"]
+        breakout_short = down_trend and price <= indicators["recent_low"]
 
         positions = []
         if hasattr(self.exchange, "get_positions"):
@@ -255,8 +241,13 @@ class Coffin299GPT51Strategy:
         if not breakout_long and not breakout_short:
             return
 
-        balance = await self.exchange.get_balance()
-        total_usd = float(balance.get("total", {}).get("USDC", 0))
+        # The sampled equity curve (includes unrealized PnL) saves a balance request per entry
+        equity = self._latest_equity()
+        if equity is not None:
+            total_usd = equity
+        else:
+            balance = await self.exchange.get_balance()
+            total_usd = float(balance.get("total", {}).get("USDC", 0))
         if total_usd <= 0:
             return
 
@@ -301,22 +292,76 @@ class Coffin299GPT51Strategy:
         prev = self._entry_counts.get(key, 0)
         self._entry_counts[key] = prev + 1
 
+    def calculate_indicators(self, ohlcv):
+        """
+        Indicators on the latest candle: close, EMA 21/55, ATR 14 and the
+        high/low of the last `breakout_lookback` candles.
+        """
+        df = pd.DataFrame(ohlcv, columns=["timestamp", "open", "high", "low", "close", "volume"])
+        df["close"] = df["close"].astype(float)
+        df["high"] = df["high"].astype(float)
+        df["low"] = df["low"].astype(float)
+
+        df["ema_fast"] = df["close"].ewm(span=21, adjust=False).mean()
+        df["ema_slow"] = df["close"].ewm(span=55, adjust=False).mean()
+
+        high_low = df["high"] - df["low"]
+        high_close = (df["high"] - df["close"].shift()).abs()
+        low_close = (df["low"] - df["close"].shift()).abs()
+        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+        df["atr"] = tr.rolling(window=14).mean()
+
+        current = df.iloc[-1]
+        lookback = max(5, self.breakout_lookback)
+        recent = df.iloc[-lookback:]
+        return {
+            "price": float(current["close"]),
+            "ema_fast": float(current["ema_fast"]),
+            "ema_slow": float(current["ema_slow"]),
+            "atr": float(current["atr"]),
+            "recent_high": float(recent["high"].max()),
+            "recent_low": float(recent["low"].min()),
+        }
+
+    def _latest_equity(self):
+        """Latest equity sample from the exchange's equity store, or None if disabled or stale."""
+        store = getattr(self.exchange, 'equity_store', None)
+        if not store:
+            return None
+        latest = store.latest(max_age=store.sample_seconds * 3)
+        if latest and latest['equity'] > 0:
+            return latest['equity']
+        return None
+
     async def _can_open_new_trade(self, total_usd):
+        """
+        Drawdown guard. While the equity store has fresh samples, it checks the
+        store's drawdown from the peak since start; otherwise (store disabled, or
+        the sampler stalled) it falls back to the ETH-equivalent value of the live
+        balance against the starting one.
+        """
+        if self.max_drawdown_pct <= 0:
+            return True
+
         try:
-            base_pair = f"{self.base_symbol}/USDC"
-            base_price = await self.exchange.get_market_price(base_pair)
-            if not base_price or base_price <= 0:
+            drawdown = self._store_drawdown()
+            if drawdown is not None:
+                if drawdown['drawdown'] >= self.max_drawdown_pct:
+                    logger.warning(
+                        f"Equity drawdown above limit in GPT5.1. drawdown={drawdown['drawdown']:.2%}, "
+                        f"peak={drawdown['peak']:.2f}, current={drawdown['current']:.2f}"
+                    )
+                    return False
                 return True
 
-            current_base_equiv = total_usd / base_price
-
+            # Baseline and current both come from the balance, never mixed with store equity
+            current_base_equiv = await self._base_equivalent(total_usd)
+            if current_base_equiv is None:
+                return True
             if self.start_base_equiv is None:
                 self.start_base_equiv = current_base_equiv
                 return True
 
-            if self.max_drawdown_pct <= 0:
-                return True
-
             min_base = self.start_base_equiv * (1.0 - self.max_drawdown_pct)
             if current_base_equiv < min_base:
                 logger.warning(
@@ -329,6 +374,19 @@ class Coffin299GPT51Strategy:
             logger.warning(f"Failed to evaluate drawdown guard in GPT5.1: {e}")
             return True
 
+    def _store_drawdown(self):
+        """EquityStore.drawdown since start, or None if the store is disabled or has no fresh sample."""
+        if self._latest_equity() is None:
+            return None
+        return self.exchange.equity_store.drawdown(since=self.started_at)
+
+    async def _base_equivalent(self, total_usd):
+        """`total_usd` in units of the base symbol (ETH), or None without a price."""
+        base_price = await self.exchange.get_market_price(f"{self.base_symbol}/USDC")
+        if not base_price or base_price <= 0:
+            return None
+        return total_usd / base_price
+
     async def _calculate_jpy_value(self, pair, amount, price):
         try:
             base, quote = pair.split("/")
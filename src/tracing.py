@@ -0,0 +1,198 @@
+import itertools
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from . import metrics
+
+STAGE_SECONDS = metrics.histogram(
+    "trace_stage_seconds", "Duration of each tick-to-trade pipeline stage", ("stage",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+TICK_TO_TRADE = metrics.histogram(
+    "tick_to_trade_seconds", "From the triggering market data to the exchange acknowledging our order", ("trace",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+TICK_TO_FILL = metrics.histogram(
+    "tick_to_fill_seconds", "From the triggering market data to the first fill event", ("trace",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+
+_ids = itertools.count(1)
+_current = ContextVar('trace', default=None)
+_NULL = nullcontext()
+
+
+class Trace:
+    """
+    One pass through the pipeline (e.g. WS tick -> cache -> decision -> risk
+    checks -> order -> ack -> fill), identified by `id`. Spans are plain tuples
+    of perf_counter times; `origin` is when the triggering data arrived.
+
+    parent: an earlier trace whose spans and origin this one continues (a
+    strategy cycle continuing the tick it acts on).
+    """
+
+    __slots__ = ('id', 'name', 'origin', 'wall', 'attrs', 'spans', 'orders')
+
+    def __init__(self, name, origin=None, parent=None, **attrs):
+        self.id = next(_ids)
+        self.name = name
+        self.attrs = attrs
+        self.orders = 0
+        if parent is not None:
+            self.origin, self.wall = parent.origin, parent.wall
+            self.spans = list(parent.spans)
+            self.attrs = {**parent.attrs, **attrs}
+        else:
+            now = time.perf_counter()
+            self.origin = origin if origin is not None else now
+            self.wall = time.time() - (now - self.origin)
+            self.spans = []
+
+    def mark(self, stage, start, end=None, **attrs):
+        """Records a stage that ran from `start` to `end` (perf_counter; default now)."""
+        end = end if end is not None else time.perf_counter()
+        self.spans.append((stage, start, end, attrs))
+        STAGE_SECONDS.observe(end - start, stage)
+
+    @contextmanager
+    def span(self, stage, **attrs):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.mark(stage, start, **attrs)
+
+    def last_end(self):
+        return self.spans[-1][2] if self.spans else self.origin
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'start': self.wall,
+            'attrs': self.attrs,
+            'spans': [{'stage': stage, 'start_ms': (start - self.origin) * 1000, 'duration_ms': (end - start) * 1000,
+                       **attrs} for stage, start, end, attrs in self.spans],
+        }
+
+
+class Tracer:
+    """
+    Keeps the traces that led to orders (the interesting ones) and links order
+    ids to their trace so the fill event can close it.
+    """
+
+    def __init__(self, keep=500):
+        self.completed = deque(maxlen=keep)
+        self._by_order = {}     # {order_id: Trace} awaiting a fill
+        self._early_fills = {}  # {order_id: perf_counter} fills seen before their order was bound
+
+    def finish(self, trace):
+        """Ends a trace. Traces without orders only contribute their stage timings."""
+        if trace is None or not trace.orders:
+            return
+        ack = next((end for stage, _, end, _ in reversed(trace.spans) if stage == 'exchange_ack'), None)
+        if ack is not None:
+            TICK_TO_TRADE.observe(ack - trace.origin, trace.name)
+        self.completed.append(trace)
+
+    def bind_order(self, order_id, trace=None):
+        """
+        Counts an order on its trace and links the id so its fill event can find
+        the trace. Orders whose fill was already seen (paper orders fill during
+        submission, live fills can beat the REST ack) are not left waiting.
+        """
+        trace = trace or _current.get()
+        if trace is None or order_id is None:
+            return
+        order_id = str(order_id)
+        trace.orders += 1
+        if order_id in self._fills(trace):
+            return
+        filled_at = self._early_fills.pop(order_id, None)
+        if filled_at is not None:
+            self._mark_fill(trace, order_id, filled_at)
+            return
+        self._by_order[order_id] = trace
+        if len(self._by_order) > 1000:
+            self._by_order.pop(next(iter(self._by_order)))
+
+    def on_fill(self, order_id):
+        """
+        Marks the first fill of `order_id` on its trace (or on the active trace
+        for fills that happen while the order is being submitted).
+        """
+        order_id = str(order_id)
+        now = time.perf_counter()
+        trace = self._by_order.pop(order_id, None) or _current.get()
+        if trace is None:
+            # The order may not be bound yet; bind_order picks this up
+            self._early_fills[order_id] = now
+            if len(self._early_fills) > 1000:
+                self._early_fills.pop(next(iter(self._early_fills)))
+            return
+        self._mark_fill(trace, order_id, now)
+
+    @staticmethod
+    def _fills(trace):
+        return [attrs.get('order_id') for stage, _, _, attrs in trace.spans if stage == 'fill']
+
+    def _mark_fill(self, trace, order_id, at):
+        fills = self._fills(trace)
+        if order_id in fills:
+            return
+        if not fills:
+            TICK_TO_FILL.observe(at - trace.origin, trace.name)
+        trace.mark('fill', min(trace.last_end(), at), at, order_id=order_id)
+
+    def recent(self, limit=50):
+        return [t.to_dict() for t in list(self.completed)[-limit:]]
+
+    def export_chrome(self, limit=None):
+        """
+        Completed traces in the Chrome trace event format (load in
+        chrome://tracing or ui.perfetto.dev): one row per trace, one slice per stage.
+        """
+        traces = list(self.completed)[-limit:] if limit else list(self.completed)
+        events = []
+        for trace in traces:
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': trace.id,
+                           'args': {'name': f"{trace.name} #{trace.id}"}})
+            for stage, start, end, attrs in trace.spans:
+                events.append({
+                    'name': stage, 'cat': trace.name, 'ph': 'X', 'pid': 1, 'tid': trace.id,
+                    'ts': (trace.wall + (start - trace.origin)) * 1e6,
+                    'dur': (end - start) * 1e6,
+                    'args': {**trace.attrs, **attrs},
+                })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+# Global tracer
+tracer = Tracer()
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def activate(trace):
+    """Makes `trace` the current trace for the enclosed code (and tasks it awaits)."""
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+def span(stage, **attrs):
+    """Context manager timing `stage` on the current trace; a no-op outside a trace."""
+    trace = _current.get()
+    return trace.span(stage, **attrs) if trace is not None else _NULL
+
+
+def mark(stage, start, end=None, **attrs):
+    """Records a stage on the current trace from a start time taken earlier (perf_counter)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.mark(stage, start, end, **attrs)
@@ -0,0 +1,21 @@
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def pytest_configure(config):
+    # src modules create logs/ and their databases relative to the working
+    # directory at import time; keep them out of the checkout
+    config._scratch_dir = tempfile.mkdtemp(prefix="coffin299-tests-")
+    config._old_cwd = os.getcwd()
+    os.chdir(config._scratch_dir)
+
+
+def pytest_unconfigure(config):
+    os.chdir(config._old_cwd)
+    shutil.rmtree(config._scratch_dir, ignore_errors=True)
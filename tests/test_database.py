@@ -0,0 +1,121 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src.database import PositionDB, _WriteBehindDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    # Long interval: the background writer stays out of the way unless a test flushes
+    db = PositionDB(str(tmp_path / "positions.db"), flush_interval=60)
+    yield db
+    db.close()
+
+
+def rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {r[0]: (r[1], r[2]) for r in conn.execute("SELECT symbol, amount, entry_price FROM paper_positions")}
+    finally:
+        conn.close()
+
+
+def test_hooks_are_abstract():
+    with pytest.raises(TypeError):
+        _WriteBehindDB(":memory:")
+
+
+def test_writes_are_queued_until_flush(db):
+    db.save_position("ETH/USDC", 1.0, 3000.0)
+    assert rows(db.db_path) == {}
+    assert db.flush() == 1
+    assert rows(db.db_path) == {"ETH/USDC": (1.0, 3000.0)}
+    assert db.flush() == 0
+
+
+def test_updates_coalesce_to_latest_state(db):
+    for amount in (1.0, 2.0, 3.0):
+        db.save_position("ETH/USDC", amount, 3000.0 + amount)
+    db.save_position("BTC/USDC", 0.1, 60000.0)
+    assert db.flush() == 2
+    assert rows(db.db_path) == {"ETH/USDC": (3.0, 3003.0), "BTC/USDC": (0.1, 60000.0)}
+
+    db.save_position("BTC/USDC", 0, 0)
+    db.flush()
+    assert rows(db.db_path) == {"ETH/USDC": (3.0, 3003.0)}
+
+
+def test_load_positions_sees_queued_writes_without_flushing(db):
+    db.save_position("ETH/USDC", 1.0, 3000.0)
+    db.flush()
+    db.save_position("ETH/USDC", 0, 0)
+    db.save_position("SOL/USDC", 5.0, 150.0)
+
+    assert db.load_positions() == {"SOL/USDC": {'amount': 5.0, 'entry_price': 150.0}}
+    # Reading didn't write anything
+    assert rows(db.db_path) == {"ETH/USDC": (1.0, 3000.0)}
+
+
+def test_concurrent_flushes_commit_in_queue_order(db):
+    # Many writers and flushers racing: the final row must be the last state queued
+    symbol = "ETH/USDC"
+    last = []
+    lock = threading.Lock()
+
+    def writer():
+        for _ in range(200):
+            with lock:
+                amount = len(last) + 1.0
+                last.append(amount)
+                db.save_position(symbol, amount, 1.0)
+            db.flush()
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    db.flush()
+    assert rows(db.db_path)[symbol][0] == last[-1] == 800.0
+
+
+def test_failed_flush_is_requeued(db):
+    db.save_position("ETH/USDC", 1.0, 3000.0)
+    with db._db_lock:
+        db._conn.execute("DROP TABLE paper_positions")
+    assert db.flush() == 0
+    assert db._pending == {"ETH/USDC": (1.0, 3000.0)}
+
+    with db._db_lock:
+        db._create_schema(db._conn.cursor())
+    db.save_position("BTC/USDC", 0.1, 60000.0)
+    assert db.flush() == 2
+
+
+def test_close_flushes_and_survives_restart(tmp_path):
+    path = str(tmp_path / "positions.db")
+    db = PositionDB(path, flush_interval=60)
+    db.save_position("ETH/USDC", 2.0, 3100.0)
+    db.close()
+    db.close()
+
+    reopened = PositionDB(path, flush_interval=60)
+    try:
+        assert reopened.load_positions() == {"ETH/USDC": {'amount': 2.0, 'entry_price': 3100.0}}
+    finally:
+        reopened.close()
+
+
+def test_background_writer_flushes(tmp_path):
+    db = PositionDB(str(tmp_path / "positions.db"), flush_interval=0.01)
+    try:
+        db.save_position("ETH/USDC", 1.0, 3000.0)
+        for _ in range(200):
+            if rows(db.db_path):
+                break
+            threading.Event().wait(0.01)
+        assert rows(db.db_path) == {"ETH/USDC": (1.0, 3000.0)}
+    finally:
+        db.close()
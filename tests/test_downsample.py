@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from src.downsample import downsample, lttb, minmax, ohlc_buckets
+
+
+def series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=np.float64), np.cumsum(rng.normal(size=n))
+
+
+@pytest.mark.parametrize("fn", [lttb, minmax])
+@pytest.mark.parametrize("n", [0, 1, 2, 5])
+def test_short_series_are_kept_whole(fn, n):
+    x, y = series(n)
+    np.testing.assert_array_equal(fn(x, y, 10), np.arange(n))
+
+
+@pytest.mark.parametrize("fn", [lttb, minmax])
+def test_n_out_at_least_n_keeps_everything(fn):
+    x, y = series(100)
+    np.testing.assert_array_equal(fn(x, y, 100), np.arange(100))
+    np.testing.assert_array_equal(fn(x, y, 1000), np.arange(100))
+
+
+def test_lttb_below_three_points_keeps_everything():
+    x, y = series(100)
+    np.testing.assert_array_equal(lttb(x, y, 2), np.arange(100))
+
+
+def test_minmax_below_one_bucket_keeps_everything():
+    x, y = series(100)
+    np.testing.assert_array_equal(minmax(x, y, 1), np.arange(100))
+
+
+@pytest.mark.parametrize("n, n_out", [(10, 3), (10, 9), (1000, 100), (1001, 7), (5000, 4999)])
+def test_lttb_indices(n, n_out):
+    x, y = series(n)
+    kept = lttb(x, y, n_out)
+    assert len(kept) == n_out
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert (np.diff(kept) > 0).all()
+
+
+@pytest.mark.parametrize("n, n_out", [(10, 2), (10, 9), (1000, 100), (1001, 7), (5000, 4999)])
+def test_minmax_indices(n, n_out):
+    x, y = series(n)
+    kept = minmax(x, y, n_out)
+    assert len(kept) <= n_out
+    assert (np.diff(kept) > 0).all()
+    assert kept.min() >= 0 and kept.max() < n
+
+
+def test_spikes_survive_minmax():
+    x, y = series(10000)
+    y[1234], y[8765] = 1e6, -1e6
+    kept = minmax(x, y, 50)
+    assert 1234 in kept and 8765 in kept
+    assert y[kept].max() == y.max() and y[kept].min() == y.min()
+
+
+def test_lttb_keeps_a_spike():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[500] = 100.0
+    assert 500 in lttb(x, y, 20)
+
+
+def test_flat_series():
+    x = np.arange(100, dtype=np.float64)
+    y = np.ones(100)
+    kept = minmax(x, y, 10)
+    # Min and max coincide in every bucket: one point per bucket
+    assert len(kept) == 5
+    assert len(lttb(x, y, 10)) == 10
+
+
+def test_downsample_dispatch():
+    x, y = series(100)
+    np.testing.assert_array_equal(downsample(x, y, 10), lttb(x, y, 10))
+    np.testing.assert_array_equal(downsample(x, y, 10, 'minmax'), minmax(x, y, 10))
+    with pytest.raises(ValueError):
+        downsample(x, y, 10, 'stride')
+
+
+def test_ohlc_buckets():
+    t = np.arange(10)
+    o = np.arange(10, 20, dtype=np.float64)
+    h = o + 1
+    l = o - 1
+    c = o + 0.5
+    bt, bo, bh, bl, bc = ohlc_buckets(t, o, h, l, c, 3)
+    np.testing.assert_array_equal(bt, [0, 3, 6])
+    np.testing.assert_array_equal(bo, [10, 13, 16])
+    np.testing.assert_array_equal(bh, [13, 16, 20])
+    np.testing.assert_array_equal(bl, [9, 12, 15])
+    np.testing.assert_array_equal(bc, [12.5, 15.5, 19.5])
+
+    assert len(ohlc_buckets(t, o, h, l, c, 50)[0]) == 10
+    assert len(ohlc_buckets(t[:0], o[:0], h[:0], l[:0], c[:0], 5)[0]) == 0
@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from src.database import EquityStore
+
+T0 = 1_700_000_000 // 86400 * 86400  # midnight UTC
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EquityStore(str(tmp_path / "equity.db"), sample_seconds=10, flush_interval=60,
+                        retention_days={'raw': None, '1m': None, '1h': None})
+    yield store
+    store.close()
+
+
+def record(store, samples):
+    for ts, equity, exposure in samples:
+        store.record(equity, unrealized_pnl=equity - 1000.0, exposure=exposure, ts=ts)
+    store.flush()
+
+
+def test_rollups_keep_ohlc_and_exposure(store):
+    record(store, [
+        (T0 + 0, 1000.0, 100.0),
+        (T0 + 10, 1010.0, 300.0),
+        (T0 + 20, 990.0, 200.0),
+        (T0 + 65, 1005.0, 50.0),
+    ])
+
+    _, minutes = store.series(T0, T0 + 120, resolution='1m')
+    assert [m['ts'] for m in minutes] == [T0, T0 + 60]
+    first = minutes[0]
+    assert (first['open'], first['high'], first['low'], first['close']) == (1000.0, 1010.0, 990.0, 990.0)
+    assert (first['exposure'], first['exposure_max'], first['samples']) == (200.0, 300.0, 3)
+    assert first['unrealized_pnl'] == -10.0
+
+    _, hours = store.series(T0, T0 + 120, resolution='1h')
+    assert len(hours) == 1
+    hour = hours[0]
+    assert (hour['open'], hour['high'], hour['low'], hour['close'], hour['samples']) == (1000.0, 1010.0, 990.0, 1005.0, 4)
+
+    _, raw = store.series(T0, T0 + 120, resolution='raw')
+    assert [r['equity'] for r in raw] == [1000.0, 1010.0, 990.0, 1005.0]
+
+
+def test_in_progress_bucket_is_rewritten(store):
+    record(store, [(T0, 1000.0, 0.0)])
+    record(store, [(T0 + 30, 1100.0, 0.0)])
+    _, minutes = store.series(T0, T0 + 60, resolution='1m')
+    assert len(minutes) == 1
+    assert (minutes[0]['high'], minutes[0]['close'], minutes[0]['samples']) == (1100.0, 1100.0, 2)
+
+
+def test_drawdown(store):
+    # Recent enough for raw samples, so the order of the extremes is known
+    start = time.time() - 4 * 3600
+    record(store, [
+        (start, 1000.0, 0.0),
+        (start + 3600, 1200.0, 0.0),
+        (start + 7200, 900.0, 0.0),
+        (start + 10800, 1080.0, 0.0),
+    ])
+    dd = store.drawdown(since=start)
+    assert dd['peak'] == 1200.0
+    assert dd['current'] == 1080.0
+    assert dd['drawdown'] == pytest.approx(0.1)
+    assert dd['max_drawdown'] == pytest.approx(0.25)
+
+
+def test_drawdown_ignores_low_before_high_in_a_bucket(store):
+    # One daily bucket: the dip to 900 happens before the 1200 high
+    record(store, [
+        (T0 + 3600, 1000.0, 0.0),
+        (T0 + 7200, 900.0, 0.0),
+        (T0 + 10800, 1200.0, 0.0),
+        (T0 + 14400, 1150.0, 0.0),
+    ])
+    dd = store.drawdown(since=T0)
+    assert dd['peak'] == 1200.0
+    assert dd['max_drawdown'] == pytest.approx(0.1)
+
+
+def test_series_picks_resolution_by_range(store):
+    now = time.time()
+    assert store.series(now - 3600, now)[0] == 'raw'
+    assert store.series(now - 30 * 86400, now)[0] == '1h'
+    assert store.series(now - 10 * 365 * 86400, now)[0] == '1d'
+
+
+def test_latest_and_restart(tmp_path):
+    path = str(tmp_path / "equity.db")
+    store = EquityStore(path, flush_interval=60, retention_days={'raw': None, '1m': None, '1h': None})
+    store.record(1000.0, ts=T0 + 100)
+    store.record(1050.0, ts=T0 + 200)
+    assert store.latest()['equity'] == 1050.0
+    store.close()
+
+    reopened = EquityStore(path, flush_interval=60, retention_days={'raw': None, '1m': None, '1h': None})
+    try:
+        assert reopened.latest()['equity'] == 1050.0
+        reopened.record(1020.0, ts=T0 + 300)
+        reopened.flush()
+        _, days = reopened.series(T0, T0 + 400, resolution='1d')
+        # The restored bucket keeps accumulating instead of starting over
+        assert days[-1]['samples'] == 3
+        assert days[-1]['high'] == 1050.0
+    finally:
+        reopened.close()
+
+
+def test_latest_max_age(store):
+    store.record(1000.0, ts=time.time() - 100)
+    assert store.latest(max_age=30) is None
+    assert store.latest()['equity'] == 1000.0
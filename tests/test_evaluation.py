@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src.ai import evaluation
+
+
+@pytest.fixture
+def features():
+    # The next candle goes up exactly when the first feature is positive
+    rng = np.random.default_rng(7)
+    X = rng.normal(size=(600, 4))
+    y = (X[:, 0] > 0).astype(int)
+    returns = np.where(y == 1, 0.01, -0.01)
+    return X, y, returns
+
+
+def test_split_is_expanding_and_out_of_sample():
+    folds = evaluation._split(600, 5)
+    assert folds == [(100, 100, 200), (200, 200, 300), (300, 300, 400), (400, 400, 500), (500, 500, 600)]
+
+
+def test_score_thresholds_and_calibration():
+    proba = np.array([0.9, 0.7, 0.5, 0.3, 0.1])
+    y = np.array([1, 0, 1, 0, 0])
+    returns = np.array([0.02, -0.01, 0.05, -0.03, 0.01])
+
+    report = evaluation._score(proba, y, returns)
+    assert report['accuracy'] == pytest.approx(0.6)
+    assert report['brier'] == pytest.approx((0.01 + 0.49 + 0.25 + 0.09 + 0.01) / 5)
+    # Long the first two, flat at 0.5, short the last two
+    assert report['trades'] == 4
+    assert report['pnl'] == pytest.approx(0.02 - 0.01 + 0.03 - 0.01)
+    assert report['hit_rate'] == pytest.approx(0.5)
+    assert [b['count'] for b in report['calibration']] == [1, 1, 1, 1, 1]
+
+
+def test_walk_forward_evaluate_is_deterministic(features):
+    params = {'n_estimators': 10, 'max_depth': 3}
+    report = evaluation.walk_forward_evaluate(features=features, params=params, n_splits=3, max_workers=2)
+    again = evaluation.walk_forward_evaluate(features=features, params=params, n_splits=3, max_workers=1)
+
+    assert [f['train_size'] for f in report['folds']] == [150, 300, 450]
+    assert report['accuracy'] > 0.95
+    assert report['pnl'] > 0
+    assert report['params'] == params
+    for key in ('accuracy', 'brier', 'pnl', 'trades'):
+        assert report[key] == again[key]
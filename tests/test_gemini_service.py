@@ -0,0 +1,143 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from src.ai.gemini_service import GeminiService, KeyState, RecommendationSlot
+
+
+class Response:
+    def __init__(self, status, text, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self._text = text
+
+    async def json(self):
+        return {"candidates": [{"content": {"parts": [{"text": self._text}]}}]}
+
+    async def text(self):
+        return self._text
+
+
+class Session:
+    """Fake aiohttp session: replies per API key after a delay, and records calls and cancellations."""
+
+    def __init__(self, replies):
+        self.replies = replies  # {key: (delay, status, headers)}
+        self.calls = []
+        self.cancelled = []
+
+    def post(self, url, params=None, json=None, timeout=None):
+        session, key = self, params["key"]
+
+        class Request:
+            async def __aenter__(self):
+                session.calls.append(key)
+                delay, status, headers = session.replies[key]
+                try:
+                    await asyncio.sleep(delay)
+                except asyncio.CancelledError:
+                    session.cancelled.append(key)
+                    raise
+                return Response(status, f"answer from {key}", headers)
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Request()
+
+
+def service(session, keys=("k1", "k2"), **kwargs):
+    return GeminiService(list(keys), http_session=lambda: session, cache_ttl_seconds=0, **kwargs)
+
+
+def test_rate_limited_key_rotates_to_the_next_and_cools_down():
+    session = Session({"k1": (0, 429, {"Retry-After": "30"}), "k2": (0, 200, {})})
+    gemini = service(session)
+
+    assert asyncio.run(gemini._generate("prompt")) == "answer from k2"
+    assert session.calls == ["k1", "k2"]
+    assert gemini.keys[0].cooldown_until > time.monotonic() + 25
+
+    # While k1 cools down, requests go straight to k2
+    assert asyncio.run(gemini._generate("prompt")) == "answer from k2"
+    assert session.calls == ["k1", "k2", "k2"]
+
+
+def test_cooldown_and_per_minute_quota_expire():
+    state = KeyState("k1", requests_per_minute=2)
+    state.cooldown_until = 100.0
+    assert not state.available(99.0)
+    assert state.available(100.0)
+
+    state.recent_requests.extend([100.0, 110.0])
+    assert not state.available(150.0)
+    # The first request leaves the one-minute window
+    assert state.available(160.5)
+    assert list(state.recent_requests) == [110.0]
+
+
+def test_hedged_request_wins_and_the_slow_one_is_cancelled():
+    session = Session({"k1": (5, 200, {}), "k2": (0.01, 200, {})})
+    gemini = service(session, hedge_after_seconds=0.05)
+
+    async def run():
+        text = await gemini._generate("prompt")
+        await asyncio.sleep(0)  # let the cancellation land
+        return text
+
+    assert asyncio.run(run()) == "answer from k2"
+    assert session.calls == ["k1", "k2"]
+    assert session.cancelled == ["k1"]
+    assert [k.in_flight for k in gemini.keys] == [0, 0]
+
+
+def test_every_key_failing_returns_none():
+    session = Session({"k1": (0, 500, {}), "k2": (0, 503, {})})
+    gemini = service(session)
+
+    assert asyncio.run(gemini._generate("prompt")) is None
+    assert session.calls == ["k1", "k2"]
+    assert [k.failures for k in gemini.keys] == [1, 1]
+
+
+def test_recommendation_slot_replaces_and_expires():
+    slot = RecommendationSlot()
+    assert slot.value is None and slot.age() is None
+    assert not slot.is_fresh(60)
+
+    slot.publish({"action": "BUY", "pair": "ETH/USDC"})
+    slot.publish({"action": "SELL", "pair": "BTC/USDC"})
+    assert slot.value == {"action": "SELL", "pair": "BTC/USDC"}
+    assert slot.version == 2
+    assert slot.is_fresh(60)
+
+    slot.updated_at = datetime.utcnow() - timedelta(seconds=120)
+    assert not slot.is_fresh(60)
+    assert slot.is_fresh(180)
+
+
+def test_strategy_applies_each_published_recommendation_once():
+    from src.strategy.coffin299 import Coffin299Strategy
+
+    # Skip __init__: it starts the Gemini poller
+    strategy = Coffin299Strategy.__new__(Coffin299Strategy)
+    strategy.recommendation = RecommendationSlot()
+    strategy._applied_recommendation = 0
+    strategy.current_recommendation = None
+    strategy.target_pair = "ETH/USDC"
+    strategy.model_pool = None
+    strategy.learner_params = {}
+    strategy.learner = None
+
+    strategy.apply_recommendation()
+    assert strategy.current_recommendation is None
+
+    strategy.recommendation.publish({"action": "BUY", "pair": "SOL/USDC"})
+    strategy.apply_recommendation()
+    assert strategy.target_pair == "SOL/USDC"
+    learner = strategy.learner
+    assert learner is not None
+
+    # Same version: nothing is re-applied (no second retrain)
+    strategy.apply_recommendation()
+    assert strategy.learner is learner
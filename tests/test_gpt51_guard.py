@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+import pytest
+
+from src.database import EquityStore
+from src.strategy.coffin299_gpt51 import Coffin299GPT51Strategy
+
+
+class Exchange:
+    def __init__(self, equity_store):
+        self.equity_store = equity_store
+        self.prices = {'ETH/USDC': 2000.0}
+
+    async def get_market_price(self, pair):
+        return self.prices[pair]
+
+
+@pytest.fixture
+def strategy(tmp_path):
+    store = EquityStore(str(tmp_path / "equity.db"), sample_seconds=10, flush_interval=60)
+    # Skip __init__: it starts the report loop
+    strategy = Coffin299GPT51Strategy.__new__(Coffin299GPT51Strategy)
+    strategy.exchange = Exchange(store)
+    strategy.base_symbol = 'ETH'
+    strategy.start_base_equiv = None
+    strategy.started_at = time.time() - 3600
+    strategy.max_drawdown_pct = 0.2
+    yield strategy
+    store.close()
+
+
+def test_fresh_store_uses_its_drawdown(strategy):
+    store = strategy.exchange.equity_store
+    now = time.time()
+    for ts, equity in ((now - 60, 1000.0), (now - 30, 1200.0), (now, 900.0)):
+        store.record(equity, ts=ts)
+    store.flush()
+
+    assert asyncio.run(strategy._can_open_new_trade(900.0)) is False
+
+
+def test_stale_store_falls_back_to_live_balance(strategy):
+    strategy.exchange.equity_store.record(1000.0, ts=time.time() - 600)
+
+    assert asyncio.run(strategy._can_open_new_trade(1000.0)) is True
+    assert asyncio.run(strategy._can_open_new_trade(900.0)) is True
+    # ETH-equivalent value down 25% from the first check
+    assert asyncio.run(strategy._can_open_new_trade(750.0)) is False
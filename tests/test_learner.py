@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from benchmarks import generators as gen
+from src.ai.learner import StrategyLearner
+
+
+@pytest.fixture
+def history():
+    return gen.candles(1500)
+
+
+@pytest.fixture
+def learner(history):
+    learner = StrategyLearner(n_estimators=20)
+    assert learner.train(history[:1000])
+    return learner
+
+
+def test_update_swaps_in_a_new_model(learner, history):
+    old_model, old_compiled = learner.model, learner.compiled
+    old_trees = list(old_model.estimators_)
+
+    assert learner.update(history[500:1100], n_new_trees=5)
+
+    assert learner.model is not old_model
+    assert learner.compiled is not old_compiled
+    # The model predict() may still be holding is left untouched
+    assert old_model.estimators_ == old_trees
+    assert len(learner.model.estimators_) == 20
+    assert learner.model.estimators_[:15] == old_trees[5:]
+    assert not learner.model.warm_start
+    assert learner.model.n_estimators == 20
+
+
+def test_update_draws_new_seeds_each_time(learner, history):
+    learner.update(history[500:1100], n_new_trees=5)
+    first = [tree.random_state for tree in learner.model.estimators_[-5:]]
+    learner.update(history[600:1200], n_new_trees=5)
+    second = [tree.random_state for tree in learner.model.estimators_[-5:]]
+    assert set(first).isdisjoint(second)
+
+
+def test_update_keeps_compiled_forest_in_sync(learner, history):
+    learner.update(history[500:1100], n_new_trees=5)
+    data = learner.prepare_data(learner._to_frame(history[1000:]))
+    X = data[learner.feature_cols]
+    expected = learner.model.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(learner.compiled.predict_proba(X.to_numpy()), expected)
+
+
+def test_compiled_forest_matches_sklearn(learner, history):
+    data = learner.prepare_data(learner._to_frame(history))
+    X = data[learner.feature_cols]
+    expected = learner.model.predict_proba(X)[:, 1]
+
+    np.testing.assert_allclose(learner.compiled.predict_proba(X.to_numpy()), expected)
+    for row, p in zip(X.to_numpy()[:50], expected[:50]):
+        assert learner.compiled.predict_proba(row) == pytest.approx(p)
+
+
+def test_compiled_forest_limited_depth(history):
+    learner = StrategyLearner(n_estimators=10, max_depth=3)
+    learner.train(history[:1000])
+    X = learner.prepare_data(learner._to_frame(history))[learner.feature_cols]
+    np.testing.assert_allclose(learner.compiled.predict_proba(X.to_numpy()),
+                               learner.model.predict_proba(X)[:, 1])
+
+
+def test_predict_single_row_matches_dataframe_path(learner, history):
+    window = history[1000:1030]
+    compiled_signal = learner.predict(window)
+
+    learner.compiled = None
+    assert learner.predict(window) == (compiled_signal[0], pytest.approx(compiled_signal[1]))
+
+
+def test_pool_predict_all_matches_per_pair_predict(history):
+    import copy
+    from src.ai.model_pool import ModelPool
+
+    pool = ModelPool(['ETH/USDC', 'BTC/USDC', 'SOL/USDC'])
+    candles = {}
+    for i, (pair, trees) in enumerate([('ETH/USDC', 20), ('BTC/USDC', 7), ('SOL/USDC', 12)]):
+        data = gen.candles(1200, seed=i + 1)
+        learner = StrategyLearner(n_estimators=trees, max_depth=8 if i else None)
+        assert learner.train(data[:1000])
+        pool.models[pair] = learner
+        candles[pair] = data[1000:1050]
+
+    expected = {pair: copy.deepcopy(pool.models[pair]).predict(ohlcv) for pair, ohlcv in candles.items()}
+    predictions = pool.predict_all(candles)
+    assert predictions.keys() == expected.keys()
+    for pair, (action, confidence) in expected.items():
+        assert predictions[pair][0] == action
+        assert predictions[pair][1] == pytest.approx(confidence)
+
+    # The stacked forest is reused until a model changes
+    stacked = pool._stacked[1]
+    pool.predict_all(candles)
+    assert pool._stacked[1] is stacked
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.database import TradeLedger
+
+DAY1 = datetime(2025, 1, 1, 12, tzinfo=timezone.utc).timestamp()
+DAY2 = datetime(2025, 1, 2, 12, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = TradeLedger(str(tmp_path / "ledger.db"), flush_interval=60)
+    ledger.record_fill("ETH/USDC", "buy", 1.0, 3000.0, fee=1.5, ts=DAY1)
+    ledger.record_fill("ETH/USDC", "sell", 1.0, 3100.0, fee=1.5, realized_pnl=100.0, ts=DAY1 + 60)
+    ledger.record_fill("BTC/USDC", "buy", 0.1, 60000.0, fee=3.0, ts=DAY1 + 120, mode='live', trade_id='t1')
+    ledger.record_fill("ETH/USDC", "sell", 2.0, 2900.0, fee=2.0, realized_pnl=-50.0, ts=DAY2)
+    ledger.record_funding("ETH/USDC", -0.5, rate=0.0001, position_size=1.0, mode='paper', ts=DAY1 + 3600)
+    ledger.record_funding("SOL/USDC", 0.25, mode='paper', ts=DAY2 + 3600)
+    ledger.flush()
+    yield ledger
+    ledger.close()
+
+
+def test_realized_pnl_by_day(ledger):
+    rows = {(r['symbol'], r['day']): r for r in ledger.realized_pnl()}
+    assert set(rows) == {("ETH/USDC", "2025-01-02"), ("SOL/USDC", "2025-01-02"),
+                         ("ETH/USDC", "2025-01-01"), ("BTC/USDC", "2025-01-01")}
+
+    eth1 = rows[("ETH/USDC", "2025-01-01")]
+    assert eth1['realized_pnl'] == 100.0
+    assert eth1['fees'] == 3.0
+    assert eth1['funding'] == -0.5
+    assert eth1['net'] == pytest.approx(96.5)
+    assert eth1['fills'] == 2
+
+    sol = rows[("SOL/USDC", "2025-01-02")]
+    assert (sol['fills'], sol['funding'], sol['net']) == (0, 0.25, 0.25)
+    # Newest day first
+    assert [r['day'] for r in ledger.realized_pnl()][:2] == ["2025-01-02", "2025-01-02"]
+
+
+def test_filters(ledger):
+    paper = ledger.realized_pnl(mode='paper', by_day=False)
+    assert {r['symbol'] for r in paper} == {"ETH/USDC", "SOL/USDC"}
+    assert ledger.realized_pnl(symbol="BTC/USDC", mode='paper') == []
+
+    since_day2 = ledger.turnover(since=datetime(2025, 1, 2, tzinfo=timezone.utc))
+    assert since_day2 == {"ETH/USDC": {'notional': 5800.0, 'volume': 2.0, 'fills': 1}}
+    assert ledger.turnover(until=DAY1 + 60) == {"ETH/USDC": {'notional': 3000.0, 'volume': 1.0, 'fills': 1}}
+
+
+def test_summary(ledger):
+    summary = ledger.summary(mode='paper')
+    assert summary == pytest.approx({
+        'realized_pnl': 50.0,
+        'fees': 5.0,
+        'funding': -0.25,
+        'net': 44.75,
+        'turnover': 3000.0 + 3100.0 + 5800.0,
+        'fills': 3,
+    })
+
+
+def test_live_fills_are_deduplicated_on_trade_id(ledger):
+    ledger.record_fill("BTC/USDC", "buy", 0.1, 60000.0, fee=3.0, ts=DAY1 + 120, mode='live', trade_id='t1')
+    ledger.flush()
+    assert ledger.turnover(mode='live')["BTC/USDC"]['fills'] == 1
+
+
+def test_orders_and_recent_fills(ledger):
+    ledger.record_order(1, "ETH/USDC", "buy", "limit", 1.0, price=2990.0, status='open', ts=DAY2)
+    ledger.record_order(1, "ETH/USDC", "buy", "limit", 1.0, price=2990.0, status='closed', ts=DAY2)
+    ledger.flush()
+    assert ledger._query("SELECT order_id, status FROM orders") == [("1", "closed")]
+
+    recent = ledger.recent_fills(limit=2)
+    assert [f['ts'] for f in recent] == [DAY2, DAY1 + 120]
+    assert recent[0]['realized_pnl'] == -50.0
@@ -0,0 +1,41 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _child_logging_state():
+    from src.logger import setup_logger, _pipeline
+    setup_logger("test_child").warning("from a spawned worker")
+    root = logging.getLogger()
+    return {
+        'handlers': [type(h).__name__ for h in root.handlers],
+        'files': [getattr(h, 'baseFilename', None) for h in _pipeline.handlers],
+        'listener': _pipeline.listener is not None,
+        'bot_log': os.path.exists(os.path.join("logs", "bot.log")),
+    }
+
+
+def test_spawned_worker_does_not_open_bot_log(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        state = pool.submit(_child_logging_state).result(timeout=60)
+
+    assert state['handlers'] == ['StreamHandler']
+    assert state['files'] == []
+    assert not state['listener']
+    assert not state['bot_log']
+
+
+def test_model_pool_workers_log_to_stderr(tmp_path, monkeypatch):
+    from src.ai.model_pool import ModelPool
+    monkeypatch.chdir(tmp_path)
+    pool = ModelPool([])
+    try:
+        state = pool._get_executor().submit(_child_logging_state).result(timeout=60)
+    finally:
+        pool.shutdown()
+
+    assert state['handlers'] == ['StreamHandler']
+    assert not state['bot_log']
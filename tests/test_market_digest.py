@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from benchmarks import generators as gen
+from src.ai.market_digest import build_market_digest, serialize_digest
+
+
+def reference_row(rows, horizons=(1, 4, 24), atr_period=14, volume_window=24, fast_window=6, slow_window=24):
+    """Straightforward per-symbol computation of one digest row."""
+    close = [r[4] for r in rows]
+    high = [r[2] for r in rows]
+    low = [r[3] for r in rows]
+    volume = [r[5] for r in rows]
+    last = close[-1]
+
+    values = [(last / close[-1 - h] - 1) * 100 for h in horizons]
+    true_ranges = [max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+                   for i in range(len(rows) - atr_period, len(rows))]
+    values.append(np.mean(true_ranges) / last * 100)
+    history = volume[-volume_window - 1:-1]
+    values.append((volume[-1] - np.mean(history)) / np.std(history))
+    sma_fast, sma_slow = np.mean(close[-fast_window:]), np.mean(close[-slow_window:])
+    values.append(1 if last > sma_slow and sma_fast > sma_slow else -1 if last < sma_slow and sma_fast < sma_slow else 0)
+    return values
+
+
+def test_vectorized_digest_matches_per_symbol_computation():
+    candles = {f"C{i}": gen.candles(60, seed=i) for i in range(5)}
+    symbols, columns, table = build_market_digest(candles)
+
+    assert symbols == list(candles)
+    assert columns == ['ret_1', 'ret_4', 'ret_24', 'atr_pct', 'vol_z', 'trend']
+    assert table.shape == (5, 6)
+    for symbol, row in zip(symbols, table):
+        np.testing.assert_allclose(row, reference_row(candles[symbol]), rtol=1e-9)
+
+
+def test_short_history_is_skipped_and_trends_are_labelled():
+    up = [[i, 100 + i, 101 + i, 99 + i, 100 + i, 10.0 + i % 3] for i in range(30)]
+    down = [[i, 200 - i, 201 - i, 199 - i, 200 - i, 10.0 + i % 3] for i in range(30)]
+    symbols, columns, table = build_market_digest({'UP': up, 'DOWN': down, 'NEW': up[:10], 'EMPTY': []})
+
+    assert symbols == ['UP', 'DOWN']
+    assert list(table[:, columns.index('trend')]) == [1, -1]
+    assert table[0, columns.index('ret_1')] == pytest.approx((129 / 128 - 1) * 100)
+
+    text = serialize_digest(symbols, columns, table)
+    lines = text.split('\n')
+    assert lines[0] == 'sym|ret_1|ret_4|ret_24|atr_pct|vol_z|trend'
+    assert lines[1].startswith('UP|0.78|') and lines[1].endswith('|U')
+    assert lines[2].endswith('|D')
+
+
+def test_flat_volume_gives_zero_not_nan():
+    flat = [[i, 100.0, 100.0, 100.0, 100.0, 5.0] for i in range(30)]
+    _, columns, table = build_market_digest({'FLAT': flat})
+    assert np.isfinite(table).all()
+    assert table[0, columns.index('vol_z')] == 0.0
+    assert table[0, columns.index('trend')] == 0
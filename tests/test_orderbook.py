@@ -0,0 +1,46 @@
+import pytest
+
+from src.exchanges.orderbook import L2Book
+
+
+@pytest.fixture
+def book():
+    book = L2Book('ETH')
+    book.apply_snapshot(bids=[(999.0, 1.0), (998.0, 2.0)], asks=[(1001.0, 1.0), (1003.0, 3.0)])
+    return book
+
+
+def test_estimate_vwap_size_zero_is_touch(book):
+    assert book.estimate_vwap('buy', 0) == (1001.0, 0.0)
+    assert book.estimate_vwap('sell', 0.0) == (999.0, 0.0)
+    assert book.slippage_bps('buy', 0) == pytest.approx(10.0)
+
+
+def test_estimate_vwap_walks_levels(book):
+    assert book.estimate_vwap('buy', 0.5) == (1001.0, 0.5)
+    assert book.estimate_vwap('buy', 1.0) == (1001.0, 1.0)
+    vwap, filled = book.estimate_vwap('buy', 2.0)
+    assert vwap == pytest.approx(1002.0)
+    assert filled == 2.0
+
+
+def test_estimate_vwap_thin_and_empty_books(book):
+    vwap, filled = book.estimate_vwap('sell', 10.0)
+    assert filled == 3.0
+    assert vwap == pytest.approx((999.0 + 2 * 998.0) / 3)
+    assert book.slippage_bps('sell', 10.0) is None
+
+    empty = L2Book('BTC')
+    assert empty.estimate_vwap('buy', 1.0) == (None, 0.0)
+    assert empty.estimate_vwap('buy', 0) == (None, 0.0)
+    assert empty.mid() is None
+
+
+def test_depth_and_hyperliquid_snapshot():
+    book = L2Book('ETH')
+    book.apply_hyperliquid({'time': 1, 'levels': [[{'px': '99', 'sz': '2', 'n': 1}], [{'px': '101', 'sz': '1', 'n': 1}]]})
+    assert book.best_bid_ask() == (99.0, 101.0)
+    assert book.mid() == 100.0
+    assert book.depth_to_size('sell', 2.0) == 99.0
+    assert book.depth_to_size('buy', 1.5) is None
+    assert book.exchange_time == 1
@@ -0,0 +1,144 @@
+import pytest
+
+from src.exchanges.paper_engine import PaperMatchingEngine
+
+
+class Account:
+    """Position bookkeeping driven by the engine's fills."""
+
+    def __init__(self):
+        self.positions = {}
+        self.fills = []
+        self.completed = []
+
+    def position_of(self, pair):
+        return self.positions.get(pair, 0.0)
+
+    def on_fill(self, fill):
+        self.fills.append(fill)
+        sign = 1 if fill['side'] == 'buy' else -1
+        self.positions[fill['pair']] = self.position_of(fill['pair']) + sign * fill['amount']
+
+    def on_order(self, order):
+        if order.status != 'open':
+            self.completed.append(order)
+
+
+@pytest.fixture
+def account():
+    return Account()
+
+
+@pytest.fixture
+def engine(account):
+    return PaperMatchingEngine(account.position_of, account.on_fill, maker_fee=0.0001, taker_fee=0.0005,
+                               half_spread_bps=1.0, level_bps=1.0, level_notional=1000, max_levels=5,
+                               on_order=account.on_order)
+
+
+def test_market_order_fills_at_touch_with_taker_fee(engine, account):
+    order = engine.submit(1, 'ETH/USDC', 'buy', 'market', 0.1, mid=1000.0)
+
+    assert order.status == 'closed'
+    assert order.filled == pytest.approx(0.1)
+    assert order.average_price == pytest.approx(1000.1)
+    assert order.fee == pytest.approx(0.1 * 1000.1 * 0.0005)
+    assert [f['liquidity'] for f in account.fills] == ['taker']
+    assert account.position_of('ETH/USDC') == pytest.approx(0.1)
+
+
+def test_large_market_order_walks_levels(engine, account):
+    # Each level holds 1000 USDC; 2.5 ETH at ~1000 spans three levels
+    order = engine.submit(1, 'ETH/USDC', 'sell', 'market', 2.5, mid=1000.0)
+
+    prices = [f['price'] for f in account.fills]
+    assert prices == pytest.approx([999.9, 999.8, 999.7])
+    assert order.filled == pytest.approx(2.5)
+    assert order.average_price < 999.9
+    assert order.fee == pytest.approx(sum(f['amount'] * f['price'] for f in account.fills) * 0.0005)
+
+
+def test_market_order_beyond_modelled_depth_is_partially_filled(engine):
+    order = engine.submit(1, 'ETH/USDC', 'buy', 'market', 100.0, mid=1000.0)
+
+    assert order.status == 'closed'
+    assert 4.9 < order.filled < 5.0
+    assert order.remaining > 0
+
+
+def test_ioc_stops_at_limit_price(engine):
+    order = engine.submit(1, 'ETH/USDC', 'buy', 'ioc', 5.0, price=1000.25, mid=1000.0)
+
+    # Levels at 1000.1 and 1000.2 are within the limit, 1000.3 is not
+    assert order.filled == pytest.approx(1000 / 1000.1 + 1000 / 1000.2)
+    assert order.status == 'closed'
+    assert engine.orders == {}
+
+
+def test_limit_order_rests_and_fills_as_maker(engine, account):
+    order = engine.submit(1, 'ETH/USDC', 'buy', 'limit', 1.0, price=990.0, mid=1000.0)
+    assert order.status == 'open'
+    assert engine.open_orders('ETH/USDC')[0]['id'] == 1
+    assert engine.active_pairs() == ['ETH/USDC']
+
+    assert engine.on_mid('ETH/USDC', 995.0) == 0
+    # Ask = mid * 1.0001 <= 990 once the mid drops below ~989.9
+    assert engine.on_mid('ETH/USDC', 989.8) == 1
+
+    assert order.status == 'closed'
+    assert account.fills[-1]['price'] == 990.0
+    assert account.fills[-1]['liquidity'] == 'maker'
+    assert order.fee == pytest.approx(990.0 * 0.0001)
+    assert account.completed == [order]
+    assert engine.orders == {}
+
+
+def test_resting_orders_fill_best_price_first(engine, account):
+    engine.submit(1, 'ETH/USDC', 'sell', 'limit', 1.0, price=1020.0, mid=1000.0)
+    engine.submit(2, 'ETH/USDC', 'sell', 'limit', 1.0, price=1010.0)
+    engine.submit(3, 'ETH/USDC', 'sell', 'limit', 1.0, price=1030.0)
+
+    assert engine.on_mid('ETH/USDC', 1025.0) == 2
+    assert [f['order_id'] for f in account.fills] == [2, 1]
+    assert set(engine.orders) == {3}
+
+
+def test_cancelled_order_never_fills(engine, account):
+    engine.submit(1, 'ETH/USDC', 'buy', 'limit', 1.0, price=990.0, mid=1000.0)
+    assert engine.cancel(1).status == 'canceled'
+    assert engine.cancel(1) is None
+
+    assert engine.on_mid('ETH/USDC', 900.0) == 0
+    assert account.fills == []
+
+
+def test_reduce_only_is_clamped_to_position(engine, account):
+    engine.submit(1, 'ETH/USDC', 'buy', 'market', 0.5, mid=1000.0)
+
+    order = engine.submit(2, 'ETH/USDC', 'sell', 'market', 2.0, reduce_only=True)
+    assert order.filled == pytest.approx(0.5)
+    assert account.position_of('ETH/USDC') == pytest.approx(0.0)
+
+    # Nothing left to reduce
+    order = engine.submit(3, 'ETH/USDC', 'sell', 'limit', 1.0, price=1010.0, reduce_only=True)
+    assert order.status == 'canceled'
+    assert order.filled == 0
+
+
+def test_submit_requires_mid_and_limit_price(engine):
+    with pytest.raises(ValueError):
+        engine.submit(1, 'BTC/USDC', 'buy', 'market', 1.0)
+    with pytest.raises(ValueError):
+        engine.submit(1, 'ETH/USDC', 'buy', 'limit', 1.0, mid=1000.0)
+
+
+def test_external_book_replaces_model(account):
+    from src.exchanges.orderbook import L2Book
+    book = L2Book('ETH')
+    book.apply_snapshot([(999.0, 1.0)], [(1001.0, 0.5), (1002.0, 2.0)])
+    engine = PaperMatchingEngine(account.position_of, account.on_fill, taker_fee=0.0,
+                                 book_of=lambda pair: book)
+
+    order = engine.submit(1, 'ETH/USDC', 'buy', 'market', 1.0, mid=1000.0)
+    assert [(f['price'], f['amount']) for f in account.fills] == [(1001.0, 0.5), (1002.0, 0.5)]
+    assert order.average_price == pytest.approx(1001.5)
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from src.exchanges.base import BaseExchange
+
+
+class MarketExchange(BaseExchange):
+    """Paper exchange whose market price is set by the test."""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.market = {}
+
+    async def get_balance(self):
+        return {'total': dict(self.paper_balance)}
+
+    async def get_market_price(self, pair):
+        if self.market.get(pair) is None:
+            raise ConnectionError("price feed down")
+        return self.market[pair]
+
+    async def get_ohlcv(self, pair, timeframe, limit=100):
+        return []
+
+    async def _execute_real_order(self, pair, type, side, amount, price=None):
+        raise AssertionError("paper tests never place live orders")
+
+
+@pytest.fixture
+def exchange(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # fresh position DB
+    exchange = MarketExchange({
+        'strategy': {'paper_mode': {'enabled': True, 'initial_balance': {'USDC': 10000.0},
+                                    'fees': {'taker': 0.0}, 'slippage': {'half_spread_bps': 0.0}}},
+        'ledger': {'enabled': False},
+        'equity_store': {'enabled': False},
+    })
+    yield exchange
+    asyncio.run(exchange.close())
+
+
+def test_market_order_without_price_uses_live_price(exchange):
+    exchange.market['ETH/USDC'] = 100.0
+    buy = asyncio.run(exchange.create_order('ETH/USDC', 'market', 'buy', 1.0))
+    assert buy['price'] == pytest.approx(100.0)
+
+    # The engine last saw 100; the sell must fill at the new market price
+    exchange.market['ETH/USDC'] = 200.0
+    sell = asyncio.run(exchange.create_order('ETH/USDC', 'market', 'sell', 1.0))
+    assert sell['price'] == pytest.approx(200.0)
+    assert exchange.paper_balance['USDC'] == pytest.approx(10100.0)
+
+
+def test_market_order_falls_back_to_last_mid(exchange):
+    exchange.market['ETH/USDC'] = 100.0
+    asyncio.run(exchange.create_order('ETH/USDC', 'market', 'buy', 1.0))
+
+    exchange.market['ETH/USDC'] = None
+    sell = asyncio.run(exchange.create_order('ETH/USDC', 'market', 'sell', 1.0))
+    assert sell['price'] == pytest.approx(100.0)
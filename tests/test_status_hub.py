@@ -0,0 +1,66 @@
+import asyncio
+
+from web.status_hub import StatusHub
+
+
+class Exchange:
+    paper_mode = True
+    equity_store = None
+
+    def __init__(self, jpy=None):
+        self.listeners = []
+        self.usdc = 100.0
+        self.jpy = jpy
+
+    def on_state_change(self, callback):
+        self.listeners.append(callback)
+
+    def changed(self):
+        for callback in self.listeners:
+            callback()
+
+    def cached_status(self):
+        return {'balance': {'total': {'USDC': self.usdc}}, 'positions': []}
+
+    async def get_market_price(self, pair):
+        assert pair == "USDC/JPY"
+        return self.jpy or 0.0
+
+
+class Strategy:
+    target_pair = "ETH/USDC"
+    current_recommendation = None
+
+
+def test_publishes_on_state_change_without_waiting_for_interval():
+    async def run():
+        exchange = Exchange(jpy=150.0)
+        hub = StatusHub(Strategy(), exchange, interval=60)
+        hub.start()
+        await asyncio.sleep(0.05)
+        version = hub.version
+        assert hub.snapshot['total_jpy'] == 15000.0
+
+        exchange.usdc = 200.0
+        exchange.changed()
+        await asyncio.sleep(0.05)
+        hub.stop()
+        return version, hub
+
+    version, hub = asyncio.run(run())
+    assert hub.version == version + 1
+    assert hub.snapshot['equity'] == 200.0
+    assert hub.snapshot['total_jpy'] == 30000.0
+
+
+def test_total_jpy_needs_a_rate():
+    async def run():
+        hub = StatusHub(Strategy(), Exchange(jpy=None), interval=60)
+        hub.start()
+        await asyncio.sleep(0.05)
+        hub.stop()
+        return hub
+
+    hub = asyncio.run(run())
+    assert hub.snapshot['equity'] == 100.0
+    assert hub.snapshot['total_jpy'] is None
@@ -0,0 +1,34 @@
+from src import tracing
+
+
+def test_paper_fill_before_bind_is_not_left_pending():
+    tracer = tracing.Tracer()
+    trace = tracing.Trace('cycle')
+    with tracing.activate(trace):
+        tracer.on_fill('p1')   # paper orders fill during submission
+        tracer.bind_order('p1')
+    assert trace.orders == 1
+    assert [span[0] for span in trace.spans] == ['fill']
+    assert tracer._by_order == {}
+
+
+def test_fill_before_ack_is_attached_on_bind():
+    tracer = tracing.Tracer()
+    tracer.on_fill(42)         # websocket fill, no trace active
+    trace = tracing.Trace('cycle')
+    tracer.bind_order(42, trace)
+    assert trace.orders == 1
+    assert [span[3]['order_id'] for span in trace.spans] == ['42']
+    assert tracer._by_order == {} and tracer._early_fills == {}
+
+
+def test_fill_after_bind_resolves_the_trace():
+    tracer = tracing.Tracer()
+    trace = tracing.Trace('cycle')
+    tracer.bind_order(7, trace)
+    other = tracing.Trace('cycle')
+    with tracing.activate(other):
+        tracer.on_fill(7)
+    assert [span[0] for span in trace.spans] == ['fill']
+    assert other.spans == []
+    assert tracer._by_order == {}
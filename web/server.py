@@ -1,171 +1,372 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, APIRouter
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
-import uvicorn
+from fastapi.responses import HTMLResponse, StreamingResponse, PlainTextResponse, JSONResponse
 import asyncio
 import sys
 import os
+import time
+import json
+import numpy as np
 from contextlib import asynccontextmanager
-import webbrowser
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.config_loader import load_config
-from src.logger import setup_logger, log_buffer
-from src.exchanges.trade_xyz import TradeXYZ
-from src.exchanges.hyperliquid import Hyperliquid
-from src.exchanges.binance_japan import BinanceJapan
-from src.ai.gemini_service import GeminiService
-from src.notifications.discord_bot import DiscordNotifier
-from src.strategy.coffin299 import Coffin299Strategy
+from src.logger import setup_logger, log_ring
+from src import metrics, tracing
+from src.profiler import profiler, ProfilerBusy
+from src.ai.feature_store import FeatureStore, OHLCV_COLUMNS
+from src.downsample import downsample, ohlc_buckets, METHODS as DOWNSAMPLE_METHODS
+from web.status_hub import StatusHub
 
 logger = setup_logger("web_server")
-config = load_config()
 
-# Global Bot State
+# Components of the running bot (set by create_app)
 bot_state = {
+    "config": None,
     "strategy": None,
-    "exchange": None
+    "exchange": None,
+    "hub": None,
+    "loop_monitor": None
 }
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    logger.info("Initializing Bot Components...")
-    
-    # Init Exchange
-    exchange_name = config.get('active_exchange', 'trade_xyz')
-    if exchange_name == 'hyperliquid':
-        exchange = Hyperliquid(config)
-    elif exchange_name == 'binance_japan':
-        exchange = BinanceJapan(config)
-    else:
-        exchange = TradeXYZ(config)
-        
-    # Init AI
-    api_keys = config['ai'].get('api_keys') or config['ai'].get('api_key')
-    ai = GeminiService(
-        api_keys=api_keys,
-        model_name=config['ai']['model'],
-        system_prompt=config['ai']['system_prompt']
-    )
-    
-    # Init Discord
-    discord_notifier = DiscordNotifier(config)
-    await discord_notifier.start()
-    
-    # Init Strategy
-    strategy_type = config['strategy'].get('type', 'coffin299')
-    if strategy_type == 'copy_leaderboard':
-        from src.strategy.coffin299_copy import Coffin299CopyStrategy
-        strategy = Coffin299CopyStrategy(config, exchange, ai, discord_notifier)
-        logger.info("Started in Copy Trading Mode")
-    else:
-        from src.strategy.coffin299 import Coffin299Strategy
-        strategy = Coffin299Strategy(config, exchange, ai, discord_notifier)
-        logger.info("Started in Standard AI Mode")
-    
-    bot_state["strategy"] = strategy
-    bot_state["exchange"] = exchange
-    
-    # Start Strategy Loop Task
-    task = asyncio.create_task(run_strategy_loop(strategy))
-    
-    yield
-    
-    # Cleanup if needed
-    task.cancel()
-    await exchange.close()
-
-app = FastAPI(lifespan=lifespan)
-
-# Mount static files
-app.mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(__file__), "static")), name="static")
+router = APIRouter()
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "templates"))
 
-async def run_strategy_loop(strategy):
-    logger.info("Starting Strategy Loop Background Task...")
-    while True:
-        try:
-            await strategy.run_cycle()
-        except Exception as e:
-            logger.error(f"Error in strategy cycle: {e}")
-        await asyncio.sleep(2) # 2 sec loop for high frequency copy
+def create_app(runtime):
+    """
+    Dashboard app attached to an already running bot (see src.main.Runtime).
+    It reads the runtime's exchange caches and stores and never builds its own
+    exchange, AI client, Discord session or strategy loop.
+    """
+    bot_state["config"] = runtime.config
+    bot_state["strategy"] = runtime.strategy
+    bot_state["exchange"] = runtime.exchange
+    bot_state["loop_monitor"] = getattr(runtime, 'loop_monitor', None)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # One shared status snapshot, pushed to every dashboard viewer
+        hub = StatusHub(runtime.strategy, runtime.exchange,
+                        interval=runtime.config['webui'].get('status_interval_seconds', 5.0))
+        hub.start()
+        bot_state["hub"] = hub
+        yield
+        hub.stop()
 
-@app.get("/", response_class=HTMLResponse)
+    app = FastAPI(lifespan=lifespan)
+    app.mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(__file__), "static")), name="static")
+    app.include_router(router)
+    return app
+
+@router.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request, "title": "Coffin299 Trader"})
 
-@app.get("/api/status")
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Counters and histograms in the Prometheus text exposition format."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/api/status")
 async def get_status():
-    strategy = bot_state["strategy"]
-    exchange = bot_state["exchange"]
-    
-    if not strategy or not exchange:
+    """Current dashboard snapshot (built from in-memory state; no exchange calls)."""
+    hub = bot_state["hub"]
+    if not hub:
         return {"status": "Initializing"}
-        
-    balance = await exchange.get_balance()
-    
-    # Calculate JPY Total (Simplified)
-    total_jpy = 0
-    # Reuse strategy logic if possible, or simple estimation here
-    # For now, we'll try to use the strategy's helper if available, or just send raw balance
-    # and let frontend handle it? No, backend is better.
-    
-    # Quick dirty JPY calc (assuming 1 USDC = 150 JPY for demo if price fetch fails)
-    # Ideally we use strategy._calculate_jpy_value but that's for trade amount.
-    # Let's try to get a rough estimate.
+    return {"version": hub.version, **hub.snapshot}
+
+@router.get("/api/stream")
+async def stream_status(request: Request):
+    """
+    Server-sent events: a `snapshot` event on connect, then `delta` events
+    ({version, changes}) whenever the status snapshot changes.
+    """
+    hub = bot_state["hub"]
+    if not hub:
+        return {"status": "Initializing"}
+    return StreamingResponse(
+        hub.events(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _log_filters(logger_names, level):
+    loggers = [n.strip() for n in logger_names.split(',') if n.strip()] if logger_names else None
+    return loggers, level or None
+
+@router.get("/api/logs")
+async def get_logs(after: int = 0, limit: int = 500, logger_name: str = None, level: str = None):
+    """
+    Log entries with seq > `after` (oldest first, at most `limit`), optionally
+    filtered by logger name(s) (comma separated) and minimum level.
+    """
+    loggers, min_level = _log_filters(logger_name, level)
+    entries = log_ring.read(after=after, limit=min(limit, 5000), loggers=loggers, min_level=min_level)
+    return {"last_seq": log_ring.last_seq, "entries": entries}
+
+@router.get("/api/logs/stream")
+async def stream_logs(request: Request, after: int = 0, logger_name: str = None, level: str = None,
+                      backlog: int = 200):
+    """
+    Server-sent events tail of the log ring. Each `logs` event carries only the
+    entries newer than the last one sent; `after` resumes from a known seq
+    (otherwise the last `backlog` matching entries are sent first).
+    """
+    loggers, min_level = _log_filters(logger_name, level)
+
+    async def events():
+        last = after
+        limit = backlog
+        idle = 0
+        while not await request.is_disconnected():
+            newest = log_ring.last_seq
+            if newest > last:
+                entries = log_ring.read(after=last, limit=limit, loggers=loggers, min_level=min_level)
+                # Advance past filtered-out lines too, so they aren't rescanned
+                last = max(newest, entries[-1]['seq']) if entries else newest
+                limit = 1000
+                if entries:
+                    idle = 0
+                    yield f"event: logs\ndata: {json.dumps(entries)}\n\n"
+                    continue
+            idle += 1
+            if idle % 30 == 0:
+                yield ": keepalive\n\n"
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/api/loop")
+async def get_loop_health(top: int = 10):
+    """Event loop lag percentiles and the call sites that blocked it the longest."""
+    monitor = bot_state["loop_monitor"]
+    if not monitor:
+        return {"enabled": False}
+    return {"enabled": True, **monitor.snapshot(top=top)}
+
+@router.get("/api/traces")
+async def get_traces(limit: int = 50):
+    """Recent tick-to-trade traces (those that placed orders), stage timings in ms from the tick."""
+    return {"traces": tracing.tracer.recent(limit=min(limit, 500))}
+
+@router.get("/api/traces/chrome")
+async def export_traces(limit: int = None):
+    """Recent traces as a Chrome trace file (open in chrome://tracing or ui.perfetto.dev)."""
+    return JSONResponse(tracing.tracer.export_chrome(limit=limit),
+                        headers={"Content-Disposition": f"attachment; filename=trace_{int(time.time())}.json"})
+
+def _admin_allowed(request: Request):
+    """Admin endpoints need webui.admin_token if set, otherwise a loopback client."""
+    token = bot_state["config"]['webui'].get('admin_token') if bot_state["config"] else None
+    if token:
+        return request.headers.get("x-admin-token", request.query_params.get("token")) == token
+    return request.client is not None and request.client.host in ("127.0.0.1", "::1", "localhost")
+
+@router.get("/api/admin/profile")
+async def profile_process(request: Request, seconds: float = 10, interval_ms: float = 5,
+                          format: str = "json", include_idle: bool = False, top: int = 30):
+    """
+    Samples every thread of the bot (loop stacks tagged with the running asyncio
+    task) for `seconds`. format=collapsed downloads a flamegraph.pl / speedscope
+    file; json also returns the top functions and where each task is waiting.
+    """
+    if not _admin_allowed(request):
+        return JSONResponse({"error": "Forbidden"}, status_code=403)
     try:
-        # Assuming balance has 'total' key
-        assets = balance.get('total', balance)
-        usdc_val = 0
-        
-        # Get prices
-        eth_price = await exchange.get_market_price("ETH/USDC") or 3000
-        btc_price = await exchange.get_market_price("BTC/USDC") or 90000
-        usdc_jpy = 150 # Mock/Default
-        
-        # Try to fetch USDC/JPY if possible (unlikely on crypto exchange)
-        # So we use a fixed rate or fetch from external? 
-        # For this demo, fixed 150 is fine or we can add it to config.
-        
-        for coin, amount in assets.items():
-            if amount <= 0: continue
-            if coin == 'USDC':
-                usdc_val += amount
-            elif coin == 'ETH':
-                usdc_val += amount * eth_price
-            elif coin == 'BTC':
-                usdc_val += amount * btc_price
-                
-        total_jpy = usdc_val * usdc_jpy
-        
-    except Exception as e:
-        logger.error(f"Error calculating JPY: {e}")
-
-    # Fetch Positions
-    positions = []
-    if hasattr(exchange, 'get_positions'):
-        positions = await exchange.get_positions()
-
-    return {
-        "status": "Running",
-        "target_pair": strategy.target_pair,
-        "recommendation": strategy.current_recommendation,
-        "balance": balance,
-        "total_jpy": total_jpy,
-        "paper_mode": exchange.paper_mode,
-        "positions": positions,
-        "logs": list(log_buffer)
-    }
+        result = await profiler.profile(seconds=min(max(seconds, 0.1), 120), interval=max(interval_ms, 1) / 1000,
+                                        include_idle=include_idle, top=top)
+    except ProfilerBusy as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+    if format == "collapsed":
+        return PlainTextResponse(result["collapsed"],
+                                 headers={"Content-Disposition": f"attachment; filename=profile_{int(time.time())}.folded"})
+    return result
+
+@router.get("/api/equity")
+async def get_equity(hours: float = 24, resolution: str = None, max_points: int = 1000):
+    """
+    Equity curve over the last `hours` from the equity store, at the requested
+    resolution ('raw', '1m', '1h', '1d') or the finest one within max_points.
+    """
+    exchange = bot_state["exchange"]
+    store = getattr(exchange, 'equity_store', None)
+    if not store:
+        return {"enabled": False}
+
+    start = time.time() - hours * 3600
+
+    def _read():
+        used, rows = store.series(start=start, resolution=resolution, max_points=max_points)
+        return {
+            "enabled": True,
+            "resolution": used,
+            "latest": store.latest(),
+            "drawdown": store.drawdown(since=start),
+            "series": rows,
+        }
+
+    return await asyncio.get_running_loop().run_in_executor(None, _read)
+
+@router.get("/api/ledger")
+async def get_ledger(days: int = 7, fills: int = 20):
+    """
+    Realized PnL per symbol/day, turnover and recent fills from the trade ledger.
+    """
+    exchange = bot_state["exchange"]
+    ledger = getattr(exchange, 'ledger', None)
+    if not ledger:
+        return {"enabled": False}
+
+    mode = 'paper' if exchange.paper_mode else 'live'
+    since = time.time() - days * 86400
+
+    def _read():
+        return {
+            "enabled": True,
+            "mode": mode,
+            "summary": ledger.summary(since=since, mode=mode),
+            "pnl_by_day": ledger.realized_pnl(since=since, mode=mode),
+            "turnover": ledger.turnover(since=since, mode=mode),
+            "recent_fills": ledger.recent_fills(limit=fills, mode=mode),
+        }
+
+    # sqlite reads run off the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, _read)
+
+def _compact(values, digits=6):
+    """Rounds to `digits` significant digits so the JSON stays short."""
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    scale = 10.0 ** (digits - 1 - np.nan_to_num(magnitude, nan=0.0, posinf=0.0, neginf=0.0))
+    rounded = np.round(values * scale) / scale
+    return [None if v != v else v for v in rounded.tolist()]
+
+def _line_chart(t, v, points, method):
+    keep = downsample(t, v, max(points, 3), method)
+    return {"method": method, "n": len(t), "t": np.asarray(t)[keep].astype(np.int64).tolist(), "v": _compact(np.asarray(v)[keep])}
+
+def _chart_range(start, end, default_days):
+    end = end or time.time()
+    return (start if start is not None else end - default_days * 86400), end
+
+def _bad_method(method, allowed):
+    """400 response for an unknown downsampling method, or None if it is valid."""
+    if method in allowed:
+        return None
+    return JSONResponse({"error": f"Unknown method '{method}' (expected one of: {', '.join(allowed)})"}, status_code=400)
+
+def _timeframe_seconds(timeframe):
+    units = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+    try:
+        return int(timeframe[:-1]) * units[timeframe[-1]]
+    except (KeyError, ValueError):
+        return 3600
+
+def _feature_store():
+    """The strategy's candle store, or the one at the configured path if it exists (never created here)."""
+    store = getattr(bot_state["strategy"], 'feature_store', None) or bot_state.get("feature_store")
+    if store is None:
+        path = bot_state["config"]['ai'].get('learner', {}).get('feature_store', {}).get('path', 'data/features')
+        if not os.path.isdir(path):
+            return None
+        store = bot_state["feature_store"] = FeatureStore(path)
+    return store
+
+@router.get("/api/charts/price")
+async def chart_price(pair: str = None, timeframe: str = None, start: float = None, end: float = None,
+                      points: int = 1000, method: str = 'lttb'):
+    """
+    Close price (or OHLC candles with method=ohlc) of `pair` between `start` and
+    `end` (unix seconds, default last 30 days), downsampled server-side to at most
+    `points` points. Candles come from the feature store when it has them for the
+    range, otherwise from the exchange (most recent candles, up to 5000).
+    method: 'lttb', 'minmax' or 'ohlc'.
+    """
+    error = _bad_method(method, DOWNSAMPLE_METHODS + ('ohlc',))
+    if error:
+        return error
+    strategy = bot_state["strategy"]
+    pair = pair or getattr(strategy, 'target_pair', None)
+    timeframe = timeframe or getattr(strategy, 'timeframe', '1h')
+    if not pair:
+        return {"pair": None, "t": [], "v": []}
+    start, end = _chart_range(start, end, 30)
+    points = min(max(points, 1), 5000)
+
+    def _in_range(data):
+        ts = data[:, 0]
+        lo, hi = np.searchsorted(ts, start * 1000), np.searchsorted(ts, end * 1000, side='right')
+        return np.asarray(data[lo:hi, :len(OHLCV_COLUMNS)], dtype=np.float64)
+
+    def _stored():
+        store = _feature_store()
+        return _in_range(store.load(pair, timeframe)) if store else np.empty((0, len(OHLCV_COLUMNS)))
+
+    loop = asyncio.get_running_loop()
+    rows = await loop.run_in_executor(None, _stored)
+    source = "feature_store"
+    if not len(rows):
+        limit = min(int((end - start) // _timeframe_seconds(timeframe)) + 1, 5000)
+        ohlcv = await bot_state["exchange"].get_ohlcv(pair, timeframe, limit=limit)
+        rows = _in_range(np.array([row[:len(OHLCV_COLUMNS)] for row in ohlcv or []], dtype=np.float64)
+                         .reshape(-1, len(OHLCV_COLUMNS)))
+        source = "exchange"
+
+    def _chart():
+        t = rows[:, 0] / 1000
+        chart = {"pair": pair, "timeframe": timeframe, "source": source}
+        if method == 'ohlc':
+            o, h, l, c = (rows[:, OHLCV_COLUMNS.index(col)] for col in ('open', 'high', 'low', 'close'))
+            t, o, h, l, c = ohlc_buckets(t, o, h, l, c, points)
+            chart.update({"method": "ohlc", "n": len(rows), "t": t.astype(np.int64).tolist(),
+                          "o": _compact(o), "h": _compact(h), "l": _compact(l), "c": _compact(c)})
+        else:
+            chart.update(_line_chart(t, rows[:, OHLCV_COLUMNS.index('close')], points, method))
+        return chart
+
+    return await loop.run_in_executor(None, _chart)
+
+async def _equity_chart(column, start, end, points, method):
+    error = _bad_method(method, DOWNSAMPLE_METHODS)
+    if error:
+        return error
+    store = getattr(bot_state["exchange"], 'equity_store', None)
+    if not store:
+        return {"enabled": False}
+    start, end = _chart_range(start, end, 7)
+    points = min(max(points, 1), 5000)
+
+    def _read():
+        # Read a few times more rows than requested and let the downsampler pick them
+        resolution, rows = store.series(start=start, end=end, max_points=points * 4)
+        # Rollup rows carry the bucket's closing equity
+        column_name = 'close' if column == 'equity' and resolution != 'raw' else column
+        t = np.fromiter((r['ts'] for r in rows), dtype=np.float64, count=len(rows))
+        v = np.fromiter((r[column_name] or 0.0 for r in rows), dtype=np.float64, count=len(rows))
+        return {"enabled": True, "resolution": resolution, **_line_chart(t, v, points, method)}
+
+    return await asyncio.get_running_loop().run_in_executor(None, _read)
+
+@router.get("/api/charts/equity")
+async def chart_equity(start: float = None, end: float = None, points: int = 500, method: str = 'lttb'):
+    """Equity curve (default last 7 days) downsampled to at most `points` points."""
+    return await _equity_chart('equity', start, end, points, method)
+
+@router.get("/api/charts/exposure")
+async def chart_exposure(start: float = None, end: float = None, points: int = 500, method: str = 'minmax'):
+    """Gross position exposure (default last 7 days) downsampled to at most `points` points."""
+    return await _equity_chart('exposure', start, end, points, method)
 
 if __name__ == "__main__":
-    url = f"http://{config['webui']['host']}:{config['webui']['port']}"
-    if config['webui']['host'] == "0.0.0.0":
-        url = f"http://localhost:{config['webui']['port']}"
-        
-    logger.info(f"Opening browser at {url}")
-    webbrowser.open(url)
-    
-    uvicorn.run(app, host=config['webui']['host'], port=config['webui']['port'], log_level="warning")
+    # Same single-process runtime as src/main.py, opening the dashboard in a browser
+    from src.main import start_bot
+    try:
+        if sys.platform == 'win32':
+            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(start_bot(open_browser=True))
+    except KeyboardInterrupt:
+        pass
@@ -3,77 +3,233 @@ const totalJpyElement = document.getElementById('total-jpy');
 const balanceList = document.getElementById('balance-list');
 const positionsTableBody = document.querySelector('#positions-table tbody');
 const logContainer = document.getElementById('log-container');
+const realizedNetElement = document.getElementById('realized-net');
+const ledgerSummary = document.getElementById('ledger-summary');
+const pnlTableBody = document.querySelector('#pnl-table tbody');
+const equityLine = document.querySelector('#equity-chart polyline');
+const equityRange = document.getElementById('equity-range');
+const loopLagElement = document.getElementById('loop-lag');
+const loopTableBody = document.querySelector('#loop-table tbody');
 
-function updateDashboard() {
-    fetch('/api/status')
-        .then(response => response.json())
-        .then(data => {
-            // Status
-            statusIndicator.textContent = data.status;
-            statusIndicator.style.color = data.status === 'Running' ? 'var(--success-color)' : 'var(--danger-color)';
+// Latest status snapshot, kept in sync by /api/stream (snapshot + delta events)
+let dashboardState = {};
 
-            // Balance
-            if (data.total_jpy !== undefined) {
-                totalJpyElement.textContent = `¥${Math.floor(data.total_jpy).toLocaleString()}`;
-            }
+function renderDashboard(data) {
+    // Status
+    statusIndicator.textContent = data.status;
+    statusIndicator.style.color = data.status === 'Running' ? 'var(--success-color)' : 'var(--danger-color)';
 
-            balanceList.innerHTML = '';
-            if (data.balance && data.balance.total) {
-                for (const [coin, amount] of Object.entries(data.balance.total)) {
-                    if (parseFloat(amount) > 0) {
-                        const div = document.createElement('div');
-                        div.className = 'balance-item';
-                        div.innerHTML = `<span>${coin}</span><span>${parseFloat(amount).toFixed(4)}</span>`;
-                        balanceList.appendChild(div);
-                    }
-                }
+    // Balance
+    if (data.total_jpy != null) {
+        totalJpyElement.textContent = `¥${Math.floor(data.total_jpy).toLocaleString()}`;
+    }
+
+    balanceList.innerHTML = '';
+    if (data.balance && data.balance.total) {
+        for (const [coin, amount] of Object.entries(data.balance.total)) {
+            if (parseFloat(amount) > 0) {
+                const div = document.createElement('div');
+                div.className = 'balance-item';
+                div.innerHTML = `<span>${coin}</span><span>${parseFloat(amount).toFixed(4)}</span>`;
+                balanceList.appendChild(div);
             }
+        }
+    }
 
-            // Positions
-            positionsTableBody.innerHTML = '';
-            if (data.positions && data.positions.length > 0) {
-                data.positions.forEach(pos => {
-                    const row = document.createElement('tr');
-                    const pnlClass = parseFloat(pos.pnl) >= 0 ? 'long' : 'short';
-                    const sideClass = pos.side === 'LONG' ? 'long' : 'short';
+    // Positions
+    positionsTableBody.innerHTML = '';
+    if (data.positions && data.positions.length > 0) {
+        data.positions.forEach(pos => {
+            const row = document.createElement('tr');
+            const pnlClass = parseFloat(pos.pnl) >= 0 ? 'long' : 'short';
+            const sideClass = pos.side === 'LONG' ? 'long' : 'short';
+
+            row.innerHTML = `
+                <td>${pos.symbol}</td>
+                <td class="${sideClass}">${pos.side}</td>
+                <td>${pos.size}</td>
+                <td class="${pnlClass}">${parseFloat(pos.pnl).toFixed(2)} USD</td>
+            `;
+            positionsTableBody.appendChild(row);
+        });
+    } else {
+        positionsTableBody.innerHTML = '<tr><td colspan="4" style="text-align:center; color: var(--text-secondary);">No open positions</td></tr>';
+    }
+}
+
+function connectStatusStream() {
+    if (!window.EventSource) {
+        // Fallback for browsers without SSE
+        setInterval(() => {
+            fetch('/api/status')
+                .then(response => response.json())
+                .then(renderDashboard)
+                .catch(error => console.error('Error fetching status:', error));
+        }, 2000);
+        return;
+    }
+
+    const source = new EventSource('/api/stream');
+    source.addEventListener('snapshot', event => {
+        dashboardState = JSON.parse(event.data);
+        renderDashboard(dashboardState);
+    });
+    source.addEventListener('delta', event => {
+        const delta = JSON.parse(event.data);
+        Object.assign(dashboardState, delta.changes);
+        dashboardState.version = delta.version;
+        renderDashboard(dashboardState);
+    });
+    // EventSource reconnects by itself; the server sends a fresh snapshot on reconnect
+    source.onerror = () => {
+        statusIndicator.textContent = 'Reconnecting';
+        statusIndicator.style.color = 'var(--danger-color)';
+    };
+}
+
+// Log tail: only lines newer than the last received seq are sent
+const MAX_LOG_LINES = 200;
+let lastLogSeq = 0;
 
+function appendLogs(entries) {
+    entries.forEach(entry => {
+        lastLogSeq = Math.max(lastLogSeq, entry.seq);
+        const div = document.createElement('div');
+        div.className = 'log-entry';
+
+        // Simple parsing for color
+        let contentClass = '';
+        if (entry.message.includes('BUY')) contentClass = 'buy';
+        if (entry.message.includes('SELL')) contentClass = 'sell';
+
+        const time = new Date(entry.ts * 1000).toTimeString().slice(0, 8);
+        const timeSpan = document.createElement('span');
+        timeSpan.className = 'log-time';
+        timeSpan.textContent = time;
+        const messageSpan = document.createElement('span');
+        messageSpan.className = contentClass;
+        messageSpan.textContent = `${entry.logger} - ${entry.level} - ${entry.message}`;
+        div.append(timeSpan, messageSpan);
+
+        // Newest first
+        logContainer.prepend(div);
+    });
+    while (logContainer.childElementCount > MAX_LOG_LINES) {
+        logContainer.lastElementChild.remove();
+    }
+}
+
+function connectLogStream() {
+    if (!window.EventSource) {
+        setInterval(() => {
+            fetch(`/api/logs?after=${lastLogSeq}&level=INFO`)
+                .then(response => response.json())
+                .then(data => appendLogs(data.entries))
+                .catch(error => console.error('Error fetching logs:', error));
+        }, 2000);
+        return;
+    }
+
+    let source = null;
+    const open = () => {
+        // Resume from the last seen line after a reconnect
+        source = new EventSource(`/api/logs/stream?level=INFO&after=${lastLogSeq}`);
+        source.addEventListener('logs', event => appendLogs(JSON.parse(event.data)));
+        source.onerror = () => {
+            source.close();
+            setTimeout(open, 3000);
+        };
+    };
+    open();
+}
+
+function updateLedger() {
+    fetch('/api/ledger')
+        .then(response => response.json())
+        .then(data => {
+            if (!data.enabled) return;
+
+            const net = data.summary.net;
+            realizedNetElement.textContent = `${net >= 0 ? '+' : ''}$${net.toFixed(2)}`;
+            realizedNetElement.className = `total-value ${net >= 0 ? 'long' : 'short'}`;
+            ledgerSummary.textContent = `Turnover $${Math.round(data.summary.turnover).toLocaleString()} · ${data.summary.fills} fills · Fees $${data.summary.fees.toFixed(2)}`;
+
+            pnlTableBody.innerHTML = '';
+            if (data.pnl_by_day.length > 0) {
+                data.pnl_by_day.forEach(entry => {
+                    const row = document.createElement('tr');
+                    const pnlClass = entry.net >= 0 ? 'long' : 'short';
                     row.innerHTML = `
-                        <td>${pos.symbol}</td>
-                        <td class="${sideClass}">${pos.side}</td>
-                        <td>${pos.size}</td>
-                        <td class="${pnlClass}">${parseFloat(pos.pnl).toFixed(2)} USD</td>
+                        <td>${entry.day}</td>
+                        <td>${entry.symbol}</td>
+                        <td class="${pnlClass}">${entry.net.toFixed(2)} USD</td>
+                        <td>${entry.fees.toFixed(2)}</td>
                     `;
-                    positionsTableBody.appendChild(row);
+                    pnlTableBody.appendChild(row);
                 });
             } else {
-                positionsTableBody.innerHTML = '<tr><td colspan="4" style="text-align:center; color: var(--text-secondary);">No open positions</td></tr>';
+                pnlTableBody.innerHTML = '<tr><td colspan="4" style="text-align:center; color: var(--text-secondary);">No fills yet</td></tr>';
             }
+        })
+        .catch(error => console.error('Error fetching ledger:', error));
+}
+
+function updateEquityChart() {
+    // Server-side downsampled: a few hundred points regardless of the range
+    const start = Date.now() / 1000 - 30 * 86400;
+    fetch(`/api/charts/equity?start=${start}&points=400`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.enabled || data.t.length < 2) return;
+
+            const t0 = data.t[0], t1 = data.t[data.t.length - 1];
+            const lo = Math.min(...data.v), hi = Math.max(...data.v);
+            const span = hi - lo || 1;
+            equityLine.setAttribute('points', data.t.map((t, i) =>
+                `${((t - t0) / (t1 - t0) * 400).toFixed(1)},${(115 - (data.v[i] - lo) / span * 110).toFixed(1)}`
+            ).join(' '));
+            equityRange.textContent = `$${lo.toFixed(2)} – $${hi.toFixed(2)} · ${data.resolution}`;
+        })
+        .catch(error => console.error('Error fetching equity chart:', error));
+}
+
+function updateLoopHealth() {
+    fetch('/api/loop')
+        .then(response => response.json())
+        .then(data => {
+            if (!data.enabled || !data.lag.samples) return;
+
+            const ms = seconds => `${(seconds * 1000).toFixed(1)}ms`;
+            loopLagElement.textContent = `Lag p50 ${ms(data.lag.p50)} · p95 ${ms(data.lag.p95)} · p99 ${ms(data.lag.p99)} · max ${ms(data.lag.max)}`;
+            loopLagElement.className = data.lag.p99 >= data.threshold ? 'short' : 'long';
 
-            // Logs
-            logContainer.innerHTML = '';
-            if (data.logs) {
-                data.logs.slice().reverse().forEach(log => {
-                    const div = document.createElement('div');
-                    div.className = 'log-entry';
-
-                    // Simple parsing for color
-                    let contentClass = '';
-                    if (log.includes('BUY')) contentClass = 'buy';
-                    if (log.includes('SELL')) contentClass = 'sell';
-
-                    // Extract time (HH:MM:SS)
-                    const timeMatch = log.match(/\d{2}:\d{2}:\d{2}/);
-                    const time = timeMatch ? timeMatch[0] : '';
-                    const message = log.replace(time, '').trim();
-
-                    div.innerHTML = `<span class="log-time">${time}</span><span class="${contentClass}">${message}</span>`;
-                    logContainer.appendChild(div);
+            loopTableBody.innerHTML = '';
+            if (data.offenders.length > 0) {
+                data.offenders.forEach(entry => {
+                    const row = document.createElement('tr');
+                    row.innerHTML = `
+                        <td title="${entry.stack || ''}">${entry.site}</td>
+                        <td>${entry.count}</td>
+                        <td>${ms(entry.blocked)}</td>
+                        <td>${ms(entry.max)}</td>
+                    `;
+                    loopTableBody.appendChild(row);
                 });
+            } else {
+                loopTableBody.innerHTML = '<tr><td colspan="4" style="text-align:center; color: var(--text-secondary);">No blocking calls seen</td></tr>';
             }
         })
-        .catch(error => console.error('Error fetching status:', error));
+        .catch(error => console.error('Error fetching loop health:', error));
 }
 
-// Update every 2 seconds
-setInterval(updateDashboard, 2000);
-updateDashboard();
+// Status and logs are pushed by the server
+connectStatusStream();
+connectLogStream();
+
+// Ledger aggregates change only on fills
+setInterval(updateLedger, 30000);
+updateLedger();
+setInterval(updateEquityChart, 60000);
+updateEquityChart();
+setInterval(updateLoopHealth, 10000);
+updateLoopHealth();
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+from src.logger import setup_logger
+
+logger = setup_logger("status_hub")
+
+
+class StatusHub:
+    """
+    Single dashboard status snapshot shared by every viewer.
+
+    The snapshot is rebuilt from in-memory state only (strategy fields, exchange
+    caches, the equity store) as soon as the exchange reports a change (fills,
+    position/balance updates, equity samples), and at least every `interval`
+    seconds for state without change hooks (strategy fields). A new version is
+    published only when anything changed. Each version's delta and the full
+    snapshot are serialized once, so the cost per update doesn't depend on how
+    many browsers are connected, and viewers never trigger exchange calls.
+    The USDC/JPY rate is refreshed on its own every `fx_interval` seconds.
+    """
+
+    def __init__(self, strategy, exchange, interval=5.0, fx_interval=600):
+        self.strategy = strategy
+        self.exchange = exchange
+        self.interval = interval
+        self.fx_interval = fx_interval
+        self.usdc_jpy = None
+
+        self.version = 0
+        self.snapshot = {"status": "Initializing"}
+        self._snapshot_json = None
+        self._delta_json = None
+        self._changed = None  # Future resolved on the next publish
+        self._dirty = None    # Event set by the exchange's state change hook
+        self._tasks = []
+
+    def start(self):
+        self._changed = asyncio.get_running_loop().create_future()
+        self._dirty = asyncio.Event()
+        if hasattr(self.exchange, 'on_state_change'):
+            self.exchange.on_state_change(self._dirty.set)
+        self._tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._refresh_fx())]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+
+    async def _refresh_fx(self):
+        """Keeps usdc_jpy current: the exchange's USDC/JPY price, else the strategy's USD/JPY rate."""
+        while True:
+            rate = None
+            try:
+                rate = await self.exchange.get_market_price("USDC/JPY")
+            except Exception as e:
+                logger.debug(f"USDC/JPY price unavailable: {e}")
+            self.usdc_jpy = rate or getattr(self.strategy, 'jpy_rate', None) or self.usdc_jpy
+            self._dirty.set()
+            await asyncio.sleep(self.fx_interval)
+
+    def build_snapshot(self):
+        state = self.exchange.cached_status()
+        balance = state['balance']
+
+        # Prefer the sampled equity (includes unrealized PnL); fall back to the cached USDC balance
+        equity = None
+        store = getattr(self.exchange, 'equity_store', None)
+        latest = store.latest() if store else None
+        if latest:
+            equity = latest['equity']
+        elif balance:
+            equity = float(balance.get('total', {}).get('USDC', 0) or 0)
+
+        return {
+            "status": "Running",
+            "target_pair": getattr(self.strategy, 'target_pair', None),
+            "recommendation": getattr(self.strategy, 'current_recommendation', None),
+            "balance": balance,
+            "equity": equity,
+            "total_jpy": equity * self.usdc_jpy if equity is not None and self.usdc_jpy else None,
+            "paper_mode": self.exchange.paper_mode,
+            "positions": state['positions'],
+        }
+
+    def _publish(self, snapshot):
+        changes = {k: v for k, v in snapshot.items() if self.snapshot.get(k) != v}
+        if not changes and self.version:
+            return False
+
+        self.version += 1
+        self.snapshot = snapshot
+        snapshot_payload = json.dumps({"version": self.version, **snapshot}, default=str)
+        delta_payload = json.dumps({"version": self.version, "changes": changes}, default=str)
+        self._snapshot_json = f"event: snapshot\ndata: {snapshot_payload}\n\n"
+        self._delta_json = f"event: delta\ndata: {delta_payload}\n\n"
+
+        changed, self._changed = self._changed, asyncio.get_running_loop().create_future()
+        changed.set_result(self.version)
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                self._publish(self.build_snapshot())
+            except Exception as e:
+                logger.error(f"Status snapshot failed: {e}")
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            # Changes that land while the snapshot is rebuilt are picked up by the next one
+            self._dirty.clear()
+
+    def event_for(self, client_version):
+        """SSE payload bringing a client at `client_version` up to date."""
+        if client_version == self.version - 1:
+            return self._delta_json
+        return self._snapshot_json
+
+    async def events(self, is_disconnected, keepalive=15):
+        """
+        Async generator of SSE messages for one client: the full snapshot first,
+        then one delta per published version (or a snapshot if the client fell
+        more than one version behind).
+        """
+        version = None
+        while not await is_disconnected():
+            if self._snapshot_json is not None and version != self.version:
+                payload = self._snapshot_json if version is None else self.event_for(version)
+                version = self.version
+                yield payload
+                continue
+            try:
+                await asyncio.wait_for(asyncio.shield(self._changed), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield f": keepalive {int(time.time())}\n\n"